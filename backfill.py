@@ -0,0 +1,197 @@
+"""
+과거 시세 일괄 수집 (백필)
+
+코스닥/코스피 전 종목의 일봉(opt10081) 또는 분봉(opt10080)을 목표 일자까지 연속 조회해
+종목/연도별 압축 컬럼 파일(data/history/<종류>/<종목코드>/<연도>.npz)로 저장합니다.
+TR 조회 제한(초/분/시간)에 맞춰 최대 속도로 요청하고, 종목마다 진행 상황을 체크포인트에 기록해
+연결이 끊겨도 다시 실행하면 이어서 수집합니다.
+
+사용법:
+    python backfill.py --since 20150101                  # 전 종목 일봉
+    python backfill.py --kind minute --since 20260901    # 전 종목 1분봉
+    python backfill.py --market kosdaq --codes 005930 035720
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from rate_limit import DEFAULT_WINDOWS, RateLimiter
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+MARKETS = {'kospi': "0", 'kosdaq': "10"}
+
+
+def stamp_to_int(stamp, kind):
+    """일자(YYYYMMDD)/체결시간(YYYYMMDDHHMMSS) 문자열 → 정수"""
+    return int(stamp[:8] if kind == "daily" else stamp[:14])
+
+
+def year_of(stamp, kind):
+    return stamp // 10000 if kind == "daily" else stamp // 10 ** 10
+
+
+def save_npz(path, columns):
+    """압축 컬럼 파일 저장 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **columns)
+    os.replace(tmp_path, path)
+
+
+def load_npz(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in COLUMNS}
+
+
+class BackfillJob:
+    def __init__(self, api, kind="daily", since="20150101", out_dir="data/history", tick_range=1):
+        """
+        과거 시세 수집 작업
+        kind: 'daily'(일봉) 또는 'minute'(분봉)
+        since: 수집 시작 일자 (YYYYMMDD, 이 날짜까지 과거로 연속 조회)
+        """
+        self.api = api
+        self.kind = kind
+        self.since = since
+        self.tick_range = tick_range
+        name = kind if kind == "daily" else f"minute{tick_range}"
+        self.out_dir = os.path.join(out_dir, name)
+        self.checkpoint_path = os.path.join(self.out_dir, f"checkpoint_{since}.json")
+        self.min_stamp = int(since) if kind == "daily" else int(since) * 10 ** 6
+        self.checkpoint = {}
+        self.requests = 0
+        self.max_failures = 5  # 연속 실패 시 중단 (연결 끊김 추정)
+
+    def load_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                self.checkpoint = json.load(f)
+        return self.checkpoint
+
+    def save_checkpoint(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f, separators=(',', ':'))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def fetch(self, code):
+        """목표 일자까지 연속 조회 → 오래된 순 봉 리스트, 페이지 수"""
+        rows = []
+        next = 0
+        pages = 0
+        while True:
+            page, has_next = self.api.get_bar_page(code, self.kind, next, tick_range=self.tick_range)
+            pages += 1
+            self.requests += 1
+            rows.extend(page)
+            if not page or not has_next or stamp_to_int(page[-1][0], self.kind) < self.min_stamp:
+                break
+            next = 2
+        bars = {}
+        for row in rows:
+            stamp = stamp_to_int(row[0], self.kind)
+            if stamp >= self.min_stamp:
+                bars[stamp] = row[1:]
+        return sorted(bars.items()), pages
+
+    def write(self, code, bars):
+        """종목/연도별 파일로 저장 (기존 파일이 있으면 시각 기준으로 병합)"""
+        code_dir = os.path.join(self.out_dir, code)
+        os.makedirs(code_dir, exist_ok=True)
+        by_year = {}
+        for stamp, values in bars:
+            by_year.setdefault(year_of(stamp, self.kind), []).append((stamp, values))
+        for year, year_bars in by_year.items():
+            path = os.path.join(code_dir, f"{year}.npz")
+            merged = {}
+            if os.path.exists(path):
+                old = load_npz(path)
+                for i, stamp in enumerate(old['time'].tolist()):
+                    merged[stamp] = [int(old[name][i]) for name in COLUMNS[1:]]
+            merged.update(year_bars)
+            stamps = sorted(merged)
+            values = np.array([merged[stamp] for stamp in stamps], dtype=np.int64)
+            columns = {'time': np.array(stamps, dtype=np.int64)}
+            for i, name in enumerate(COLUMNS[1:5]):
+                columns[name] = values[:, i].astype(np.int32)
+            columns['volume'] = values[:, 4]
+            save_npz(path, columns)
+
+    def run(self, codes):
+        """전체 종목 수집 - 체크포인트에 완료된 종목은 건너뜀"""
+        self.load_checkpoint()
+        pending = [code for code in codes if code not in self.checkpoint]
+        print(f"백필 시작: {self.kind} {self.since}~, 대상 {len(codes)}종목 (완료 {len(codes) - len(pending)}, 남은 {len(pending)})")
+        started = time.time()
+        failures = 0
+        try:
+            for i, code in enumerate(pending, 1):
+                try:
+                    bars, pages = self.fetch(code)
+                    if bars:
+                        self.write(code, bars)
+                    self.checkpoint[code] = {
+                        'rows': len(bars),
+                        'pages': pages,
+                        'first': bars[0][0] if bars else None,
+                        'last': bars[-1][0] if bars else None,
+                    }
+                    self.save_checkpoint()
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    print(f"수집 실패 ({code}): {e}")
+                    if failures >= self.max_failures:
+                        print(f"연속 {failures}회 실패 - 중단합니다 (다시 실행하면 이어서 수집)")
+                        break
+                if i % 10 == 0 or i == len(pending):
+                    self.progress(i, len(pending), started)
+        except KeyboardInterrupt:
+            print("\n중단 - 완료된 종목까지 체크포인트에 저장되었습니다")
+        self.save_checkpoint()
+
+    def progress(self, done, total, started):
+        elapsed = time.time() - started
+        per_hour = self.requests / elapsed * 3600 if elapsed else 0
+        eta = elapsed / done * (total - done)
+        print(f"  {done}/{total}종목, TR {self.requests:,}건 ({per_hour:,.0f}건/시간), "
+              f"경과 {elapsed / 60:.0f}분, 남은 시간 약 {eta / 3600:.1f}시간")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from PyQt5.QtWidgets import QApplication
+    from kiwoom_api import KiwoomAPI
+
+    parser = argparse.ArgumentParser(description='과거 시세 일괄 수집')
+    parser.add_argument('--kind', choices=['daily', 'minute'], default='daily', help='일봉 또는 분봉')
+    parser.add_argument('--since', type=str, default='20150101', help='수집 시작 일자 (YYYYMMDD)')
+    parser.add_argument('--market', choices=['all', 'kosdaq', 'kospi'], default='all', help='대상 시장')
+    parser.add_argument('--codes', nargs='*', default=None, help='대상 종목코드 (지정 시 시장 대신 사용)')
+    parser.add_argument('--tick', type=int, default=1, help='분봉 틱범위 (1, 3, 5, 10, 15, 30, 45, 60)')
+    parser.add_argument('--out', type=str, default='data/history', help='저장 폴더')
+    parser.add_argument('--per-hour', type=int, default=DEFAULT_WINDOWS[-1][0], help='시간당 TR 한도')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    api = KiwoomAPI()
+    api.comm_connect()
+    windows = DEFAULT_WINDOWS[:-1] + ((args.per_hour, 3600.0),)
+    api.rate_limiter = RateLimiter(windows, sleep=api.sleep)
+    api.low_priority_max_wait = None  # 백필은 조회 한도까지 기다림 (생략하지 않음)
+    api.breaker = None
+
+    if args.codes:
+        codes = args.codes
+    else:
+        markets = list(MARKETS) if args.market == 'all' else [args.market]
+        codes = []
+        for market in markets:
+            codes.extend(api.get_code_list_by_market(MARKETS[market]))
+
+    job = BackfillJob(api, args.kind, args.since, args.out, args.tick)
+    job.run(codes)
@@ -0,0 +1,298 @@
+"""
+전략/TR 파싱 벤치마크 모음
+
+합성 데이터(기본 2,000종목 × 600일봉, 보유 20/200종목)로 전략 함수, 호가 단위 조정,
+가짜 OCX 기반 TR 파싱, 청산 엔진/신호 계획 틱 처리, 신호 캐시 적중 조회, TradingBot 1회 반복을 측정합니다.
+결과는 benchmarks/results/latest.json에 저장하고, 기준선(baseline.json)보다
+허용 비율 이상 느려진 항목이 있으면 종료코드 1로 실패합니다.
+
+사용법:
+    python benchmarks/bench_suite.py --save-baseline        # 기준선 저장 (변경 전)
+    python benchmarks/bench_suite.py                        # 기준선과 비교 (변경 후)
+    python benchmarks/bench_suite.py --only strategy --codes 500
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import FakeOCX, make_universe  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+@contextlib.contextmanager
+def quiet():
+    """봇의 디버그 출력 숨김"""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def strategy_cases(universe):
+    from strategy import BollingerBandStrategy, RSIStrategy, ScalpingStrategy, VolatilityBreakoutStrategy
+
+    # TradingBot.setup_strategy와 같은 파라미터
+    strategies = {
+        'bollinger': BollingerBandStrategy(period=10, std_dev=1.5),
+        'rsi': RSIStrategy(period=14, oversold=30, overbought=70),
+        'scalping': ScalpingStrategy(volume_threshold=1000000000, price_change_threshold=3.0),
+        'breakout': VolatilityBreakoutStrategy(k_ratio=0.5, volume_multiplier=1.5),
+    }
+    series = list(universe.values())
+    cases = {}
+    for name, strategy in strategies.items():
+        cases[f"strategy.{name}.check_buy_signal"] = (
+            lambda s=strategy: [s.check_buy_signal(data) for data in series], len(series))
+        cases[f"strategy.{name}.get_buy_signal_price"] = (
+            lambda s=strategy: [s.get_buy_signal_price(data) for data in series], len(series))
+    breakout = strategies['breakout']
+    cases["strategy.breakout.calculate_adaptive_k"] = (
+        lambda: [breakout.calculate_adaptive_k(data) for data in series], len(series))
+    return cases
+
+
+def signal_cache_cases(universe):
+    from signal_cache import SignalCache
+    from strategy import BollingerBandStrategy, RSIStrategy, VolatilityBreakoutStrategy
+
+    strategies = {
+        'bollinger': BollingerBandStrategy(period=10, std_dev=1.5),
+        'rsi': RSIStrategy(period=14, oversold=30, overbought=70),
+        'breakout': VolatilityBreakoutStrategy(k_ratio=0.5, volume_multiplier=1.5),
+    }
+    items = list(universe.items())
+    cases = {}
+    for name, strategy in strategies.items():
+        # 같은 일봉으로 다시 계산하는 경우 (선정 후 목록 출력, 다음 반복의 재선정) - 첫 실행(예열)에서 채워짐
+        cache = SignalCache(maxsize=len(items) * 2)
+        cases[f"signal_cache.{name}.check_buy_signal[hit]"] = (
+            lambda s=strategy, c=cache: [c.check_buy_signal(s, code, data) for code, data in items], len(items))
+        cases[f"signal_cache.{name}.get_buy_signal_price[hit]"] = (
+            lambda s=strategy, c=cache: [c.get_buy_signal_price(s, code, data) for code, data in items], len(items))
+    return cases
+
+
+def tick_size_cases():
+    from trading_bot import TradingBot
+
+    rng = random.Random(0)
+    prices = [rng.randint(100, 1000000) for _ in range(100000)]
+    adjust = TradingBot.adjust_to_tick_size
+    return {"bot.adjust_to_tick_size": (lambda: [adjust(None, price) for price in prices], len(prices))}
+
+
+def tr_cases(universe, held_counts):
+    from kiwoom_api import KiwoomAPI
+
+    cases = {}
+    codes = list(universe)[:50]
+    api = KiwoomAPI(FakeOCX(universe))
+    cases["tr.daily_data"] = (lambda: [api.get_daily_data(code) for code in codes], len(codes))
+    cases["tr.volume_rank"] = (lambda: api.get_volume_rank(), 1)
+    for held in held_counts:
+        balance_api = KiwoomAPI(FakeOCX(universe, held=held))
+        cases[f"tr.balance[held={held}]"] = (balance_api.get_balance, 1)
+    return cases
+
+
+def exit_engine_cases(universe, held_counts):
+    from exit_engine import ExitEngine
+
+    class OrderSink:
+        account_num = "8000000011"
+
+        class screens:
+            @staticmethod
+            def order_screen():
+                return "2000"
+
+        def send_order(self, *args):
+            return 0
+
+    cases = {}
+    rng = random.Random(1)
+    for held in held_counts:
+        codes = list(universe)[:held]
+        ticks = []
+        for _ in range(100000):
+            code = rng.choice(codes)
+            base = universe[code][0][4]
+            ticks.append((code, int(base * (1 + rng.uniform(-0.009, 0.009)))))
+
+        def run(codes=codes, ticks=ticks):
+            engine = ExitEngine(OrderSink(), trailing_stop=2.0)
+            with quiet():
+                for code in codes:
+                    engine.track(code, universe[code][0][4], 10)
+            for code, price in ticks:
+                engine.on_price(code, price)
+        cases[f"exit_engine.on_price[held={held}]"] = (run, len(ticks))
+    return cases
+
+
+def signal_plan_cases(universe):
+    from signal_plan import SignalPlanner
+    from strategy import VolatilityBreakoutStrategy
+
+    codes = list(universe)
+    today = universe[codes[0]][0][0]
+    planner = SignalPlanner(VolatilityBreakoutStrategy(k_ratio=0.5, volume_multiplier=1.5))
+    cases = {"signal_plan.build": (lambda: [planner.build(code, universe[code], today) for code in codes], len(codes))}
+    for code in codes:
+        planner.build(code, universe[code], today)
+    rng = random.Random(2)
+    ticks = []
+    for _ in range(100000):
+        code = rng.choice(codes)
+        bar = universe[code][0]
+        ticks.append((code, {'open': bar[1], 'price': bar[1], 'high': bar[1], 'cum_volume': bar[5]}))
+    on_real_data = planner.on_real_data
+    cases["signal_plan.on_real_data"] = (lambda: [on_real_data(code, "주식체결", data) for code, data in ticks], len(ticks))
+    return cases
+
+
+def bot_cases(universe, held_counts):
+    from kiwoom_api import KiwoomAPI
+    from trading_bot import TradingBot
+
+    cases = {}
+    for held in held_counts:
+        with quiet():
+            bot = TradingBot(KiwoomAPI(FakeOCX(universe, held=held)))
+            bot.symbols.cache_dir = None
+            bot.max_stocks = held + 20  # 보유 한도에 걸려 매수 신호 확인을 건너뛰지 않도록
+            bot.login()
+            bot.warmup()
+
+        def iteration(bot=bot):
+            with quiet():
+                bot.show_account_info()
+                bot.check_buy_signals()
+                bot.check_sell_signals()
+        cases[f"bot.iteration[held={held}]"] = (iteration, 1)
+    return cases
+
+
+def measure(func, repeat):
+    """1회 예열 후 repeat회 실행 → 실행당 시간 리스트 (초)"""
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def compare(results, baseline, tolerance):
+    """기준선 대비 변화 출력 → 회귀 항목 리스트"""
+    regressions = []
+    print(f"\n{'항목':<48} {'중앙값':>10} {'기준선':>10} {'변화':>8}")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        median_ms = result['median_ms']
+        if base is None:
+            print(f"{name:<48} {median_ms:>8.2f}ms {'-':>10} {'신규':>8}")
+            continue
+        change = median_ms / base['median_ms'] - 1 if base['median_ms'] else 0.0
+        mark = ""
+        if change > tolerance:
+            regressions.append((name, change))
+            mark = "  <-- 회귀"
+        print(f"{name:<48} {median_ms:>8.2f}ms {base['median_ms']:>8.2f}ms {change * 100:>+7.1f}%{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='전략/TR 파싱 벤치마크')
+    parser.add_argument('--codes', type=int, default=2000, help='합성 종목 수')
+    parser.add_argument('--bars', type=int, default=600, help='종목당 일봉 수')
+    parser.add_argument('--held', type=int, nargs='+', default=[20, 200], help='보유 종목 수 (여러 개 지정 가능)')
+    parser.add_argument('--repeat', type=int, default=5, help='반복 횟수 (중앙값 사용)')
+    parser.add_argument('--only', type=str, default=None, help='이름에 이 문자열이 포함된 항목만 실행')
+    parser.add_argument('--baseline', type=str, default=BASELINE_PATH, help='기준선 파일')
+    parser.add_argument('--save-baseline', action='store_true', help='이번 결과를 기준선으로 저장')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='회귀 판정 허용 비율 (0.25 = 25%% 느려짐)')
+    args = parser.parse_args()
+
+    from PyQt5.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # KiwoomAPI의 QEventLoop용
+
+    start = time.perf_counter()
+    universe = make_universe(args.codes, args.bars)
+    print(f"합성 데이터: {args.codes}종목 × {args.bars}일봉 ({time.perf_counter() - start:.1f}초)")
+
+    cases = {}
+    cases.update(strategy_cases(universe))
+    cases.update(signal_cache_cases(universe))
+    cases.update(tick_size_cases())
+    cases.update(tr_cases(universe, args.held))
+    cases.update(exit_engine_cases(universe, args.held))
+    cases.update(signal_plan_cases(universe))
+    cases.update(bot_cases(universe, args.held))
+
+    results = {}
+    for name, (func, ops) in cases.items():
+        if args.only and args.only not in name:
+            continue
+        times = measure(func, args.repeat)
+        median = statistics.median(times)
+        results[name] = {
+            'median_ms': median * 1000,
+            'min_ms': min(times) * 1000,
+            'ops': ops,
+            'us_per_op': median / ops * 1e6,
+        }
+        print(f"  {name:<48} {median * 1000:>9.2f}ms ({median / ops * 1e6:,.2f}μs/건)")
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'params': {'codes': args.codes, 'bars': args.bars, 'held': args.held, 'repeat': args.repeat},
+        'results': results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "latest.json"), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+
+    if args.save_baseline:
+        if args.only and os.path.exists(args.baseline):
+            # 일부 항목만 실행한 경우 기존 기준선에 병합
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                merged = json.load(f)
+            merged['results'].update(results)
+            report['results'] = merged['results']
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"\n기준선 저장: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n기준선 없음 - 먼저 --save-baseline으로 저장하세요: {args.baseline}")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('params', {}).get('codes') != args.codes or baseline.get('params', {}).get('bars') != args.bars:
+        print("경고: 기준선과 합성 데이터 크기가 다릅니다 - 비교 결과가 의미 없을 수 있습니다")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n실패: {len(regressions)}개 항목이 기준선보다 {args.tolerance * 100:.0f}% 이상 느려졌습니다")
+        for name, change in regressions:
+            print(f"  {name}: {change * 100:+.1f}%")
+        sys.exit(1)
+    print("\n회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+계산 작업 풀 벤치마크 - 전 종목 스캔 중 메인 스레드 이벤트 처리 지연
+
+합성 일봉(기본 2,000종목)으로 전략 신호가 계산과 신호 계획 계산을 하는 동안
+10ms 주기 타이머가 예정보다 늦게 실행된 시간(= 체결/TR 이벤트가 기다린 시간)을 측정합니다.
+    idle:   스캔 없음 (기준)
+    inline: 메인 스레드에서 스캔 (기존 방식)
+    pool:   ComputePool 작업 스레드에서 스캔 (결과만 메인 스레드로 전달)
+
+사용법:
+    python benchmarks/compute_pool_bench.py
+    python benchmarks/compute_pool_bench.py --codes 4000 --workers 2
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import make_universe  # noqa: E402
+
+
+def scan(strategies, planner, code, daily_data, today):
+    """종목 1개 스캔 - 전략별 신호가 + 신호 계획"""
+    prices = [strategy.get_buy_signal_price(daily_data) for strategy in strategies]
+    return prices, planner.make(code, daily_data, today)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='계산 작업 풀 이벤트 지연 벤치마크')
+    parser.add_argument('--codes', type=int, default=2000, help='합성 종목 수')
+    parser.add_argument('--bars', type=int, default=120, help='종목당 일봉 수')
+    parser.add_argument('--workers', type=int, default=None, help='작업 스레드 수')
+    parser.add_argument('--idle', type=float, default=1.0, help='기준 측정 시간 (초)')
+    args = parser.parse_args()
+
+    from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    from compute_pool import ComputePool, LatencyProbe
+    from signal_plan import SignalPlanner
+    from strategy import BollingerBandStrategy, RSIStrategy, VolatilityBreakoutStrategy
+
+    universe = make_universe(args.codes, args.bars)
+    today = universe[next(iter(universe))][0][0]
+    strategies = [BollingerBandStrategy(period=10, std_dev=1.5), RSIStrategy(period=14, oversold=30, overbought=70),
+                  VolatilityBreakoutStrategy(k_ratio=0.5, volume_multiplier=1.5)]
+    planner = SignalPlanner(strategies[0])
+    items = list(universe.items())
+    pool = ComputePool(args.workers)
+    probe = LatencyProbe(interval_ms=10)
+    results = {}
+
+    # idle: 이벤트 루프만 실행
+    probe.start()
+    loop = QEventLoop()
+    QTimer.singleShot(int(args.idle * 1000), loop.quit)
+    loop.exec_()
+    results['idle'] = (probe.stop(), args.idle)
+
+    def finish(name, elapsed):
+        # 스캔 중 밀린 타이머가 한 번 실행된 뒤 측정 종료
+        results[name] = (probe.stop(), elapsed)
+        loop.quit()
+
+    # inline: 메인 스레드에서 스캔 (스캔 중 타이머가 실행되지 못함)
+    def run_inline():
+        start = time.perf_counter()
+        for code, daily_data in items:
+            scan(strategies, planner, code, daily_data, today)
+        elapsed = time.perf_counter() - start
+        QTimer.singleShot(30, lambda: finish('inline', elapsed))
+
+    probe.start()
+    QTimer.singleShot(20, run_inline)
+    loop.exec_()
+
+    # pool: 작업 스레드에서 스캔 (메인 스레드는 결과 전달과 이벤트 처리만)
+    def run_pool():
+        start = time.perf_counter()
+        pool.map(lambda item: scan(strategies, planner, item[0], item[1], today), items)
+        elapsed = time.perf_counter() - start
+        QTimer.singleShot(30, lambda: finish('pool', elapsed))
+
+    probe.start()
+    QTimer.singleShot(20, run_pool)
+    loop.exec_()
+    pool.shutdown()
+
+    print(f"전 종목 스캔: {args.codes}종목 × {args.bars}일봉, 작업 스레드 {pool.workers}개")
+    print(f"{'방식':<8} {'소요':>8} {'타이머':>8} {'지연 p50':>10} {'p99':>10} {'최대':>10}")
+    for name, (summary, elapsed) in results.items():
+        print(f"{name:<8} {elapsed:>7.2f}초 {summary['count']:>7}회 {summary['p50_ms']:>8.2f}ms "
+              f"{summary['p99_ms']:>8.2f}ms {summary['max_ms']:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+체결 합치기 대기열 벤치마크 - 체결 폭주 중 결정 지연
+
+Qt 이벤트 루프에서 예정 시각표대로 체결을 흘려보내며(0ms 타이머가 도착한 체결을 OCX 이벤트처럼 전달)
+틱마다 평가 비용(--cost μs)이 드는 전략 평가가 예정 시각보다 얼마나 늦게 실행되는지 측정합니다.
+    direct:   체결마다 바로 평가 (기존 방식)
+    conflate: ConflationQueue로 종목별 최신 체결만 평가, 보유 종목의 청산 조건 교차는 바로 평가
+결정 지연 = 평가 시각 - 평가한 체결의 예정 도착 시각 (청산 교차는 따로 집계)
+
+사용법:
+    python benchmarks/conflation_bench.py
+    python benchmarks/conflation_bench.py --rate 30000 --cost 80 --seconds 3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CRITICAL_RATIO = 0.02  # 보유 종목 체결 중 청산 조건을 건드리는 비율
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def make_schedule(codes, held, rate, seconds, seed):
+    """[(예정 시각(초), 종목코드, 청산 교차 여부)] - 앞 1/3 구간에 체결의 절반이 몰림"""
+    rng = random.Random(seed)
+    total = int(rate * seconds)
+    weights = [1 / (i + 1) ** 0.8 for i in range(len(codes))]
+    picks = rng.choices(codes, weights, k=total)
+    schedule = []
+    for i, code in enumerate(picks):
+        burst = i < total // 2
+        at = rng.uniform(0, seconds / 3) if burst else rng.uniform(seconds / 3, seconds)
+        schedule.append((at, code, code in held and rng.random() < CRITICAL_RATIO))
+    schedule.sort()
+    return schedule
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return 0.0, 0.0, 0.0
+    return (samples[len(samples) // 2] * 1000, samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000,
+            samples[-1] * 1000)
+
+
+def run(mode, schedule, held, cost):
+    from PyQt5.QtCore import QEventLoop, QTimer
+    from conflation import ConflationQueue
+
+    lags, critical_lags = [], []
+    evaluated = [0]
+    loop = QEventLoop()
+
+    def evaluate(code, real_type, data):
+        busy(cost)
+        evaluated[0] += 1
+        lag = time.perf_counter() - data['due']
+        (critical_lags if data['critical'] else lags).append(lag)
+
+    queue = ConflationQueue(critical=lambda code, price: price < 0, priority=lambda code: code in held)
+    queue.handlers.append(evaluate)
+    deliver = queue.on_real_data if mode == "conflate" else evaluate
+    state = {'next': 0, 'start': None}
+
+    def feed():
+        # 예정 시각이 지난 체결을 OCX 이벤트처럼 모두 전달 (다른 타이머 실행 중 쌓인 이벤트)
+        now = time.perf_counter() - state['start']
+        i = state['next']
+        while i < len(schedule) and schedule[i][0] <= now:
+            at, code, critical = schedule[i]
+            deliver(code, "주식체결", {'due': state['start'] + at, 'critical': critical,
+                                       'price': -1 if critical else 1})
+            i += 1
+        state['next'] = i
+        if i >= len(schedule) and not queue.pending:
+            feeder.stop()
+            loop.quit()
+
+    feeder = QTimer()
+    feeder.setInterval(0)
+    feeder.timeout.connect(feed)
+    state['start'] = time.perf_counter()
+    feeder.start()
+    loop.exec_()
+    elapsed = time.perf_counter() - state['start']
+    return {'elapsed': elapsed, 'evaluated': evaluated[0], 'lags': percentiles(lags),
+            'critical': percentiles(critical_lags), 'critical_count': len(critical_lags), 'queue': queue.summary()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='체결 합치기 대기열 결정 지연 벤치마크')
+    parser.add_argument('--codes', type=int, default=400, help='실시간 등록 종목 수')
+    parser.add_argument('--held', type=int, default=8, help='보유 종목 수 (청산 평가 우선)')
+    parser.add_argument('--rate', type=int, default=20000, help='평균 체결 건수 (건/초)')
+    parser.add_argument('--seconds', type=float, default=2.0, help='시각표 길이 (초)')
+    parser.add_argument('--cost', type=float, default=60.0, help='체결 1건 평가 비용 (μs)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from PyQt5.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    codes = [f"{100000 + i:06d}" for i in range(args.codes)]
+    held = set(codes[:args.held])
+    schedule = make_schedule(codes, held, args.rate, args.seconds, args.seed)
+    print(f"체결 {len(schedule):,}건 / {args.seconds}초 ({args.codes}종목, 보유 {args.held}종목), "
+          f"평가 비용 {args.cost:.0f}μs (처리 한계 {1e6 / args.cost:,.0f}건/초)")
+    print(f"{'방식':<9} {'소요':>7} {'평가':>8} {'지연 p50':>10} {'p99':>10} {'최대':>10} "
+          f"{'청산 p99':>10} {'청산 최대':>10} {'대기열 최대':>10}")
+    for mode in ("direct", "conflate"):
+        r = run(mode, schedule, held, args.cost / 1e6)
+        p50, p99, worst = r['lags']
+        _, critical_p99, critical_max = r['critical']
+        depth = r['queue']['max_depth'] if mode == "conflate" else "-"
+        print(f"{mode:<9} {r['elapsed']:>6.2f}초 {r['evaluated']:>8,} {p50:>8.1f}ms {p99:>8.1f}ms {worst:>8.1f}ms "
+              f"{critical_p99:>8.1f}ms {critical_max:>8.1f}ms {depth:>10}")
+
+
+if __name__ == "__main__":
+    main()
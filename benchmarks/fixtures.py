@@ -0,0 +1,149 @@
+"""
+벤치마크용 합성 데이터와 가짜 OCX
+
+make_universe: 종목별 일봉 (KiwoomAPI.get_daily_data 형식 [일자, 시가, 고가, 저가, 종가, 거래량], 최신순)
+FakeOCX: 키움 OCX 흉내 - TR 응답 이벤트를 CommRqData 호출 안에서 바로 발생 (동기)
+"""
+import datetime
+
+import numpy as np
+
+
+def make_dates(n_bars, end=datetime.date(2026, 10, 19)):
+    """평일 일자 문자열 (오래된 순)"""
+    dates = []
+    day = end
+    while len(dates) < n_bars:
+        if day.weekday() < 5:
+            dates.append(day.strftime("%Y%m%d"))
+        day -= datetime.timedelta(days=1)
+    dates.reverse()
+    return dates
+
+
+def make_universe(n_codes=2000, n_bars=600, seed=0):
+    """
+    종목별 합성 일봉 (로그 랜덤워크 + 일중 변동폭)
+    반환: {종목코드: [[일자, 시가, 고가, 저가, 종가, 거래량], ...] 최신순}
+    """
+    rng = np.random.default_rng(seed)
+    dates = make_dates(n_bars)
+    universe = {}
+    for i in range(n_codes):
+        start = rng.uniform(1000, 200000)
+        close = start * np.exp(np.cumsum(rng.normal(0, 0.025, n_bars)))
+        close = np.maximum(close, 100)
+        open_ = close * (1 + rng.normal(0, 0.01, n_bars))
+        spread = np.abs(rng.normal(0, 0.02, n_bars)) * close
+        high = np.maximum(open_, close) + spread
+        low = np.maximum(np.minimum(open_, close) - spread, 1)
+        volume = rng.lognormal(11, 1, n_bars)
+        bars = np.stack([open_, high, low, close, volume], axis=1).astype(np.int64)[::-1].tolist()
+        universe[f"{100000 + i:06d}"] = [[date] + row for date, row in zip(reversed(dates), bars)]
+    return universe
+
+
+class Signal:
+    def __init__(self):
+        self.handlers = []
+
+    def connect(self, handler):
+        self.handlers.append(handler)
+
+    def emit(self, *args):
+        for handler in self.handlers:
+            handler(*args)
+
+
+class FakeOCX:
+    def __init__(self, universe, held=20, rank_size=100):
+        """
+        가짜 OCX
+        universe: make_universe() 결과
+        held: 계좌 보유 종목 수 (opw00018 응답 행 수)
+        """
+        self.universe = universe
+        self.codes = list(universe)
+        self.held = self.codes[-held:] if held else []
+        self.ranked = self.codes[:rank_size]
+        self.inputs = {}
+        self.request = None
+        for name in ("OnEventConnect", "OnReceiveTrData", "OnReceiveChejanData", "OnReceiveConditionVer",
+                     "OnReceiveTrCondition", "OnReceiveRealCondition", "OnReceiveRealData"):
+            setattr(self, name, Signal())
+        self.calls = 0
+
+    def sleep(self, seconds):
+        pass
+
+    def _bars(self):
+        return self.universe.get(self.request[2].get("종목코드"), [])
+
+    def _comm_data(self, rqname, i, field):
+        if rqname in ("일봉데이터", "일봉백필"):
+            row = self._bars()[i]
+            index = {"일자": 0, "시가": 1, "고가": 2, "저가": 3, "현재가": 4, "거래량": 5}[field]
+            return f" {row[index]} "
+        if rqname == "현재가":
+            bars = self._bars()
+            return f" +{bars[0][4]} " if bars else ""
+        if rqname == "거래대금상위":
+            code = self.ranked[i]
+            bar = self.universe[code][0]
+            return {"종목코드": code, "종목명": f"종목{code}", "현재가": f"+{bar[4]}",
+                    "거래대금": str(bar[4] * bar[5] // 1000000), "등락률": "+1.50"}[field]
+        if rqname == "계좌평가잔고내역요청":
+            if field in ("예수금", "d+2예수금"):
+                return "000000100000000"
+            if field.startswith("총"):
+                return "0"
+            code = self.held[i]
+            bar = self.universe[code][0]
+            buy_price = self.universe[code][1][4]
+            return {"종목번호": "A" + code, "종목명": f"종목{code}", "보유수량": "10", "매매가능수량": "10",
+                    "매입가": str(buy_price), "현재가": str(bar[4]), "평가손익": str((bar[4] - buy_price) * 10),
+                    "수익률(%)": f"{(bar[4] - buy_price) / buy_price * 100:.2f}"}[field]
+        return ""
+
+    def dynamicCall(self, signature, *args):
+        self.calls += 1
+        name = signature[:signature.index("(")]
+        if name == "GetCommData":
+            return self._comm_data(args[1], args[2], args[3])
+        if name == "SetInputValue":
+            self.inputs[args[0]] = args[1]
+            return None
+        if name == "GetRepeatCnt":
+            rqname = args[1]
+            if rqname in ("일봉데이터", "일봉백필"):
+                return len(self._bars())
+            if rqname == "거래대금상위":
+                return len(self.ranked)
+            if rqname == "계좌평가잔고내역요청":
+                return len(self.held)
+            return 0
+        if name == "CommRqData":
+            rqname, trcode, next, screen_no = args
+            self.request = (rqname, trcode, self.inputs)
+            self.inputs = {}
+            self.OnReceiveTrData.emit(screen_no, rqname, trcode, "", "0", 0, "", "", "")
+            return 0
+        if name == "CommConnect":
+            self.OnEventConnect.emit(0)
+            return 0
+        if name == "GetLoginInfo":
+            return "8000000011;"
+        if name == "GetCodeListByMarket":
+            return ";".join(self.codes) + ";" if args[0] == "10" else ""
+        if name == "GetMasterCodeName":
+            return f"종목{args[0]}"
+        if name == "GetMasterLastPrice":
+            bars = self.universe.get(args[0])
+            return f"{bars[1][4]:08d}" if bars else "0"
+        if name == "GetMasterListedStockCnt":
+            return 10000000
+        if name == "GetMasterConstruction":
+            return "정상"
+        if name == "GetChejanData":
+            return ""
+        return 0
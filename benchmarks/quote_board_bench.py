@@ -0,0 +1,152 @@
+"""
+공유 메모리 시세판 벤치마크
+
+기록기 갱신 처리량(건/초), 리더 조회 비용(get 1회), 리더 프로세스 여러 개가
+동시에 폴링할 때 기록 → 관측 지연(중앙값/p99)을 측정합니다.
+
+사용법:
+    python benchmarks/quote_board_bench.py
+    python benchmarks/quote_board_bench.py --codes 2000 --readers 4 --seconds 3
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from quote_board import QuoteBoardReader, QuoteBoardWriter  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def reader_process(path, codes, ready, stop, results):
+    """리더 프로세스 - 감시 종목의 seq가 바뀌면 기록 시각과 현재 시각의 차이를 지연으로 기록"""
+    reader = QuoteBoardReader(path)
+    reader.refresh()
+    last = {code: reader.seq(code) for code in codes}
+    latencies = []
+    polls = 0
+    ready.set()
+    while not stop.is_set():
+        for code in codes:
+            seq = reader.seq(code)
+            if seq != last[code] and not seq & 1:
+                values = reader.get(code)
+                latencies.append(time.perf_counter() - values[4])
+                last[code] = seq
+        polls += 1
+    results.put((latencies, polls, reader.retries))
+    reader.close()
+
+
+def bench_writer(path, codes, updates):
+    """기록기 갱신 처리량 (체결 필드 전체 갱신)"""
+    writer = QuoteBoardWriter(path, capacity=len(codes))
+    for code in codes:
+        writer.slot(code)
+    rng = random.Random(0)
+    sequence = [rng.choice(codes) for _ in range(updates)]
+    start = time.perf_counter()
+    for i, code in enumerate(sequence):
+        writer.update(code, price=50000 + i % 100, bid=49950, ask=50000, cum_volume=i)
+    elapsed = time.perf_counter() - start
+    writer.close()
+    return updates / elapsed
+
+
+def bench_get(path, codes, count):
+    """리더 get() 1회 비용 (μs)"""
+    reader = QuoteBoardReader(path)
+    reader.refresh()
+    sequence = [codes[i % len(codes)] for i in range(count)]
+    start = time.perf_counter()
+    for code in sequence:
+        reader.get(code)
+    elapsed = time.perf_counter() - start
+    reader.close()
+    return elapsed / count * 1e6
+
+
+def bench_fanout(path, codes, readers, seconds, rate):
+    """리더 여러 개가 폴링하는 동안 초당 rate건 갱신 → 관측 지연"""
+    # perf_counter를 시각으로 기록 (Linux/Windows 모두 프로세스 간 같은 단조 시계)
+    writer = QuoteBoardWriter(path, capacity=len(codes), clock=time.perf_counter)
+    for code in codes:
+        writer.slot(code)
+    watched = codes[:20]
+
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    results = ctx.Queue()
+    events = []
+    processes = []
+    for _ in range(readers):
+        ready = ctx.Event()
+        process = ctx.Process(target=reader_process, args=(path, watched, ready, stop, results))
+        process.start()
+        events.append(ready)
+        processes.append(process)
+    for ready in events:
+        ready.wait()
+
+    rng = random.Random(1)
+    interval = 1.0 / rate
+    next_at = time.perf_counter()
+    end = next_at + seconds
+    while next_at < end:
+        while time.perf_counter() < next_at:
+            pass
+        code = rng.choice(watched)
+        writer.update(code, price=rng.randint(10000, 20000), bid=10000, ask=10010, cum_volume=1)
+        next_at += interval
+    time.sleep(0.05)
+    stop.set()
+
+    latencies, polls, retries = [], 0, 0
+    for _ in processes:
+        reader_latencies, reader_polls, reader_retries = results.get()
+        latencies.extend(reader_latencies)
+        polls += reader_polls
+        retries += reader_retries
+    for process in processes:
+        process.join()
+    writer.close()
+    return latencies, polls, retries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='공유 메모리 시세판 벤치마크')
+    parser.add_argument('--codes', type=int, default=2000, help='종목 수')
+    parser.add_argument('--updates', type=int, default=500000, help='기록기 처리량 측정 갱신 횟수')
+    parser.add_argument('--readers', type=int, default=4, help='리더 프로세스 수')
+    parser.add_argument('--seconds', type=float, default=2.0, help='지연 측정 시간')
+    parser.add_argument('--rate', type=int, default=5000, help='지연 측정 중 초당 갱신 수')
+    args = parser.parse_args()
+
+    codes = [f"{i:06d}" for i in range(args.codes)]
+    path = os.path.join(tempfile.mkdtemp(), "quote_board.bin")
+
+    throughput = bench_writer(path, codes, args.updates)
+    print(f"기록기 처리량: {throughput:,.0f}건/초 ({1e6 / throughput:.2f}μs/건)")
+    print(f"리더 get(): {bench_get(path, codes, 200000):.2f}μs/건")
+
+    latencies, polls, retries = bench_fanout(path, codes, args.readers, args.seconds, args.rate)
+    if latencies:
+        print(f"리더 {args.readers}개 관측 지연: 중앙값 {statistics.median(latencies) * 1e6:.1f}μs, "
+              f"p99 {percentile(latencies, 0.99) * 1e6:.1f}μs, 최대 {max(latencies) * 1e6:.1f}μs "
+              f"({len(latencies):,}건, 폴링 {polls:,}회, seqlock 재시도 {retries}회)")
+    else:
+        print("관측된 갱신이 없습니다")
+
+
+if __name__ == "__main__":
+    main()
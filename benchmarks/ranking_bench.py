@@ -0,0 +1,87 @@
+"""
+거래대금 순위 벤치마크 - 증분 상위 K 유지 vs 조회마다 전체 정렬
+
+코스닥 전 종목 규모(--codes)의 누적 거래대금 갱신을 흘려보내며 --query 건마다 상위 K를 조회합니다.
+    sort: 종목별 값 사전만 갱신하고 조회마다 전체 정렬 (O(n log n) / 조회)
+    heap: TradeValueRanking으로 갱신마다 O(log n), 조회는 상위 K만 정렬
+두 방식의 상위 K가 매 조회 같은지도 확인합니다.
+
+사용법:
+    python benchmarks/ranking_bench.py
+    python benchmarks/ranking_bench.py --codes 1700 --updates 2000000 --query 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ranking import TradeValueRanking  # noqa: E402
+
+
+def make_updates(codes, total, seed):
+    """[(종목코드, 누적 거래대금)] - 거래가 일부 종목에 몰리고 누적값은 늘어나기만 함"""
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) ** 0.8 for i in range(len(codes))]
+    amounts = {code: rng.randint(1, 100) for code in codes}
+    updates = []
+    for code in rng.choices(codes, weights, k=total):
+        amounts[code] += rng.randint(1, 50)
+        updates.append((code, amounts[code]))
+    return updates
+
+
+def run_sort(updates, k, query):
+    amounts = {}
+    tops = []
+    start = time.perf_counter()
+    for i, (code, amount) in enumerate(updates, 1):
+        amounts[code] = amount
+        if i % query == 0:
+            tops.append(sorted(amounts.items(), key=lambda item: -item[1])[:k])
+    return time.perf_counter() - start, tops
+
+
+def run_heap(updates, k, query):
+    ranking = TradeValueRanking(k=k)
+    tops = []
+    start = time.perf_counter()
+    for i, (code, amount) in enumerate(updates, 1):
+        ranking.update(code, amount)
+        if i % query == 0:
+            tops.append(ranking.ranked())
+    return time.perf_counter() - start, tops, ranking
+
+
+def main():
+    parser = argparse.ArgumentParser(description='거래대금 상위 K 순위 벤치마크')
+    parser.add_argument('--codes', type=int, default=1700, help='종목 수 (코스닥 전 종목 규모)')
+    parser.add_argument('--updates', type=int, default=2000000, help='누적 거래대금 갱신 건수')
+    parser.add_argument('-k', type=int, default=50, help='상위 종목 수')
+    parser.add_argument('--query', type=int, default=100, help='상위 K 조회 간격 (갱신 건수)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    codes = [f"{100000 + i:06d}" for i in range(args.codes)]
+    updates = make_updates(codes, args.updates, args.seed)
+    queries = args.updates // args.query
+    print(f"종목 {args.codes:,}개, 갱신 {args.updates:,}건, 상위 {args.k} 조회 {queries:,}회 ({args.query}건마다)")
+
+    sort_time, sort_tops = run_sort(updates, args.k, args.query)
+    heap_time, heap_tops, ranking = run_heap(updates, args.k, args.query)
+    # 같은 거래대금이면 순서가 다를 수 있으므로 값 목록으로 비교
+    same = all([a for _, a in x] == [a for _, a in y] for x, y in zip(sort_tops, heap_tops))
+
+    # 갱신당 = 조회 비용을 나눠 포함한 갱신 1건 비용
+    print(f"{'방식':<6} {'소요':>8} {'갱신+조회/초':>14} {'갱신당':>10}")
+    for name, elapsed in (("sort", sort_time), ("heap", heap_time)):
+        print(f"{name:<6} {elapsed:>7.2f}초 {args.updates / elapsed:>14,.0f} {elapsed / args.updates * 1e6:>8.2f}μs")
+    print(f"heap/sort {sort_time / heap_time:.1f}배, 상위 {args.k} 변경 {ranking.changes:,}건, "
+          f"결과 {'일치' if same else '불일치'}")
+
+
+if __name__ == "__main__":
+    main()
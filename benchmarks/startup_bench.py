@@ -0,0 +1,107 @@
+"""
+트레이딩 봇 기동 시간 벤치마크
+
+trading_bot 모듈 import 시간(-X importtime)과 프로세스 최대 메모리(RSS)를 측정하고,
+예산을 넘으면 종료코드 1로 실패합니다.
+
+사용법:
+    python benchmarks/startup_bench.py
+    python benchmarks/startup_bench.py --max-import-ms 800 --max-rss-mb 80
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 자식 프로세스에서 import 후 최대 RSS(MB) 출력
+RSS_SCRIPT = r"""
+import sys
+sys.path.insert(0, {root!r})
+import {module}
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                             ctypes.byref(counters), counters.cb)
+    print(counters.PeakWorkingSetSize / 1024 / 1024)
+else:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위
+    print(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024)
+"""
+
+
+def measure_import(module):
+    """-X importtime으로 모듈 import 시간 측정 → (전체 ms, {최상위 패키지: 자체 시간 합계 ms})"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total_ms = 0.0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + int(self_us) / 1000
+        if name == module:
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, packages
+
+
+def measure_rss(module):
+    result = subprocess.run([sys.executable, "-c", RSS_SCRIPT.format(root=ROOT, module=module)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='트레이딩 봇 기동 시간/메모리 벤치마크')
+    parser.add_argument('--module', default='trading_bot', help='측정할 모듈 (기본 trading_bot)')
+    parser.add_argument('--repeat', type=int, default=5, help='반복 횟수 (중앙값 사용)')
+    parser.add_argument('--max-import-ms', type=float, default=None, help='import 시간 예산 (ms)')
+    parser.add_argument('--max-rss-mb', type=float, default=None, help='최대 RSS 예산 (MB)')
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.repeat)]
+    import_ms = statistics.median(total for total, _ in runs)
+    _, packages = runs[-1]
+    rss_mb = statistics.median(measure_rss(args.module) for _ in range(args.repeat))
+
+    print(f"[{args.module}] import 시간 중앙값: {import_ms:.1f}ms, 최대 RSS: {rss_mb:.1f}MB")
+    print("import 시간 상위 패키지:")
+    for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {name:<20} {ms:>8.1f}ms")
+
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"실패: import 시간 {import_ms:.1f}ms > 예산 {args.max_import_ms:.1f}ms")
+        failed = True
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        print(f"실패: RSS {rss_mb:.1f}MB > 예산 {args.max_rss_mb:.1f}MB")
+        failed = True
+    if 'pandas' in packages:
+        print("경고: pandas가 import됨 - 전략 계산은 indicators.py(NumPy)만 사용해야 합니다")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
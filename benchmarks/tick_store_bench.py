@@ -0,0 +1,76 @@
+"""
+장중 틱 저장소 벤치마크
+
+기록 처리량(건/초, 코스닥 전 종목 체결 속도와 비교), 재시작 복원 시간(파일 다시 열기 + 상태 복원),
+시각 구간 조회와 1분봉 리샘플링 비용을 측정합니다.
+
+사용법:
+    python benchmarks/tick_store_bench.py
+    python benchmarks/tick_store_bench.py --codes 1700 --ticks 3000000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tick_store import TickStore  # noqa: E402
+
+KOSDAQ_PEAK_RATE = 20000  # 장 초반 코스닥 전 종목 체결 건수 (건/초, 대략)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='장중 틱 저장소 벤치마크')
+    parser.add_argument('--codes', type=int, default=1700, help='종목 수')
+    parser.add_argument('--ticks', type=int, default=2000000, help='기록할 체결 건수')
+    parser.add_argument('--queries', type=int, default=2000, help='구간 조회 횟수')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    codes = [f"{i:06d}" for i in range(args.codes)]
+    rng = random.Random(0)
+    # 거래가 일부 종목에 몰리도록 가중치 (상위 종목이 체결 대부분)
+    weights = [1 / (i + 1) for i in range(args.codes)]
+    sequence = rng.choices(codes, weights, k=args.ticks)
+    start_ts = time.mktime(time.strptime("20261019 0900", "%Y%m%d %H%M"))
+    step = 23400 / args.ticks
+    prices = {code: rng.randint(1000, 100000) for code in codes}
+    cum = dict.fromkeys(codes, 0)
+
+    store = TickStore(root, clock=lambda: start_ts)
+    started = time.perf_counter()
+    for i, code in enumerate(sequence):
+        volume = rng.randint(-500, 500) or 1
+        cum[code] += abs(volume)
+        store.append(code, start_ts + i * step, prices[code] + i % 7, volume, cum[code], prices[code], prices[code] + 5)
+    elapsed = time.perf_counter() - started
+    rate = args.ticks / elapsed
+    print(f"기록: {args.ticks:,}건 / {len(store.files)}종목, {rate:,.0f}건/초 ({elapsed / args.ticks * 1e6:.2f}μs/건), "
+          f"코스닥 최대 체결 속도의 {rate / KOSDAQ_PEAK_RATE:.0f}배")
+    store.close()
+
+    started = time.perf_counter()
+    store = TickStore(root, clock=lambda: start_ts)
+    restore = time.perf_counter() - started
+    print(f"재시작 복원: {store.restored:,}건 / {len(store.files)}종목, {restore:.3f}초")
+
+    busiest = codes[0]
+    started = time.perf_counter()
+    for _ in range(args.queries):
+        begin = start_ts + rng.uniform(0, 23000)
+        store.read(busiest, begin, begin + 300)
+    print(f"5분 구간 조회 ({busiest}, {store.count(busiest):,}건): {(time.perf_counter() - started) / args.queries * 1e6:.1f}μs/회")
+    started = time.perf_counter()
+    bars = store.resample(busiest, 60)
+    print(f"1분봉 리샘플링 ({busiest}): {len(bars)}봉, {(time.perf_counter() - started) * 1000:.1f}ms")
+    store.close()
+    shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
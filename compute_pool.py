@@ -0,0 +1,155 @@
+"""
+계산 작업 스레드 풀
+
+키움 OCX(COM) 호출과 이벤트는 메인(GUI) 스레드에서만 처리하고,
+전략 계산/스크리닝 같은 CPU 작업은 작업 스레드에서 실행합니다.
+결과는 Qt 시그널(QueuedConnection)로 메인 스레드에 전달되므로 콜백에서 API를 호출해도 안전합니다.
+
+LatencyProbe: 메인 스레드 이벤트 처리 지연(타이머가 예정보다 늦게 실행된 시간) 측정
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QEventLoop, QObject, Qt, QTimer, pyqtSignal
+
+
+class ComputePool(QObject):
+    finished = pyqtSignal(object, object, object)  # (콜백, 결과, 예외)
+
+    def __init__(self, workers=None):
+        """
+        계산 작업 풀
+        workers: 작업 스레드 수 (기본 CPU 수, 최대 4)
+        """
+        super().__init__()
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="compute")
+        self.finished.connect(self._deliver, Qt.QueuedConnection)
+        self.pending = 0
+        self.submitted = 0
+        self._idle_loop = None
+
+    def submit(self, callback, func, *args):
+        """
+        작업 스레드에서 func(*args) 실행 → 메인 스레드에서 callback(result, error) 호출
+        func 안에서는 OCX/KiwoomAPI를 호출하지 않아야 함
+        """
+        self.pending += 1
+        self.submitted += 1
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(lambda f: self.finished.emit(callback, *self._outcome(f)))
+        return future
+
+    def _outcome(self, future):
+        error = future.exception()
+        return (None, error) if error is not None else (future.result(), None)
+
+    def _deliver(self, callback, result, error):
+        self.pending -= 1
+        try:
+            if callback is not None:
+                callback(result, error)
+            elif error is not None:
+                print(f"계산 작업 오류: {error}")
+        finally:
+            if self.pending == 0 and self._idle_loop is not None:
+                self._idle_loop.quit()
+
+    def wait(self):
+        """제출한 작업이 모두 전달될 때까지 대기 (대기 중에도 Qt 이벤트 처리)"""
+        if self.pending == 0:
+            return
+        self._idle_loop = QEventLoop()
+        try:
+            self._idle_loop.exec_()
+        finally:
+            self._idle_loop = None
+
+    def run(self, func, *args):
+        """작업 스레드에서 func(*args) 실행 후 결과 반환 (기다리는 동안 메인 스레드는 이벤트 처리)"""
+        outcome = []
+        loop = QEventLoop()
+
+        def callback(result, error):
+            outcome.append((result, error))
+            loop.quit()
+
+        self.submit(callback, func, *args)
+        if not outcome:
+            loop.exec_()
+        result, error = outcome[0]
+        if error is not None:
+            raise error
+        return result
+
+    def map(self, func, items, chunks=None):
+        """
+        items 각각에 func 적용 → 입력 순서대로 결과 리스트 (실패한 묶음의 항목은 None)
+        chunks: 나눌 묶음 수 (기본 작업 스레드 수 × 4) - 결과 전달 이벤트 수를 줄임
+        """
+        items = list(items)
+        results = [None] * len(items)
+        chunks = chunks or self.workers * 4
+        size = max(1, -(-len(items) // chunks))
+
+        def apply(start):
+            return [func(item) for item in items[start:start + size]]
+
+        def store(start):
+            def callback(result, error):
+                if error is not None:
+                    print(f"계산 작업 오류: {error}")
+                else:
+                    results[start:start + len(result)] = result
+            return callback
+
+        for start in range(0, len(items), size):
+            self.submit(store(start), apply, start)
+        self.wait()
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class LatencyProbe(QObject):
+    def __init__(self, interval_ms=10):
+        """
+        이벤트 처리 지연 측정
+        interval_ms: 측정 타이머 주기 - 타이머 실행 시각이 예정보다 늦은 만큼을 지연으로 기록
+        """
+        super().__init__()
+        self.interval = interval_ms / 1000
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self._tick)
+        self.samples = []
+        self._last = None
+
+    def start(self):
+        self.samples = []
+        self._last = time.perf_counter()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        return self.summary()
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.samples.append(max(now - self._last - self.interval, 0.0))
+        self._last = now
+
+    def summary(self):
+        """지연 통계 (ms)"""
+        if not self.samples:
+            return {'count': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        samples = sorted(self.samples)
+        return {
+            'count': len(samples),
+            'p50_ms': samples[len(samples) // 2] * 1000,
+            'p99_ms': samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000,
+            'max_ms': samples[-1] * 1000,
+        }
@@ -0,0 +1,127 @@
+"""
+실시간 체결 합치기(conflation) 대기열
+
+장 초반처럼 체결이 몰릴 때 틱마다 매수 신호/청산 조건을 평가하면 메인(GUI) 스레드가 밀려
+결정 지연이 계속 늘어납니다. KiwoomAPI 이벤트 처리와 전략 평가 사이에서
+    - 종목별로 아직 평가하지 않은 체결은 최신 1건만 남기고 (누적거래량/고가는 최신 값이 이전 값을 포함)
+    - 청산 조건을 건드리는 체결(ExitEngine.is_critical)은 대기 없이 바로 평가하며
+    - 밀린 종목은 보유/주문 중 종목부터, 그다음 먼저 도착한 순으로 평가합니다
+평가는 0ms Qt 타이머에서 budget 초씩 나눠 실행하므로 그 사이에 OCX 이벤트가 계속 처리되고,
+대기열 길이는 종목 수를 넘지 않습니다.
+재생/모의 실행(가상 시계 OCX)은 Qt 이벤트 루프가 없으므로 immediate 모드로 도착 즉시 평가합니다.
+"""
+import time
+from collections import deque
+
+from PyQt5.QtCore import QTimer
+
+
+class ConflationQueue:
+    def __init__(self, critical=None, priority=None, immediate=False, budget=0.005, max_samples=100000):
+        """
+        체결 합치기 대기열
+        critical: 콜백(code, price) → True면 합치지 않고 바로 평가 (청산 조건 교차)
+        priority: 콜백(code) → True면 먼저 평가 (보유/주문 중 종목)
+        immediate: 도착 즉시 평가 (Qt 이벤트 루프가 없는 재생/모의 실행)
+        budget: 타이머 1회에 평가할 최대 시간 (초)
+        max_samples: 보관할 최근 대기 시간 표본 수
+        """
+        self.handlers = []  # 콜백(code, real_type, data) - 종목별 최신 체결
+        self.critical = critical
+        self.priority = priority
+        self.immediate = immediate
+        self.budget = budget
+        self.pending = {}   # {종목코드: [최신 data, 처음 도착 시각, 합쳐진 건수]} - 도착 순
+        self.ages = deque(maxlen=max_samples)  # 도착 → 평가 대기 시간 (초, 합쳐진 체결 중 가장 오래된 것 기준)
+        self.max_age = 0.0
+        self.max_depth = 0
+        self.received = 0
+        self.dispatched = 0
+        self.coalesced = 0  # 최신 체결로 대체되어 평가하지 않은 체결 수
+        self.urgent = 0     # 청산 조건 교차로 바로 평가한 체결 수
+        self.timer = None
+
+    def on_real_data(self, code, real_type, data):
+        """KiwoomAPI.real_data_handlers 콜백 - 주식체결을 종목별 최신 1건으로 합침"""
+        if real_type != "주식체결":
+            return
+        self.received += 1
+        now = time.perf_counter()
+        slot = self.pending.get(code)
+        if slot is None:
+            self.pending[code] = [data, now, 1]
+        else:
+            slot[0] = data
+            slot[2] += 1
+            self.coalesced += 1
+        if self.immediate:
+            self._dispatch(code, now)
+            return
+        if self.critical is not None and self.critical(code, data['price']):
+            self.urgent += 1
+            self._dispatch(code, now)
+            return
+        depth = len(self.pending)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setInterval(0)
+            self.timer.timeout.connect(self.drain)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def _dispatch(self, code, now):
+        data, arrived, _ = self.pending.pop(code)
+        age = now - arrived
+        self.ages.append(age)
+        if age > self.max_age:
+            self.max_age = age
+        self.dispatched += 1
+        for handler in self.handlers:
+            try:
+                handler(code, "주식체결", data)
+            except Exception as e:
+                print(f"실시간 데이터 처리 오류 ({code}): {e}")
+
+    def drain(self):
+        """밀린 종목 평가 (우선 종목 먼저) - budget 초가 지나면 다음 타이머로 넘김"""
+        pending = self.pending
+        if pending:
+            order = list(pending)
+            if self.priority is not None:
+                # 안정 정렬 - 우선 종목 안에서도 도착 순 유지
+                order.sort(key=lambda code: not self.priority(code))
+            deadline = time.perf_counter() + self.budget
+            for code in order:
+                now = time.perf_counter()
+                if code in pending:
+                    self._dispatch(code, now)
+                if now >= deadline:
+                    break
+        if not pending and self.timer is not None:
+            self.timer.stop()
+
+    def flush(self):
+        """남은 종목 모두 평가"""
+        now = time.perf_counter()
+        for code in list(self.pending):
+            self._dispatch(code, now)
+
+    def summary(self):
+        """대기열 통계 (대기 시간 ms)"""
+        ages = sorted(self.ages)
+        return {
+            'received': self.received, 'dispatched': self.dispatched, 'coalesced': self.coalesced,
+            'urgent': self.urgent, 'depth': len(self.pending), 'max_depth': self.max_depth,
+            'p50_ms': ages[len(ages) // 2] * 1000 if ages else 0.0,
+            'p99_ms': ages[min(int(len(ages) * 0.99), len(ages) - 1)] * 1000 if ages else 0.0,
+            'max_ms': self.max_age * 1000,
+        }
+
+    def report(self):
+        s = self.summary()
+        mode = "즉시 평가" if self.immediate else f"타이머 평가 {self.budget * 1000:.0f}ms 단위"
+        print(f"[체결 합치기] {mode}: 수신 {s['received']:,}건, 평가 {s['dispatched']:,}건, 합침 {s['coalesced']:,}건, "
+              f"청산 우선 {s['urgent']:,}건, 대기열 최대 {s['max_depth']}종목, "
+              f"대기 p50 {s['p50_ms']:.2f}ms / p99 {s['p99_ms']:.2f}ms / 최대 {s['max_ms']:.2f}ms")
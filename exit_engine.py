@@ -0,0 +1,257 @@
+"""
+틱 단위 청산 엔진
+
+체결(잔고 변경)마다 포지션별 청산 가격을 호가 단위로 미리 계산해 두고,
+실시간 체결 틱마다 정렬된 트리거 가격과 이분 탐색으로 비교합니다.
+    +1.0% 50% 매도, +1.5% 전량 매도, -1.5% 손절
+    트레일링 스톱: 매수 이후 최고가(고점) 대비 일정 비율 하락 시 전량 매도
+전량 청산 주문 후 closing_timeout 초 동안 잔고가 줄지 않고 미체결 주문도 없으면 (거부/미체결)
+잔고 기준으로 주문가능수량을 되돌리고 마지막 가격으로 다시 확인합니다.
+청산 주문은 결정 추적(tracer)에 청산 구분(rqname)을 전략 이름으로 기록합니다
+(repricer가 있으면 시장가 손절/트레일링 청산도 등록해 접수/체결 통보를 주문번호로 연결).
+"""
+import time
+from bisect import bisect_right
+from fractions import Fraction
+
+from repricer import SELL
+from ticks import ceil_to_tick, floor_to_tick
+
+HALF, FULL = "half", "full"
+
+
+class ExitPosition:
+    def __init__(self, code, avg_price, quantity, half_sold=False):
+        self.code = code
+        self.avg_price = avg_price
+        self.quantity = quantity
+        self.available = quantity  # 주문가능수량 (매도 주문 중인 수량 제외)
+        self.balance_available = quantity  # 잔고 통보의 주문가능수량 (청산 주문 거부 시 복원 기준)
+        self.half_sold = half_sold
+        self.high = 0              # 고점 (트레일링 스톱 기준)
+        self.stop_price = 0        # 손절 가격 (이하이면 손절)
+        self.trail_price = 0       # 트레일링 스톱 가격 (이하이면 청산, 0이면 비활성)
+        self.upper_prices = []     # 익절 트리거 가격 (오름차순)
+        self.upper_actions = []
+        self.closing = False       # 전량 청산 주문 접수 후 잔고 0 대기
+        self.closing_at = 0        # 청산 주문 또는 마지막 잔고 변화 시각
+        self.last_price = 0
+        self.retry_at = 0
+
+
+class ExitEngine:
+    def __init__(self, api, half_target=1.0, full_target=1.5, stop_loss=-1.5, trailing_stop=None,
+                 clock=time.time):
+        """
+        청산 엔진
+        api: KiwoomAPI (주문 전송)
+        half_target/full_target/stop_loss: 매수 평균가 대비 수익률(%)
+        trailing_stop: 고점 대비 허용 하락률(%) - None이면 사용 안 함
+        """
+        self.api = api
+        self.half_target = half_target
+        self.full_target = full_target
+        self.stop_loss = stop_loss
+        self.trailing_stop = trailing_stop
+        self.clock = clock
+        self.positions = {}  # {종목코드: ExitPosition}
+        self.enabled = True
+        self.retry_delay = 1.0  # 주문 실패 후 재시도 대기 (초)
+        self.closing_timeout = 15.0  # 전량 청산 주문 후 잔고 변화 대기 한도 (초) - 넘으면 감시 재개
+        self.ticks = 0
+        self.exits = 0
+        self.max_decision = 0.0  # 틱 수신부터 주문 전송 완료까지 최대 시간 (초)
+        self.repricer = None  # Repricer (설정 시 지정가 익절 주문을 호가에 맞춰 정정)
+        self.tracer = None    # DecisionTracer (설정 시 청산 결정 단계별 시각 기록)
+
+    def _target_price(self, avg_price, rate, round_up):
+        # 평균가 * (1 + rate/100)을 정확히 계산한 뒤 호가 단위로 맞춤
+        price = Fraction(avg_price) * (100 + Fraction(str(rate))) / 100
+        return ceil_to_tick(price) if round_up else floor_to_tick(price)
+
+    def _build_triggers(self, pos):
+        """평균가 기준 트리거 가격 계산 (가격 <= 손절가, 가격 >= 익절가이면 발동)"""
+        pos.stop_price = self._target_price(pos.avg_price, self.stop_loss, round_up=False)
+        triggers = []
+        if not pos.half_sold:
+            triggers.append((self._target_price(pos.avg_price, self.half_target, round_up=True), HALF))
+        triggers.append((self._target_price(pos.avg_price, self.full_target, round_up=True), FULL))
+        triggers.sort()
+        pos.upper_prices = [price for price, _ in triggers]
+        pos.upper_actions = [action for _, action in triggers]
+        self._update_trail(pos)
+
+    def _update_trail(self, pos):
+        # 고점이 평균가를 넘은 뒤에만 트레일링 스톱 활성화 (수익 보호)
+        if self.trailing_stop is None or pos.high <= pos.avg_price:
+            pos.trail_price = 0
+        else:
+            pos.trail_price = self._target_price(pos.high, -self.trailing_stop, round_up=False)
+
+    def track(self, code, avg_price, quantity, half_sold=False, available=None):
+        """포지션 등록 또는 갱신 (평균가가 바뀌면 트리거 재계산)"""
+        pos = self.positions.get(code)
+        if pos is None:
+            pos = ExitPosition(code, avg_price, quantity, half_sold)
+            self.positions[code] = pos
+            self._build_triggers(pos)
+            print(f"[청산 엔진] {code} 등록: 평균가 {avg_price:,.0f}원, {quantity}주, "
+                  f"손절 {pos.stop_price:,}원, 익절 {', '.join(f'{p:,}' for p in pos.upper_prices)}원")
+        else:
+            pos.quantity = quantity
+            if avg_price != pos.avg_price:
+                pos.avg_price = avg_price
+                self._build_triggers(pos)
+        pos.available = quantity if available is None else available
+        pos.balance_available = pos.available
+        return pos
+
+    def untrack(self, code):
+        self.positions.pop(code, None)
+
+    def owns(self, code):
+        return code in self.positions
+
+    def clear(self):
+        """전체 포지션 감시 중지 (마감 청산 시)"""
+        self.enabled = False
+        self.positions.clear()
+
+    def is_critical(self, code, price):
+        """청산 조건을 건드리는 가격인지 (손절/트레일링/익절 가격 교차, 트레일링 고점 갱신) - 체결 합치기에서 바로 평가"""
+        pos = self.positions.get(code)
+        if pos is None or pos.closing or not self.enabled:
+            return False
+        return (price <= pos.stop_price or price <= pos.trail_price
+                or (pos.upper_prices and price >= pos.upper_prices[0])
+                or (self.trailing_stop is not None and price > pos.high))
+
+    def on_real_data(self, code, real_type, data):
+        """KiwoomAPI.real_data_handlers 콜백 - 체결 틱으로 청산 조건 확인"""
+        if real_type == "주식체결":
+            self.on_price(code, data['price'])
+
+    def on_price(self, code, price):
+        """가격 수신 시 청산 조건 확인 (O(log n) 트리거 탐색)"""
+        pos = self.positions.get(code)
+        if pos is None or not self.enabled or price <= 0:
+            return
+        pos.last_price = price
+        if pos.closing and not self._reopen(pos, self.clock()):
+            return
+        self.ticks += 1
+        if price > pos.high:
+            pos.high = price
+            self._update_trail(pos)
+
+        if price <= pos.stop_price or price <= pos.trail_price:
+            if pos.trail_price > pos.stop_price and price <= pos.trail_price:
+                self._exit(pos, FULL, price, "트레일링매도", "03",
+                           f"고점 {pos.high:,}원 대비 -{self.trailing_stop}% (스톱 {pos.trail_price:,}원)")
+            else:
+                self._exit(pos, FULL, price, "손절매도", "03", f"손절가 {pos.stop_price:,}원")
+            return
+
+        crossed = bisect_right(pos.upper_prices, price)
+        if crossed:
+            action = pos.upper_actions[crossed - 1]
+            if action == FULL:
+                self._exit(pos, FULL, price, "익절매도", "00", f"+{self.full_target}% ({pos.upper_prices[crossed - 1]:,}원)")
+            else:
+                self._exit(pos, HALF, price, "부분매도", "00", f"+{self.half_target}% ({pos.upper_prices[crossed - 1]:,}원)")
+
+    def _exit(self, pos, action, price, rqname, hoga, reason):
+        now, start = self.clock(), time.perf_counter()
+        if now < pos.retry_at:
+            return
+        quantity = pos.available if action == FULL else pos.quantity // 2
+        quantity = min(quantity, pos.available)
+        if quantity <= 0:
+            return
+        trace = self.tracer.begin(pos.code, rqname, SELL, price, at=now, perf=start) if self.tracer is not None else None
+        order_price = 0 if hoga == "03" else price
+        if trace is not None:
+            trace.mark('price', price=order_price, qty=quantity)
+        print(f"[{rqname}] {pos.code}: 현재가 {price:,}원, 평균가 {pos.avg_price:,.0f}원, {quantity}주 - {reason}")
+        if self.repricer is not None:
+            ret = self.repricer.submit(pos.code, SELL, quantity, order_price, rqname, ref_price=price, trace=trace,
+                                       hoga=hoga)
+        else:
+            ret = self.api.send_order(rqname, self.api.screens.order_screen(), self.api.account_num,
+                                      2, pos.code, quantity, order_price, hoga)
+            if trace is not None:
+                trace.mark('send', ret=ret)
+                trace.finish('sent' if ret == 0 else 'rejected')
+        if ret != 0:
+            print(f"{rqname} 주문 실패: {ret}")
+            pos.retry_at = now + self.retry_delay
+            return
+        pos.available -= quantity
+        if action == FULL:
+            pos.closing = True
+            pos.closing_at = now
+        else:
+            pos.half_sold = True
+            self._build_triggers(pos)
+        self.exits += 1
+        self.max_decision = max(self.max_decision, time.perf_counter() - start)
+
+    def _reopen(self, pos, now):
+        """청산 대기 해제 여부 - 잔고 변화 없이 closing_timeout이 지났고 미체결 매도 주문이 없으면 잔고 기준으로 되돌림"""
+        if now - pos.closing_at < self.closing_timeout:
+            return False
+        if self.repricer is not None and self.repricer.has_working(pos.code, SELL):
+            return False
+        pos.closing = False
+        pos.available = pos.balance_available
+        print(f"[청산 엔진] {pos.code} 청산 주문 후 {now - pos.closing_at:.0f}초 잔고 변화 없음 - "
+              f"감시 재개 (보유 {pos.quantity}주, 주문가능 {pos.available}주)")
+        return True
+
+    def check(self):
+        """주기 점검 - 체결 틱이 없는 종목의 청산 대기 시간 초과 확인 후 마지막 가격으로 다시 확인"""
+        if not self.enabled:
+            return
+        now = self.clock()
+        for pos in list(self.positions.values()):
+            if pos.closing and self._reopen(pos, now) and pos.last_price:
+                self.on_price(pos.code, pos.last_price)
+
+    def on_order_rejected(self, order):
+        """Repricer 거부 콜백 - 접수되지 않은 매도 수량을 되돌려 다시 감시"""
+        pos = self.positions.get(order.code)
+        if order.side != SELL or pos is None:
+            return
+        pos.available = min(pos.quantity, pos.available + order.remaining())
+        if order.rqname == "부분매도":
+            pos.half_sold = False
+            self._build_triggers(pos)
+        else:
+            pos.closing = False
+        pos.retry_at = self.clock() + self.retry_delay
+        print(f"[청산 엔진] {order.code} {order.rqname} 주문 거부 - 감시 재개 (주문가능 {pos.available}주)")
+
+    def on_chejan(self, gubun, data):
+        """KiwoomAPI.chejan_handlers 콜백 - 잔고 변경(gubun '1') 시 포지션/트리거 갱신"""
+        if gubun != "1":
+            return
+        code = data['code']
+        if data['quantity'] <= 0:
+            if code in self.positions:
+                print(f"[청산 엔진] {code} 청산 완료")
+            self.untrack(code)
+            return
+        if not self.enabled:
+            return
+        pos = self.positions.get(code)
+        if pos is not None and pos.closing:
+            if data['quantity'] != pos.quantity:
+                pos.closing_at = self.clock()  # 체결 진행 중 - 대기 한도 다시 시작
+            pos.quantity = data['quantity']
+            pos.available = pos.balance_available = data['available']
+            return
+        self.track(code, data['avg_price'], data['quantity'], available=data['available'])
+
+    def report(self):
+        print(f"[청산 엔진] 감시 {len(self.positions)}종목, 틱 {self.ticks:,}건, 청산 주문 {self.exits}건, "
+              f"최대 판단 시간 {self.max_decision * 1000:.2f}ms")
@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+
+# pandas 분산 계산이 정밀도를 잃었다고 보는 기준 (편차 제곱합이 이 비율 아래로 줄면 창을 다시 계산)
+INV_COND_TOL = np.finfo(np.float64).eps * 1e3
+
+
+def rolling_mean(prices, period):
+    """
+    마지막 기간의 이동평균 - pandas rolling().mean()과 같은 순서로 계산
+    pandas는 시계열 처음부터 창을 밀며 빠지는 값을 빼고 들어오는 값을 더하는 보정 합(Kahan)으로
+    계산하므로, 같은 값을 얻으려면 마지막 창만이 아니라 전체 시계열을 같은 순서로 지나가야 함
+    """
+    if all(type(price) is int for price in prices):
+        # 정수 가격만 있으면 보정 합이 정확하므로 마지막 창의 합 / 개수와 같음
+        return sum(prices[-period:]) / period
+    values = [float(price) for price in prices]
+    nobs = neg_ct = 0
+    total = add_comp = remove_comp = 0.0
+    same, prev = 0, values[0]  # 마지막 값이 연속된 개수 (창 전체가 같으면 그 값)
+    for i, value in enumerate(values):
+        if i >= period:
+            old = values[i - period]
+            nobs -= 1
+            y = -old - remove_comp
+            t = total + y
+            remove_comp = t - total - y
+            total = t
+            neg_ct -= math.copysign(1.0, old) < 0
+        nobs += 1
+        y = value - add_comp
+        t = total + y
+        add_comp = t - total - y
+        total = t
+        neg_ct += math.copysign(1.0, value) < 0
+        same = same + 1 if value == prev else 1
+        prev = value
+    result = total / nobs
+    if same >= nobs:
+        return prev
+    if (neg_ct == 0 and result < 0) or (neg_ct == nobs and result > 0):
+        return 0.0
+    return result
+
+
+def _welford(values):
+    """값을 차례로 더한 Welford 상태 → (개수, 평균, 편차 제곱합, 더하기 보정값)"""
+    nobs = 0
+    mean = ssq = comp = 0.0
+    for value in values:
+        nobs += 1
+        prev_mean = mean - comp
+        y = value - comp
+        t = y - mean
+        comp = t + mean - y
+        mean += t / nobs
+        ssq += (value - prev_mean) * (value - mean)
+    return nobs, mean, ssq, comp
+
+
+def rolling_variance(prices, period):
+    """
+    마지막 기간의 모집단 분산 (ddof=0) - pandas rolling().var(ddof=0)과 같은 순서로 계산
+    창을 밀며 Welford 방식(보정 합)으로 빼고 더하다가 편차 제곱합이 급격히 줄면(정밀도 손실)
+    그 창을 처음부터 다시 계산
+    """
+    values = [float(price) for price in prices]
+    nobs, mean, ssq, add_comp = _welford(values[:period])
+    remove_comp = 0.0
+    for i, (old, value) in enumerate(zip(values, values[period:]), period):
+        unstable = False
+        nobs -= 1
+        if nobs:
+            prev_ssq = ssq
+            prev_mean = mean - remove_comp
+            y = old - remove_comp
+            t = y - mean
+            remove_comp = t + mean - y
+            mean -= t / nobs
+            ssq -= (old - prev_mean) * (old - mean)
+            unstable = prev_ssq * INV_COND_TOL > ssq
+        else:
+            mean = ssq = 0.0
+        nobs += 1
+        prev_ssq = ssq
+        prev_mean = mean - add_comp
+        y = value - add_comp
+        t = y - mean
+        add_comp = t + mean - y
+        mean += t / nobs
+        ssq += (value - prev_mean) * (value - mean)
+        if unstable or prev_ssq * INV_COND_TOL > ssq:
+            nobs, mean, ssq, add_comp = _welford(values[i + 1 - period:i + 1])
+            remove_comp = 0.0
+    return ssq / nobs
+
+
+def bollinger_bands(prices, period, std_dev):
+    """
+    볼린저밴드 마지막 값 (상단, 중간, 하단)
+    prices: 오래된 순서의 종가 리스트
+    표준편차는 모집단 표준편차 (ddof=0), 값은 pandas rolling 계산과 비트 단위로 같음
+    """
+    if len(prices) < period:
+        return None, None, None
+    middle = np.float64(rolling_mean(prices, period))
+    variance = rolling_variance(prices, period)
+    std = np.float64(math.sqrt(variance) if variance > 0 else 0.0)
+    return middle + std * std_dev, middle, middle - std * std_dev
+
+
+def rsi(prices, period):
+    """
+    RSI 마지막 값 (단순이동평균 방식)
+    prices: 오래된 순서의 종가 리스트
+    하락폭 평균이 0이면 0.0001로 대체 (0으로 나누기 방지)
+    상승폭/하락폭 평균은 rolling_mean으로 전체 시계열을 지나가며 계산 (pandas rolling과 같은 값)
+    """
+    if len(prices) < period + 1:
+        return None
+    if all(type(price) is int for price in prices):
+        # 정수 가격은 보정 합이 정확하므로 마지막 기간의 변화만 보면 됨
+        prices = prices[-(period + 1):]
+        gains, losses = [], []
+    else:
+        # pandas diff()의 첫 값(NaN)은 상승/하락 0으로 들어감
+        prices = [float(price) for price in prices]
+        gains, losses = [0.0], [0.0]
+    for prev, price in zip(prices, prices[1:]):
+        delta = price - prev
+        gains.append(delta if delta > 0 else 0)
+        losses.append(-delta if delta < 0 else 0)
+    gain = rolling_mean(gains, period)
+    loss = rolling_mean(losses, period)
+    if loss == 0:
+        loss = 0.0001
+    value = 100 - (100 / (1 + gain / loss))
+    return None if math.isnan(value) else value
@@ -1,27 +1,104 @@
 import sys
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QAxContainer import QAxWidget
-from PyQt5.QtCore import QEventLoop
+from PyQt5.QtCore import QEventLoop, QTimer
+import random
 import time
+from contextlib import nullcontext
+from rate_limit import RateLimiter
+from recorder import ReplayMismatch
+from screen_manager import ScreenManager
+from symbol_master import normalize_code
+from tr_guard import (CircuitBreaker, TRError, TRShed, TRTimeout, OVERLOAD_ERRORS, RETRYABLE_ERRORS,
+                      PRIORITY_HIGH, PRIORITY_LOW, TR_PRIORITY)
+
+
+# 실시간 FID 목록
+REAL_FIDS_TRADE = "20;10;15;13;14;16;17;18;27;28"  # 주식체결: 체결시간, 현재가, 거래량, 누적거래량, 누적거래대금, 시가, 고가, 저가, 최우선매도/매수호가
+REAL_FIDS_HOGA = "21;41;61;51;71;121;125"        # 주식호가잔량: 호가시간, 매도/매수 1호가 및 잔량, 총잔량
 
 
 class KiwoomAPI:
-    def __init__(self):
-        self.ocx = QAxWidget("KHOPENAPI.KHOpenAPICtrl.1")
+    def __init__(self, ocx=None):
+        """
+        키움 OpenAPI 연동
+        ocx: OCX 객체 주입 (기록/재생/테스트용, 기본은 KHOpenAPI QAxWidget 생성)
+        """
+        if ocx is None:
+            from PyQt5.QAxContainer import QAxWidget  # Windows 전용
+            ocx = QAxWidget("KHOPENAPI.KHOpenAPICtrl.1")
+        self.ocx = ocx
         self.ocx.OnEventConnect.connect(self._event_connect)
         self.ocx.OnReceiveTrData.connect(self._receive_tr_data)
         self.ocx.OnReceiveChejanData.connect(self._receive_chejan_data)
+        self.ocx.OnReceiveConditionVer.connect(self._receive_condition_ver)
+        self.ocx.OnReceiveTrCondition.connect(self._receive_tr_condition)
+        self.ocx.OnReceiveRealCondition.connect(self._receive_real_condition)
+        self.ocx.OnReceiveRealData.connect(self._receive_real_data)
         
         self.login_event_loop = QEventLoop()
         self.tr_event_loop = QEventLoop()
+        self.condition_event_loop = QEventLoop()
         
         self.account_num = None
         self.tr_data = {}
+        self.tr_has_next = False  # 연속 조회 가능 여부 (next == "2")
+        self.sleep = getattr(ocx, 'sleep', time.sleep)  # 조회 제한/재시도 대기 (재생 시 대기 없음)
+        self.clock = getattr(ocx, 'clock', time.time)  # 조회 기준일자 시계 (재생/모의 실행은 가상 시계)
+        # TR 조회 제한 (초/분/시간) - 가상 시간 OCX(재생/테스트)는 제한 없음
+        self.rate_limiter = None if hasattr(ocx, 'sleep') else RateLimiter(sleep=self.sleep)
+        
+        # TR 응답 시한/재시도/과부하 차단
+        self.tr_timeout = 5.0  # 응답 시한 (초)
+        self.tr_timeouts = {'opw00018': 10.0}  # TR별 응답 시한
+        self.max_retries = 2  # 재시도 가능한 오류/시간초과 시 최대 재시도 횟수
+        self.retry_backoff = 0.5  # 재시도 대기 기준 (초, 시도마다 두 배 + 무작위 지터)
+        self.low_priority_max_wait = 2.0  # 스크리닝 요청이 조회 한도로 기다릴 최대 시간 (None이면 무제한)
+        self.breaker = CircuitBreaker(clock=getattr(ocx, 'clock', time.monotonic))  # None이면 과부하 차단 안 함
+        self.tr_stats = {'requests': 0, 'timeouts': 0, 'retries': 0, 'errors': 0, 'shed': 0, 'late': 0}
+        self._inputs = {}
+        self._tr_pending = None  # 응답 대기 중인 (화면번호, rqname)
+        self.profiler = None  # IterationProfiler (설정 시 TR별 소요시간 기록)
+        
+        # 이벤트 수신 여부 (이벤트가 먼저 도착한 경우 이벤트 루프를 돌리지 않음)
+        self._login_received = False
+        self._tr_received = False
+        self._condition_received = False
+        
+        # 조건검색
+        self.condition_loaded = False
+        self.condition_codes = []
+        self.real_condition_handlers = []  # 콜백(code, event_type, condition_name, condition_index)
+        
+        # 실시간 시세
+        self.screens = ScreenManager(self)
+        self.real_data_handlers = []  # 콜백(code, real_type, data)
+        self.chejan_handlers = []  # 콜백(gubun, data) - gubun '0': 주문/체결, '1': 잔고
         
+    def _wait(self, event_loop, received, timeout=None):
+        """
+        이벤트 수신 대기 - 재생 OCX는 기록된 이벤트를 바로 재생
+        timeout: 최대 대기 시간 (초) → 수신 여부 반환
+        """
+        pump = getattr(self.ocx, 'pump', None)
+        if pump is not None:
+            pump(received)
+        elif not received():
+            timer = None
+            if timeout is not None:
+                timer = QTimer()
+                timer.setSingleShot(True)
+                timer.timeout.connect(event_loop.quit)
+                timer.start(int(timeout * 1000))
+            event_loop.exec_()
+            if timer is not None:
+                timer.stop()
+        return received()
+            
     def comm_connect(self):
         """로그인"""
+        self._login_received = False
         self.ocx.dynamicCall("CommConnect()")
-        self.login_event_loop.exec_()
+        self._wait(self.login_event_loop, lambda: self._login_received)
         
     def _event_connect(self, err_code):
         if err_code == 0:
@@ -30,20 +107,92 @@ class KiwoomAPI:
             print(f"계좌번호: {self.account_num}")
         else:
             print("로그인 실패")
+        self._login_received = True
         self.login_event_loop.exit()
         
     def get_login_info(self, tag):
         return self.ocx.dynamicCall("GetLoginInfo(QString)", tag)
     
     def set_input_value(self, id, value):
+        self._inputs[id] = value  # 재시도 시 다시 설정
         self.ocx.dynamicCall("SetInputValue(QString, QString)", id, value)
         
-    def comm_rq_data(self, rqname, trcode, next, screen_no):
-        self.ocx.dynamicCall("CommRqData(QString, QString, int, QString)", 
-                            rqname, trcode, next, screen_no)
-        self.tr_event_loop.exec_()
+    def comm_rq_data(self, rqname, trcode, next, screen_no=None, priority=None):
+        """
+        TR 요청 - 응답 시한, 재시도(지터 백오프), 과부하 차단 적용
+        screen_no: 없으면 TR 화면번호를 할당하고 응답 후 반납
+        priority: PRIORITY_HIGH(계좌/주문) 또는 PRIORITY_LOW(스크리닝) - 기본은 TR_PRIORITY
+        실패 시 TRError(TRTimeout, TRShed) 발생
+        """
+        if priority is None:
+            priority = TR_PRIORITY.get(trcode, PRIORITY_HIGH)
+        inputs, self._inputs = self._inputs, {}
+        if self.breaker is not None and not self.breaker.allow(priority):
+            self.tr_stats['shed'] += 1
+            raise TRShed(rqname, "과부하 차단 중")
+        timeout = self.tr_timeouts.get(trcode, self.tr_timeout)
+        attempt = 0
+        while True:
+            ret, received = self._request_once(rqname, trcode, next, screen_no, priority, timeout,
+                                               inputs if attempt else None)
+            if received:
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                return
+            if ret == 0:
+                self.tr_stats['timeouts'] += 1
+                error = TRTimeout(rqname, timeout)
+            else:
+                error = TRError(rqname, ret)
+            if self.breaker is not None and (ret == 0 or ret in OVERLOAD_ERRORS):
+                self.breaker.record_failure()
+            if (ret != 0 and ret not in RETRYABLE_ERRORS) or attempt >= self.max_retries:
+                self.tr_stats['errors'] += 1
+                raise error
+            attempt += 1
+            self.tr_stats['retries'] += 1
+            backoff = self.retry_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            print(f"[TR] {error} - {backoff:.1f}초 후 재시도 ({attempt}/{self.max_retries})")
+            self.sleep(backoff)
+            
+    def _request_once(self, rqname, trcode, next, screen_no, priority, timeout, inputs=None):
+        """CommRqData 1회 → (반환 코드, 응답 수신 여부)"""
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.delay()
+            if priority == PRIORITY_LOW and self.low_priority_max_wait is not None and delay > self.low_priority_max_wait:
+                self.tr_stats['shed'] += 1
+                raise TRShed(rqname, f"조회 한도 ({delay:.0f}초 대기 필요)")
+            self.rate_limiter.wait()
+        release = screen_no is None
+        if release:
+            screen_no = self.screens.acquire('tr')
+        phase = self.profiler.phase(f"TR {rqname}({trcode})") if self.profiler else nullcontext()
+        try:
+            with phase:
+                if inputs:
+                    for id, value in inputs.items():
+                        self.ocx.dynamicCall("SetInputValue(QString, QString)", id, value)
+                self._tr_received = False
+                self._tr_pending = (screen_no, rqname)
+                self.tr_stats['requests'] += 1
+                ret = self.ocx.dynamicCall("CommRqData(QString, QString, int, QString)", 
+                                           rqname, trcode, next, screen_no)
+                if ret != 0:
+                    return ret, False
+                return 0, self._wait(self.tr_event_loop, lambda: self._tr_received, timeout)
+        finally:
+            self._tr_pending = None
+            # 시간 초과 후 늦게 도착하는 응답은 화면번호 반납(연결 끊기)으로 차단
+            if release:
+                self.screens.release(screen_no)
         
     def _receive_tr_data(self, screen_no, rqname, trcode, record_name, next, unused1, unused2, unused3, unused4):
+        if self._tr_pending != (screen_no, rqname):
+            # 시간 초과로 포기한 요청의 늦은 응답 - 다른 요청의 결과로 쓰지 않음
+            self.tr_stats['late'] += 1
+            print(f"[TR] 늦은 응답 무시: {rqname} (화면 {screen_no})")
+            return
+        self.tr_has_next = next == "2"
         if rqname == "주식기본정보":
             cnt = self.ocx.dynamicCall("GetRepeatCnt(QString, QString)", trcode, rqname)
             for i in range(cnt):
@@ -72,6 +221,22 @@ class KiwoomAPI:
                 data.append([date, open_price, high, low, close, volume])
             self.tr_data = data
             
+        elif rqname in ("일봉백필", "분봉백필"):
+            # [시각(일자 또는 체결시간), 시가, 고가, 저가, 종가, 거래량] 최신순
+            time_field = "일자" if rqname == "일봉백필" else "체결시간"
+            cnt = self.ocx.dynamicCall("GetRepeatCnt(QString, QString)", trcode, rqname)
+            data = []
+            for i in range(cnt):
+                stamp = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, time_field).strip()
+                if not stamp:
+                    continue
+                row = [stamp]
+                for field in ("시가", "고가", "저가", "현재가", "거래량"):
+                    value = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, field).strip()
+                    row.append(abs(int(value)) if value else 0)
+                data.append(row)
+            self.tr_data = data
+            
         elif rqname == "현재가":
             price_str = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", 
                                              trcode, rqname, 0, "현재가").strip()
@@ -93,6 +258,7 @@ class KiwoomAPI:
                 code = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, "종목번호").strip()
                 name = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, "종목명").strip()
                 quantity = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, "보유수량").strip()
+                available = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, "매매가능수량").strip()
                 buy_price = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, "매입가").strip()
                 current_price = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, "현재가").strip()
                 profit = self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, i, "평가손익").strip()
@@ -102,6 +268,7 @@ class KiwoomAPI:
                     'code': code,
                     'name': name,
                     'quantity': int(quantity) if quantity else 0,
+                    'available': int(available) if available else (int(quantity) if quantity else 0),  # 매도 주문 중 수량 제외
                     'buy_price': abs(int(buy_price)) if buy_price else 0,
                     'current_price': abs(int(current_price)) if current_price else 0,
                     'profit': int(profit) if profit else 0,
@@ -168,47 +335,88 @@ class KiwoomAPI:
                 })
             self.tr_data = orders
             
+        self._tr_received = True
         self.tr_event_loop.exit()
         
+    def get_code_list_by_market(self, market):
+        """시장별 종목 코드 리스트 (0-코스피, 10-코스닥)"""
+        codes = self.ocx.dynamicCall("GetCodeListByMarket(QString)", market)
+        return [code for code in codes.split(';') if code]
+        
     def get_kosdaq_codes(self):
         """코스닥 종목 코드 리스트"""
-        codes = self.ocx.dynamicCall("GetCodeListByMarket(QString)", "10")
-        return codes.split(';')[:-1]
+        return self.get_code_list_by_market("10")
     
     def get_stock_name(self, code):
         """종목명 조회"""
         return self.ocx.dynamicCall("GetMasterCodeName(QString)", code)
     
+    def get_master_last_price(self, code):
+        """전일 종가 조회"""
+        price = self.ocx.dynamicCall("GetMasterLastPrice(QString)", code).strip()
+        return abs(int(price)) if price else 0
+    
+    def get_master_listed_stock_cnt(self, code):
+        """상장주식수 조회"""
+        return int(self.ocx.dynamicCall("GetMasterListedStockCnt(QString)", code) or 0)
+    
+    def get_master_construction(self, code):
+        """감리구분 조회 (정상, 투자주의, 투자경고, 투자위험, 투자주의환기종목)"""
+        return self.ocx.dynamicCall("GetMasterConstruction(QString)", code)
+    
+    def today(self):
+        """조회 기준일자 (YYYYMMDD, self.clock 기준)"""
+        return time.strftime("%Y%m%d", time.localtime(self.clock()))
+    
     def get_daily_data(self, code, days=100):
         """일봉 데이터 조회"""
         try:
             self.set_input_value("종목코드", code)
-            self.set_input_value("기준일자", time.strftime("%Y%m%d"))
+            self.set_input_value("기준일자", self.today())
             self.set_input_value("수정주가구분", "1")
-            self.comm_rq_data("일봉데이터", "opt10081", 0, "0101")
-            time.sleep(1.0)
+            self.comm_rq_data("일봉데이터", "opt10081", 0)
             
             # 데이터 유효성 검사
             if isinstance(self.tr_data, list) and len(self.tr_data) > 0:
                 return self.tr_data
             else:
                 return []
+        except ReplayMismatch:
+            raise
         except Exception as e:
             print(f"일봉 데이터 조회 오류 ({code}): {e}")
             return []
     
+    def get_bar_page(self, code, kind="daily", next=0, base_date=None, tick_range=1):
+        """
+        일봉(opt10081)/분봉(opt10080) 한 페이지 조회 → (봉 리스트 최신순, 다음 페이지 여부)
+        next: 0-처음, 2-연속 조회 (직전 요청과 같은 입력값으로 다시 설정)
+        """
+        self.set_input_value("종목코드", code)
+        if kind == "daily":
+            self.set_input_value("기준일자", base_date or self.today())
+            self.set_input_value("수정주가구분", "1")
+            self.comm_rq_data("일봉백필", "opt10081", next)
+        else:
+            self.set_input_value("틱범위", str(tick_range))
+            self.set_input_value("수정주가구분", "1")
+            self.comm_rq_data("분봉백필", "opt10080", next)
+        rows = self.tr_data if isinstance(self.tr_data, list) else []
+        return rows, self.tr_has_next
+    
     def get_current_price(self, code):
         """현재가 조회"""
         try:
             self.set_input_value("종목코드", code)
-            self.comm_rq_data("현재가", "opt10001", 0, "0102")
-            time.sleep(1.0)
+            self.comm_rq_data("현재가", "opt10001", 0)
             
             # 데이터 유효성 검사
             if isinstance(self.tr_data, int) and self.tr_data > 0:
                 return self.tr_data
             else:
                 return 0
+        except ReplayMismatch:
+            raise
         except Exception as e:
             print(f"현재가 조회 오류 ({code}): {e}")
             return 0
@@ -222,15 +430,183 @@ class KiwoomAPI:
                                    [rqname, screen_no, acc_no, order_type, code, qty, price, hoga, order_no])
         return ret
     
+    def get_chejan_data(self, fid):
+        return self.ocx.dynamicCall("GetChejanData(int)", fid).strip()
+    
+    def _chejan_int(self, fid):
+        value = self.get_chejan_data(fid)
+        return abs(int(value)) if value else 0
+        
     def _receive_chejan_data(self, gubun, item_cnt, fid_list):
-        """체결/잔고 데이터 수신"""
-        if gubun == "0":  # 체결
-            print("=== 체결 통보 ===")
-            code = self.ocx.dynamicCall("GetChejanData(int)", 9001).strip()
-            order_status = self.ocx.dynamicCall("GetChejanData(int)", 913).strip()
-            order_qty = self.ocx.dynamicCall("GetChejanData(int)", 900).strip()
-            order_price = self.ocx.dynamicCall("GetChejanData(int)", 901).strip()
-            print(f"종목코드: {code}, 상태: {order_status}, 수량: {order_qty}, 가격: {order_price}")
+        """체결/잔고 데이터 수신 - 파싱 후 등록된 핸들러로 전달"""
+        try:
+            if gubun == "0":  # 주문접수/체결
+                data = {
+                    'order_no': self.get_chejan_data(9203),
+                    'orig_order_no': self.get_chejan_data(904),  # 정정/취소 시 원주문번호
+                    'code': normalize_code(self.get_chejan_data(9001)),
+                    'status': self.get_chejan_data(913),       # 접수, 체결, 확인
+                    'order_qty': self._chejan_int(900),
+                    'order_price': self._chejan_int(901),
+                    'unfilled_qty': self._chejan_int(902),
+                    'order_type': self.get_chejan_data(905),   # +매수, -매도, 매수정정 등
+                    'side': self.get_chejan_data(907),         # 1: 매도, 2: 매수
+                    'time': self.get_chejan_data(908),
+                    'fill_price': self._chejan_int(910),
+                    'fill_qty': self._chejan_int(911),
+                }
+                print("=== 체결 통보 ===")
+                print(f"종목코드: {data['code']}, 상태: {data['status']}, 수량: {data['order_qty']}, 가격: {data['order_price']}")
+            elif gubun == "1":  # 잔고 변경
+                data = {
+                    'code': normalize_code(self.get_chejan_data(9001)),
+                    'quantity': self._chejan_int(930),    # 보유수량
+                    'avg_price': self._chejan_int(931),   # 매입단가
+                    'available': self._chejan_int(933),   # 주문가능수량
+                    'price': self._chejan_int(10),        # 현재가
+                }
+            else:
+                return
+        except ValueError as e:
+            print(f"체결 데이터 파싱 오류 (구분 {gubun}): {e}")
+            return
+        for handler in self.chejan_handlers:
+            try:
+                handler(gubun, data)
+            except Exception as e:
+                print(f"체결 데이터 처리 오류 ({data.get('code')}): {e}")
+            
+    def set_real_reg(self, screen_no, code_list, fid_list, opt_type):
+        """실시간 등록 (opt_type: 0-화면의 기존 등록 대체, 1-추가 등록)"""
+        return self.ocx.dynamicCall("SetRealReg(QString, QString, QString, QString)",
+                                    screen_no, code_list, fid_list, opt_type)
+    
+    def set_real_remove(self, screen_no, code):
+        """실시간 해제 (code: 종목코드 또는 'ALL')"""
+        self.ocx.dynamicCall("SetRealRemove(QString, QString)", screen_no, code)
+        
+    def disconnect_real_data(self, screen_no):
+        """화면번호 연결 끊기"""
+        self.ocx.dynamicCall("DisconnectRealData(QString)", screen_no)
+        
+    def get_comm_real_data(self, code, fid):
+        return self.ocx.dynamicCall("GetCommRealData(QString, int)", code, fid)
+    
+    def _real_int(self, code, fid):
+        value = self.get_comm_real_data(code, fid).strip()
+        return int(value) if value else 0
+        
+    def _receive_real_data(self, code, real_type, real_data):
+        """실시간 시세 수신 - 주식체결/주식호가잔량을 파싱해 등록된 핸들러로 전달"""
+        if not self.real_data_handlers:
+            return
+        try:
+            if real_type == "주식체결":
+                volume = self._real_int(code, 15)
+                data = {
+                    'time': self.get_comm_real_data(code, 20).strip(),
+                    'price': abs(self._real_int(code, 10)),
+                    'volume': abs(volume),
+                    'side': 1 if volume >= 0 else -1,  # +매수체결, -매도체결
+                    'cum_volume': self._real_int(code, 13),
+                    'cum_amount': self._real_int(code, 14),  # 누적거래대금 (백만원)
+                    'open': abs(self._real_int(code, 16)),
+                    'high': abs(self._real_int(code, 17)),
+                    'low': abs(self._real_int(code, 18)),
+                    'ask': abs(self._real_int(code, 27)),
+                    'bid': abs(self._real_int(code, 28)),
+                }
+            elif real_type == "주식호가잔량":
+                data = {
+                    'time': self.get_comm_real_data(code, 21).strip(),
+                    'ask': abs(self._real_int(code, 41)),
+                    'ask_qty': self._real_int(code, 61),
+                    'bid': abs(self._real_int(code, 51)),
+                    'bid_qty': self._real_int(code, 71),
+                    'total_ask_qty': self._real_int(code, 121),
+                    'total_bid_qty': self._real_int(code, 125),
+                }
+            else:
+                return
+        except ValueError as e:
+            print(f"실시간 데이터 파싱 오류 ({code}, {real_type}): {e}")
+            return
+        for handler in self.real_data_handlers:
+            try:
+                handler(code, real_type, data)
+            except Exception as e:
+                print(f"실시간 데이터 처리 오류 ({code}): {e}")
+        
+    def report_tr_stats(self):
+        """TR 요청 통계 출력"""
+        stats = self.tr_stats
+        state = self.breaker.state() if self.breaker is not None else "사용 안 함"
+        trips = self.breaker.trips if self.breaker is not None else 0
+        print(f"[TR 통계] 요청 {stats['requests']:,}건, 재시도 {stats['retries']}건, 시간초과 {stats['timeouts']}건, "
+              f"실패 {stats['errors']}건, 생략 {stats['shed']}건, 늦은 응답 {stats['late']}건, "
+              f"과부하 차단 {trips}회 (현재 {state})")
+        
+    def get_condition_load(self):
+        """서버에 저장된 사용자 조건식 불러오기 (OnReceiveConditionVer 대기)"""
+        self._condition_received = False
+        ret = self.ocx.dynamicCall("GetConditionLoad()")
+        if ret != 1:
+            print("조건식 요청 실패")
+            return False
+        self._wait(self.condition_event_loop, lambda: self._condition_received)
+        return self.condition_loaded
+        
+    def _receive_condition_ver(self, ret, msg):
+        self.condition_loaded = ret == 1
+        if not self.condition_loaded:
+            print(f"조건식 불러오기 실패: {msg}")
+        self._condition_received = True
+        self.condition_event_loop.exit()
+        
+    def get_condition_name_list(self):
+        """조건식 목록 [(인덱스, 조건명)] - '000^조건명;001^조건명;' 형식 파싱"""
+        data = self.ocx.dynamicCall("GetConditionNameList()")
+        conditions = []
+        for item in data.split(';'):
+            if '^' not in item:
+                continue
+            index, name = item.split('^', 1)
+            conditions.append((int(index), name))
+        return conditions
+    
+    def send_condition(self, screen_no, condition_name, condition_index, search_type=1):
+        """조건검색 실행
+        search_type: 0-일반조회, 1-실시간 편입/이탈 이벤트 수신
+        조건식당 1초 1회, 1분 20회 제한
+        """
+        self.condition_codes = []
+        self._condition_received = False
+        ret = self.ocx.dynamicCall("SendCondition(QString, QString, int, int)",
+                                   screen_no, condition_name, condition_index, search_type)
+        if ret != 1:
+            print(f"조건검색 요청 실패: {condition_name}")
+            return []
+        self._wait(self.condition_event_loop, lambda: self._condition_received)
+        return self.condition_codes
+    
+    def send_condition_stop(self, screen_no, condition_name, condition_index):
+        """실시간 조건검색 중지"""
+        self.ocx.dynamicCall("SendConditionStop(QString, QString, int)",
+                             screen_no, condition_name, condition_index)
+        
+    def _receive_tr_condition(self, screen_no, code_list, condition_name, condition_index, next):
+        """조건검색 조회 결과 수신 (종목코드 ';' 구분)"""
+        self.condition_codes = [code for code in code_list.split(';') if code]
+        self._condition_received = True
+        self.condition_event_loop.exit()
+        
+    def _receive_real_condition(self, code, event_type, condition_name, condition_index):
+        """실시간 조건검색 편입(I)/이탈(D) 수신"""
+        for handler in self.real_condition_handlers:
+            try:
+                handler(code, event_type, condition_name, condition_index)
+            except Exception as e:
+                print(f"실시간 조건검색 처리 오류 ({code}): {e}")
             
     def get_balance(self):
         """잔고 조회
@@ -241,8 +617,7 @@ class KiwoomAPI:
         self.set_input_value("비밀번호", "")  # 빈 문자열 = 저장된 비밀번호 사용
         self.set_input_value("비밀번호입력매체구분", "00")
         self.set_input_value("조회구분", "1")
-        self.comm_rq_data("계좌평가잔고내역요청", "opw00018", 0, "0103")
-        time.sleep(1.0)
+        self.comm_rq_data("계좌평가잔고내역요청", "opw00018", 0)
         return self.tr_data
     
     def get_volume_rank(self, market="101"):
@@ -252,8 +627,7 @@ class KiwoomAPI:
         self.set_input_value("시장구분", market)
         self.set_input_value("관리종목포함", "0")
         self.set_input_value("거래소구분", "1")
-        self.comm_rq_data("거래대금상위", "opt10032", 0, "0104")
-        time.sleep(1.0)
+        self.comm_rq_data("거래대금상위", "opt10032", 0)
         return self.tr_data
         
     def get_not_concluded_orders(self, order_type="1"):
@@ -266,8 +640,7 @@ class KiwoomAPI:
         self.set_input_value("종목코드", "")  # 전체 종목
         self.set_input_value("체결구분", "1")  # 1:미체결
         self.set_input_value("거래소구분", "0")  # 0:통합
-        self.comm_rq_data("미체결요청", "opt10075", 0, "0105")
-        time.sleep(1.0)
+        self.comm_rq_data("미체결요청", "opt10075", 0)
         return self.tr_data
         
     def show_buy_orders(self):
@@ -302,16 +675,16 @@ class KiwoomAPI:
                 try:
                     if not isinstance(order, dict):
                         continue
-                    ret = self.send_order("매도취소", "0106", self.account_num,
+                    ret = self.send_order("매도취소", self.screens.order_screen(), self.account_num,
                                           4, order.get('code', ''), 0, 0, "00", order.get('order_no', ''))
                     if ret == 0:
                         print(f"취소 성공: {order.get('name', '')}({order.get('code', '')}) {order.get('quantity', 0)}주")
                     else:
                         print(f"취소 실패: {order.get('name', '')}({order.get('code', '')}) - 오류코드: {ret}")
-                    time.sleep(0.5)
+                    self.sleep(0.5)
                 except Exception as e:
                     print(f"취소 오류: {order.get('name', '')}({order.get('code', '')}) - {e}")
                     
         except Exception as e:
             print(f"매도 미체결 주문 취소 오류: {e}")
-        time.sleep(1.0)
+        self.sleep(1.0)
@@ -0,0 +1,887 @@
+"""
+틱 단위 모의 체결 브로커
+
+PaperOCX가 키움 OCX와 같은 호출/이벤트(SendOrder, OnReceiveChejanData, 실시간 시세, TR 조회)를 흉내 내고,
+MatchingEngine이 체결/호가 스트림에 주문을 맞춰 체결시킵니다. KiwoomAPI와 TradingBot은 그대로 사용합니다.
+    - 지정가: 같은 가격의 매수/매도 잔량만큼 대기열(queue_ahead) 뒤에 서고, 그 가격의 체결량이 대기열을 소진하면 체결
+              더 불리한 가격의 체결이나 주문 가격을 넘는 상대 호가가 나오면 즉시 체결 (잔량만큼 부분 체결)
+    - 시장가: 최우선 상대 호가 잔량부터 호가를 올려가며 체결
+    - 정정: 새 주문번호로 남은 수량을 옮기고 대기열 맨 뒤로, 취소: 접수 후 확인 통보
+    - 지연: 주문 → 거래소 도착(latency + 무작위 jitter), 거래소 → 체결 통보(notice_latency)
+시세 스트림: synthetic_ticks (종목별 호가 잔량 소진 모형) 또는 ticks_from_log (recorder 기록의 실시간 시세)
+PaperSession이 가상 시계로 시세/통보/스케줄러 작업을 시각 순으로 실행합니다 (실제 시간 대기 없음).
+"""
+import datetime
+import heapq
+import random
+import time
+from operator import itemgetter
+
+from recorder import CALL, EVENT, read_log
+from ticks import ceil_to_tick, floor_to_tick, tick_down, tick_up
+
+TRADE, QUOTE = 0, 1  # 시세 이벤트 (시각, 종목코드, 종류, ...)
+# TRADE: (ts, code, TRADE, 체결가, 체결량(+매수/-매도 체결))
+# QUOTE: (ts, code, QUOTE, 매도1호가, 매도1잔량, 매수1호가, 매수1잔량)
+
+BUY, SELL = "buy", "sell"
+ORDER_SIDE = {1: BUY, 2: SELL, 3: BUY, 4: SELL, 5: BUY, 6: SELL}
+ORDER_TEXT = {1: "+매수", 2: "-매도", 3: "매수취소", 4: "매도취소", 5: "매수정정", 6: "매도정정"}
+CHEJAN_SIDE = {BUY: "2", SELL: "1"}
+MARKET_DEPTH = 10  # 시장가 주문이 올라갈 최대 호가 수
+
+
+def day_start(date):
+    """YYYYMMDD 일자의 자정 (로컬 시각 epoch)"""
+    return time.mktime(time.strptime(date, "%Y%m%d"))
+
+
+def synthetic_history(n_codes=200, n_bars=120, date="20261019", seed=0, anchors=None):
+    """
+    종목별 합성 일봉 (date 전날까지, 최신순)
+    anchors: {종목코드: 가격} - 지정 시 이 종목들만 만들고 전일 종가를 가격에 맞춤 (기록된 시세 재생용)
+    반환: {종목코드: [[일자, 시가, 고가, 저가, 종가, 거래량], ...]}
+    """
+    rng = random.Random(seed)
+    dates = []
+    day = datetime.datetime.strptime(date, "%Y%m%d").date()
+    while len(dates) < n_bars:
+        day -= datetime.timedelta(days=1)
+        if day.weekday() < 5:
+            dates.append(day.strftime("%Y%m%d"))
+    dates.reverse()
+    history = {}
+    codes = list(anchors) if anchors else [f"{100000 + i:06d}" for i in range(n_codes)]
+    for code in codes:
+        close = rng.uniform(2000, 150000)
+        volume_base = rng.lognormvariate(12, 0.8)
+        bars = []
+        for d in dates:
+            open_price = close * (1 + rng.gauss(0, 0.01))
+            close = max(close * (1 + rng.gauss(0, 0.025)), 500)
+            spread = abs(rng.gauss(0, 0.02)) * close
+            high = max(open_price, close) + spread
+            low = max(min(open_price, close) - spread, 1)
+            bars.append([d, floor_to_tick(open_price), floor_to_tick(high), floor_to_tick(low),
+                         floor_to_tick(close), int(volume_base * rng.lognormvariate(0, 0.5))])
+        if anchors:
+            scale = anchors[code] / bars[-1][4]
+            bars = [[row[0]] + [floor_to_tick(max(price * scale, 1)) for price in row[1:5]] + [row[5]] for row in bars]
+        bars.reverse()
+        history[code] = bars
+    return history
+
+
+def log_session(path, n_bars=120, seed=0):
+    """기록된 실시간 시세 → (일자, 합성 일봉, 시세 이벤트 리스트) - 일봉은 종목별 첫 체결가에 맞춤"""
+    events = list(ticks_from_log(path))
+    if not events:
+        raise ValueError(f"실시간 시세 기록이 없습니다: {path}")
+    anchors = {}
+    for event in events:
+        if event[2] == TRADE:
+            anchors.setdefault(event[1], event[3])
+        elif event[1] not in anchors and event[5] > 0:
+            anchors[event[1]] = event[5]
+    date = time.strftime("%Y%m%d", time.localtime(events[0][0]))
+    return date, synthetic_history(n_bars=n_bars, date=date, seed=seed, anchors=anchors), events
+
+
+def _intensity(elapsed):
+    """장 시작 후 경과 시간별 체결 빈도 배수 (장 초반/마감 전에 거래 집중)"""
+    if elapsed < 1800:
+        return 3.0
+    if elapsed < 3600:
+        return 2.0
+    return 1.5 if elapsed > 21600 else 1.0
+
+
+def _code_ticks(code, bars, start, end, interval, hot_ratio, rng):
+    """
+    종목 1개의 합성 체결/호가 스트림
+    최우선 호가 잔량을 체결이 소진하면 가격이 한 호가 움직임 (전일 거래량에 맞춰 체결량/잔량 크기 결정, 가격제한폭 안에서만)
+    """
+    prev = bars[0]
+    price = floor_to_tick(max(prev[4] * (1 + rng.gauss(0, 0.01)), 100))
+    buy_prob = min(max(0.5 + rng.gauss(0, 0.04), 0.35), 0.65)  # 종목별 매수 체결 비중 (추세)
+    trades_per_day = sum(_intensity(t) for t in range(0, int(end - start), 60)) * 60 / interval * 0.6
+    trade_size = max(prev[5] * rng.lognormvariate(0, 0.5) / trades_per_day, 1)
+    if rng.random() < hot_ratio:
+        # 급등 종목 - 거래량이 전일의 수 배로 늘며 매수 체결 우위
+        trade_size *= rng.uniform(5, 12)
+        buy_prob = rng.uniform(0.54, 0.58)
+    upper_limit = floor_to_tick(prev[4] * 1.3)  # 가격제한폭 ±30%
+    lower_limit = ceil_to_tick(prev[4] * 0.7)
+    level_size = trade_size * 4
+
+    def level_qty():
+        return int(rng.expovariate(1 / level_size)) + 1
+
+    bid, ask = price, tick_up(price)
+    bid_qty, ask_qty = level_qty(), level_qty()
+    ts = start + rng.random() * interval
+    yield (ts, code, QUOTE, ask, ask_qty, bid, bid_qty)
+    while True:
+        ts += rng.expovariate(_intensity(ts - start) / interval)
+        if ts >= end:
+            return
+        if rng.random() < 0.4:
+            # 호가 잔량 변동 (신규/취소)
+            bid_qty = max(bid_qty + int(rng.gauss(0, level_size / 3)), 1)
+            ask_qty = max(ask_qty + int(rng.gauss(0, level_size / 3)), 1)
+            yield (ts, code, QUOTE, ask, ask_qty, bid, bid_qty)
+            continue
+        volume = int(rng.expovariate(1 / trade_size)) + 1
+        if rng.random() < buy_prob:
+            volume = min(volume, ask_qty)
+            yield (ts, code, TRADE, ask, volume)
+            ask_qty -= volume
+            if ask_qty <= 0 and tick_up(ask) > upper_limit:
+                ask_qty = level_qty()
+            elif ask_qty <= 0:
+                bid, ask = ask, tick_up(ask)
+                bid_qty, ask_qty = level_qty(), level_qty()
+                yield (ts, code, QUOTE, ask, ask_qty, bid, bid_qty)
+        else:
+            volume = min(volume, bid_qty)
+            yield (ts, code, TRADE, bid, -volume)
+            bid_qty -= volume
+            if bid_qty <= 0 and tick_down(bid) < lower_limit:
+                bid_qty = level_qty()
+            elif bid_qty <= 0:
+                ask, bid = bid, tick_down(bid)
+                ask_qty, bid_qty = level_qty(), level_qty()
+                yield (ts, code, QUOTE, ask, ask_qty, bid, bid_qty)
+
+
+def synthetic_ticks(history, date, interval=2.0, hot_ratio=0.1, seed=0, start="0900", end="1530"):
+    """
+    합성 시세 스트림 (전 종목을 시각 순으로 병합)
+    interval: 종목별 평균 이벤트 간격 (초, 장 초반/마감 전에는 더 짧음)
+    hot_ratio: 거래량이 급증하며 오르는 종목 비율
+    """
+    base = day_start(date)
+    start_ts = base + int(start[:2]) * 3600 + int(start[2:]) * 60
+    end_ts = base + int(end[:2]) * 3600 + int(end[2:]) * 60
+    streams = [_code_ticks(code, bars, start_ts, end_ts, interval, hot_ratio, random.Random(seed * 1000003 + i))
+               for i, (code, bars) in enumerate(history.items()) if bars]
+    return heapq.merge(*streams, key=itemgetter(0))
+
+
+def ticks_from_log(path):
+    """
+    recorder 로그의 실시간 시세(OnReceiveRealData 뒤의 GetCommRealData 응답)를 시세 이벤트로 변환
+    기록 중 등록한 종목/FID만 복원됨
+    """
+    pending = None  # (시각, 종목코드, 실시간 타입, {fid: 값})
+
+    def flush():
+        if pending is None:
+            return None
+        ts, code, real_type, fields = pending
+        if real_type == "주식체결" and 10 in fields and 15 in fields:
+            return (ts, code, TRADE, abs(_int(fields[10])), _int(fields[15]))
+        if real_type == "주식호가잔량" and 41 in fields and 51 in fields:
+            return (ts, code, QUOTE, abs(_int(fields[41])), _int(fields.get(61)),
+                    abs(_int(fields[51])), _int(fields.get(71)))
+        return None
+
+    for kind, ts, name, args, result in read_log(path):
+        if kind == EVENT and name == "OnReceiveRealData":
+            event = flush()
+            if event is not None:
+                yield event
+            pending = (ts, args[0], args[1], {})
+        elif kind == CALL and name.startswith("GetCommRealData") and pending is not None and args[0] == pending[1]:
+            pending[3][args[1]] = result
+        elif kind == EVENT:
+            event = flush()
+            if event is not None:
+                yield event
+            pending = None
+    event = flush()
+    if event is not None:
+        yield event
+
+
+def _int(value):
+    value = (value or "").strip()
+    return int(value) if value else 0
+
+
+class PaperOrder:
+    def __init__(self, order_no, order_type, code, quantity, price, hoga, orig_order_no=""):
+        self.order_no = order_no
+        self.order_type = order_type  # 1/2 신규, 5/6 정정 (정정 주문은 새 주문번호)
+        self.side = ORDER_SIDE[order_type]
+        self.code = code
+        self.quantity = quantity
+        self.price = price
+        self.hoga = hoga
+        self.orig_order_no = orig_order_no
+        self.filled = 0
+        self.queue_ahead = 0      # 같은 가격에서 앞에 선 잔량
+        self.sent_at = None
+        self.first_fill_at = None
+
+    def remaining(self):
+        return self.quantity - self.filled
+
+
+class MatchingEngine:
+    def __init__(self, cash=100000000, latency=0.03, jitter=0.02, notice_latency=0.01,
+                 fee_rate=0.00015, tax_rate=0.0018, seed=0):
+        """
+        모의 체결 엔진
+        cash: 시작 예수금
+        latency: 주문 전송 → 거래소 도착 (초), jitter: 도착 지연에 더하는 무작위 지연 최대값 (초)
+        notice_latency: 접수/체결 → 체결 통보 (초)
+        fee_rate: 매매 수수료율, tax_rate: 매도 거래세율
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.notice_latency = notice_latency
+        self.fee_rate = fee_rate
+        self.tax_rate = tax_rate
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.cash = cash
+        self.holdings = {}   # {종목코드: [보유수량, 매입단가, 주문가능수량]}
+        self.books = {}      # {종목코드: [매도1호가, 매도1잔량, 매수1호가, 매수1잔량]}
+        self.bars = {}       # {종목코드: [시가, 고가, 저가, 현재가, 누적거래량, 누적거래대금]}
+        self.orders = {}     # {주문번호: PaperOrder} - 거래소에 접수된 미체결 주문
+        self.resting = {}    # {종목코드: [PaperOrder]} - 접수 순
+        self.queue = []      # (시각, 순번, 함수, 인자) - 거래소 도착/통보 예정
+        self.seq = 0
+        self.next_no = 1
+        self.notify = None   # 콜백(gubun, {fid: 값}) - PaperOCX가 체결 통보 이벤트로 전달
+        self.stats = {'orders': 0, 'accepted': 0, 'rejected': 0, 'fills': 0, 'partial_fills': 0,
+                      'modified': 0, 'cancelled': 0, 'ordered_qty': {BUY: 0, SELL: 0},
+                      'filled_qty': {BUY: 0, SELL: 0}}
+        self.fill_delays = []  # 주문 전송 → 첫 체결 (초)
+
+    # 예약 실행 ---------------------------------------------------------------
+
+    def _schedule(self, delay, func, *args):
+        self.seq += 1
+        heapq.heappush(self.queue, (self.now + delay, self.seq, func, args))
+
+    def next_time(self):
+        return self.queue[0][0] if self.queue else None
+
+    def run_next(self):
+        ts, _, func, args = heapq.heappop(self.queue)
+        self.now = max(self.now, ts)
+        func(*args)
+
+    def _notice(self, gubun, fields):
+        self._schedule(self.notice_latency, self._deliver, gubun, fields)
+
+    def _deliver(self, gubun, fields):
+        if self.notify is not None:
+            self.notify(gubun, fields)
+
+    def _new_order_no(self):
+        order_no = f"{self.next_no:07d}"
+        self.next_no += 1
+        return order_no
+
+    # 주문 -------------------------------------------------------------------
+
+    def send_order(self, order_type, code, quantity, price, hoga, orig_order_no=""):
+        """SendOrder - 전송만 하고 0 반환 (거부는 거래소 도착 시 판단, 실제처럼 통보 없음)"""
+        if order_type not in ORDER_SIDE:
+            return -300
+        self.stats['orders'] += 1
+        delay = self.latency + self.rng.random() * self.jitter
+        self._schedule(delay, self._arrive, order_type, code, quantity, price, hoga, orig_order_no, self.now)
+        return 0
+
+    def _arrive(self, order_type, code, quantity, price, hoga, orig_order_no, sent_at):
+        if order_type in (1, 2):
+            self._new(order_type, code, quantity, price, hoga, sent_at)
+        elif order_type in (3, 4):
+            self._cancel(order_type, code, quantity, orig_order_no)
+        else:
+            self._modify(order_type, code, quantity, price, orig_order_no, sent_at)
+
+    def _reject(self, code, reason):
+        self.stats['rejected'] += 1
+        print(f"[모의 체결] 주문 거부 ({code}): {reason}")
+
+    def _new(self, order_type, code, quantity, price, hoga, sent_at):
+        side = ORDER_SIDE[order_type]
+        if quantity <= 0:
+            return self._reject(code, "주문수량 없음")
+        if side == BUY:
+            estimate = price if hoga != "03" else self._reference_price(code, BUY) * 1.02
+            if estimate * quantity > self.cash - self._reserved_cash():
+                return self._reject(code, "주문가능금액 부족")
+        else:
+            holding = self.holdings.get(code)
+            if holding is None or holding[2] < quantity:
+                return self._reject(code, "주문가능수량 부족")
+            holding[2] -= quantity
+        order = PaperOrder(self._new_order_no(), order_type, code, quantity, price, hoga)
+        order.sent_at = sent_at
+        self.stats['accepted'] += 1
+        self.stats['ordered_qty'][side] += quantity
+        self._notice("0", self._order_fields(order, "접수"))
+        self._match_incoming(order)
+
+    def _cancel(self, order_type, code, quantity, orig_order_no):
+        orig = self.orders.get(orig_order_no)
+        if orig is None or orig.side != ORDER_SIDE[order_type]:
+            return self._reject(code, f"취소 가능한 원주문 없음 ({orig_order_no})")
+        cancel_qty = orig.remaining() if quantity <= 0 else min(quantity, orig.remaining())
+        cancel_no = self._new_order_no()
+        fields = self._order_fields(orig, "접수", order_no=cancel_no, order_type=order_type, quantity=cancel_qty)
+        self._notice("0", fields)
+        if cancel_qty < orig.remaining():
+            orig.quantity -= cancel_qty
+        else:
+            self._remove(orig)
+        if orig.side == SELL:
+            self.holdings[code][2] += cancel_qty
+        self.stats['cancelled'] += 1
+        self._notice("0", self._order_fields(orig, "확인", order_no=cancel_no, order_type=order_type,
+                                             quantity=cancel_qty, unfilled=0))
+
+    def _modify(self, order_type, code, quantity, price, orig_order_no, sent_at):
+        orig = self.orders.get(orig_order_no)
+        if orig is None or orig.side != ORDER_SIDE[order_type]:
+            return self._reject(code, f"정정 가능한 원주문 없음 ({orig_order_no})")
+        moved = orig.remaining() if quantity <= 0 else min(quantity, orig.remaining())
+        if orig.side == SELL:
+            self.holdings[code][2] += orig.remaining() - moved
+        self._remove(orig)
+        order = PaperOrder(self._new_order_no(), order_type, code, moved, price, orig.hoga, orig_order_no)
+        order.sent_at = orig.sent_at
+        order.first_fill_at = orig.first_fill_at
+        self.stats['modified'] += 1
+        self._notice("0", self._order_fields(order, "접수"))
+        self._notice("0", self._order_fields(orig, "확인", order_no=order.order_no, order_type=order_type,
+                                             quantity=moved, unfilled=0))
+        # 정정 주문은 대기열 맨 뒤에서 다시 시작
+        self._match_incoming(order)
+
+    def _remove(self, order):
+        self.orders.pop(order.order_no, None)
+        resting = self.resting.get(order.code)
+        if resting and order in resting:
+            resting.remove(order)
+
+    def _reserved_cash(self):
+        return sum(order.remaining() * order.price for order in self.orders.values() if order.side == BUY)
+
+    def _reference_price(self, code, side):
+        book = self.books.get(code)
+        if book is not None:
+            return book[0] if side == BUY else book[2]
+        bar = self.bars.get(code)
+        return bar[3] if bar else 0
+
+    # 매칭 -------------------------------------------------------------------
+
+    def _match_incoming(self, order):
+        """거래소 도착 시 상대 호가와 즉시 체결 후 남은 수량은 대기"""
+        book = self.books.get(order.code)
+        if order.hoga == "03":
+            self._walk_book(order, book)
+            return
+        if book is not None:
+            ask, ask_qty, bid, bid_qty = book
+            if order.side == BUY and order.price >= ask > 0:
+                self._fill(order, min(order.remaining(), ask_qty), ask)
+                book[1] -= min(book[1], ask_qty)
+            elif order.side == SELL and 0 < bid and order.price <= bid:
+                self._fill(order, min(order.remaining(), bid_qty), bid)
+                book[3] -= min(book[3], bid_qty)
+        if order.remaining() <= 0:
+            return
+        order.queue_ahead = self._queue_at(order, book)
+        self.orders[order.order_no] = order
+        self.resting.setdefault(order.code, []).append(order)
+
+    def _queue_at(self, order, book):
+        """새 지정가 주문 앞의 대기 잔량 추정 - 더 나쁜 가격이면 사이 호가마다 최우선 잔량만큼 있다고 봄"""
+        if book is None:
+            return 0
+        ask, ask_qty, bid, bid_qty = book
+        if order.side == BUY:
+            if order.price > bid:
+                return 0
+            levels = 0
+            price = bid
+            while price > order.price and levels < MARKET_DEPTH:
+                price = tick_down(price)
+                levels += 1
+            return bid_qty * (levels + 1)
+        if order.price < ask:
+            return 0
+        levels = 0
+        price = ask
+        while price < order.price and levels < MARKET_DEPTH:
+            price = tick_up(price)
+            levels += 1
+        return ask_qty * (levels + 1)
+
+    def _walk_book(self, order, book):
+        """시장가 - 최우선 상대 호가부터 호가를 옮겨가며 체결 (각 호가 잔량은 최우선 잔량과 같다고 봄)"""
+        if book is not None:
+            price, depth = (book[0], book[1]) if order.side == BUY else (book[2], book[3])
+        else:
+            price, depth = self._reference_price(order.code, order.side), 0
+        if price <= 0:
+            self._reject(order.code, "시세 없음 (시장가)")
+            if order.side == SELL:
+                self.holdings[order.code][2] += order.remaining()
+            return
+        depth = max(depth, 1)
+        for level in range(MARKET_DEPTH):
+            qty = order.remaining() if level == MARKET_DEPTH - 1 else min(order.remaining(), depth)
+            self._fill(order, qty, price)
+            if order.remaining() <= 0:
+                break
+            price = tick_up(price) if order.side == BUY else tick_down(price)
+        if book is not None:
+            index = 1 if order.side == BUY else 3
+            book[index] -= min(book[index], order.quantity)
+
+    def on_trade(self, code, price, volume):
+        """체결 - 대기 주문 가격보다 불리한 체결은 즉시 체결, 같은 가격 체결은 대기열부터 소진"""
+        bar = self.bars.get(code)
+        if bar is None:
+            self.bars[code] = [price, price, price, price, abs(volume), price * abs(volume)]
+        else:
+            bar[1] = max(bar[1], price)
+            bar[2] = min(bar[2], price)
+            bar[3] = price
+            bar[4] += abs(volume)
+            bar[5] += price * abs(volume)
+        resting = self.resting.get(code)
+        if not resting:
+            return
+        left = abs(volume)
+        for order in list(resting):
+            if left <= 0:
+                break
+            if order.side == BUY:
+                through = price < order.price
+                at_price = price == order.price and volume < 0
+            else:
+                through = price > order.price
+                at_price = price == order.price and volume > 0
+            if through:
+                qty = min(order.remaining(), left)
+            elif at_price:
+                consumed = min(order.queue_ahead, left)
+                order.queue_ahead -= consumed
+                left -= consumed
+                qty = min(order.remaining(), left)
+            else:
+                continue
+            if qty > 0:
+                left -= qty
+                self._fill(order, qty, order.price)
+
+    def on_quote(self, code, ask, ask_qty, bid, bid_qty):
+        """호가 - 대기 주문 가격을 넘어선 상대 호가 잔량만큼 체결, 같은 가격 잔량이 줄면 대기열 앞당김"""
+        book = self.books.get(code)
+        if book is None:
+            book = self.books[code] = [ask, ask_qty, bid, bid_qty]
+        else:
+            book[:] = [ask, ask_qty, bid, bid_qty]
+        for order in list(self.resting.get(code, ())):
+            if order.side == BUY:
+                if 0 < ask <= order.price and book[1] > 0:
+                    qty = min(order.remaining(), book[1])
+                    book[1] -= qty
+                    self._fill(order, qty, order.price)
+                elif order.price == bid:
+                    order.queue_ahead = min(order.queue_ahead, bid_qty)
+                elif order.price > bid:
+                    order.queue_ahead = 0
+            else:
+                if order.price <= bid and book[3] > 0:
+                    qty = min(order.remaining(), book[3])
+                    book[3] -= qty
+                    self._fill(order, qty, order.price)
+                elif order.price == ask:
+                    order.queue_ahead = min(order.queue_ahead, ask_qty)
+                elif order.price < ask:
+                    order.queue_ahead = 0
+
+    def _fill(self, order, quantity, price):
+        if quantity <= 0:
+            return
+        order.filled += quantity
+        if order.first_fill_at is None:
+            order.first_fill_at = self.now
+            self.fill_delays.append(self.now - order.sent_at)
+        self.stats['fills'] += 1
+        if order.remaining() > 0:
+            self.stats['partial_fills'] += 1
+        self.stats['filled_qty'][order.side] += quantity
+
+        amount = price * quantity
+        fee = int(amount * self.fee_rate)
+        holding = self.holdings.setdefault(order.code, [0, 0, 0])
+        if order.side == BUY:
+            self.cash -= amount + fee
+            total = holding[0] + quantity
+            holding[1] = (holding[0] * holding[1] + amount) // total
+            holding[0] = total
+            holding[2] += quantity
+        else:
+            self.cash += amount - fee - int(amount * self.tax_rate)
+            holding[0] -= quantity
+            if holding[0] <= 0:
+                del self.holdings[order.code]
+        if order.remaining() <= 0:
+            self._remove(order)
+
+        fields = self._order_fields(order, "체결")
+        fields[910] = str(price)
+        fields[911] = str(order.filled)
+        self._notice("0", fields)
+        holding = self.holdings.get(order.code, [0, 0, 0])
+        self._notice("1", {9001: "A" + order.code, 930: str(holding[0]), 931: str(holding[1]),
+                           933: str(holding[2]), 10: str(self._reference_price(order.code, SELL) or price)})
+
+    def _order_fields(self, order, status, order_no=None, order_type=None, quantity=None, unfilled=None):
+        """주문/체결 통보 (gubun 0) FID 값"""
+        quantity = order.quantity if quantity is None else quantity
+        return {
+            9203: order_no or order.order_no,
+            904: order.order_no if order_no else order.orig_order_no,
+            9001: "A" + order.code,
+            913: status,
+            900: str(quantity),
+            901: str(order.price),
+            902: str(order.remaining() if unfilled is None else unfilled),
+            905: ORDER_TEXT[order_type or order.order_type],
+            907: CHEJAN_SIDE[order.side],
+            908: time.strftime("%H%M%S", time.localtime(self.now)),
+            910: "",
+            911: "",
+        }
+
+    def report(self, elapsed=None, events=None):
+        stats = self.stats
+        print("\n[모의 체결]")
+        print(f"  주문 {stats['orders']}건 (접수 {stats['accepted']}, 거부 {stats['rejected']}, "
+              f"정정 {stats['modified']}, 취소 {stats['cancelled']}), 체결 {stats['fills']}건 (부분 {stats['partial_fills']})")
+        for side, name in ((BUY, "매수"), (SELL, "매도")):
+            ordered = stats['ordered_qty'][side]
+            if ordered:
+                print(f"  {name} 체결률: {stats['filled_qty'][side] / ordered * 100:.1f}% "
+                      f"({stats['filled_qty'][side]:,}/{ordered:,}주)")
+        delays = sorted(self.fill_delays)
+        if delays:
+            print(f"  주문 → 첫 체결: 중앙값 {delays[len(delays) // 2]:.1f}초, "
+                  f"90% {delays[min(int(len(delays) * 0.9), len(delays) - 1)]:.1f}초")
+        print(f"  예수금 {self.cash:,}원, 보유 {len(self.holdings)}종목")
+
+
+class PaperSignal:
+    def __init__(self):
+        self.handlers = []
+
+    def connect(self, handler):
+        self.handlers.append(handler)
+
+    def emit(self, *args):
+        for handler in self.handlers:
+            handler(*args)
+
+
+class PaperOCX:
+    def __init__(self, history, engine, date, rank_size=100):
+        """
+        모의 OCX
+        history: 종목별 일봉 (오늘 제외, 최신순) - TR 조회 응답
+        engine: MatchingEngine
+        date: 오늘 일자 (YYYYMMDD) - 오늘 봉은 체결 스트림으로 만듦
+        """
+        self.history = history
+        self.engine = engine
+        self.date = date
+        self.codes = list(history)
+        self.rank_size = rank_size
+        self.now = day_start(date) + 8 * 3600 + 55 * 60
+        self.inputs = {}
+        self.request = None
+        self.chejan = {}
+        self.real = {}           # {종목코드: {fid: 값}} - 마지막 실시간 이벤트
+        self.registrations = {}  # {화면번호: {종목코드: FID 목록}}
+        self.watch_trade = set()
+        self.watch_quote = set()
+        self.calls = 0
+        self.events = 0
+        for name in ("OnEventConnect", "OnReceiveTrData", "OnReceiveChejanData", "OnReceiveConditionVer",
+                     "OnReceiveTrCondition", "OnReceiveRealCondition", "OnReceiveRealData"):
+            setattr(self, name, PaperSignal())
+        engine.notify = self._on_notice
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        """모의 실행 중 대기 없음 (시각은 PaperSession이 진행)"""
+        pass
+
+    # 시세/통보 --------------------------------------------------------------
+
+    def on_market(self, event):
+        """시세 이벤트 1건 - 체결 엔진 반영 후 실시간 등록 종목이면 OnReceiveRealData 발생"""
+        code, kind = event[1], event[2]
+        engine = self.engine
+        if kind == TRADE:
+            price, volume = event[3], event[4]
+            engine.on_trade(code, price, volume)
+            if code not in self.watch_trade:
+                return
+            bar = engine.bars[code]
+            book = engine.books.get(code) or (0, 0, 0, 0)
+            sign = "+" if price >= self._prev_close(code) else "-"
+            self.real[code] = {
+                20: time.strftime("%H%M%S", time.localtime(event[0])),
+                10: f"{sign}{price}", 15: f"{volume:+d}", 13: str(bar[4]), 14: str(bar[5] // 1000000),
+                16: f"+{bar[0]}", 17: f"+{bar[1]}", 18: f"+{bar[2]}", 27: f"+{book[0]}", 28: f"+{book[2]}",
+            }
+            real_type = "주식체결"
+        else:
+            ask, ask_qty, bid, bid_qty = event[3:7]
+            engine.on_quote(code, ask, ask_qty, bid, bid_qty)
+            if code not in self.watch_quote:
+                return
+            self.real[code] = {
+                21: time.strftime("%H%M%S", time.localtime(event[0])),
+                41: f"+{ask}", 61: str(ask_qty), 51: f"+{bid}", 71: str(bid_qty),
+                121: str(ask_qty * 5), 125: str(bid_qty * 5),
+            }
+            real_type = "주식호가잔량"
+        self.events += 1
+        self.OnReceiveRealData.emit(code, real_type, "")
+
+    def _on_notice(self, gubun, fields):
+        self.chejan = fields
+        self.events += 1
+        self.OnReceiveChejanData.emit(gubun, len(fields), ";".join(str(fid) for fid in fields))
+
+    def _update_watch(self):
+        self.watch_trade = set()
+        self.watch_quote = set()
+        for codes in self.registrations.values():
+            for code, fids in codes.items():
+                fids = fids.split(";")
+                if "10" in fids:
+                    self.watch_trade.add(code)
+                if "41" in fids:
+                    self.watch_quote.add(code)
+
+    # TR 조회 ----------------------------------------------------------------
+
+    def _prev_close(self, code):
+        bars = self.history.get(code)
+        return bars[0][4] if bars else 0
+
+    def _last_price(self, code):
+        bar = self.engine.bars.get(code)
+        return bar[3] if bar else self._prev_close(code)
+
+    def _daily(self, code):
+        bars = self.history.get(code, [])
+        bar = self.engine.bars.get(code)
+        if bar is None:
+            return bars
+        return [[self.date, bar[0], bar[1], bar[2], bar[3], bar[4]]] + bars
+
+    def _ranked(self):
+        def amount(code):
+            bar = self.engine.bars.get(code)
+            if bar is not None:
+                return bar[5]
+            row = self.history[code][0] if self.history[code] else [0] * 6
+            return row[4] * row[5]
+        return sorted(self.codes, key=amount, reverse=True)[:self.rank_size]
+
+    def _unfilled(self, inputs):
+        kind = inputs.get("매매구분", "0")
+        side = {"1": SELL, "2": BUY}.get(kind)
+        return [order for order in self.engine.orders.values() if side is None or order.side == side]
+
+    def _prepare(self, rqname, inputs):
+        """CommRqData 시점의 응답 행 (조회 후 변하지 않도록 고정)"""
+        if rqname in ("일봉데이터", "일봉백필"):
+            return self._daily(inputs.get("종목코드"))
+        if rqname == "거래대금상위":
+            return self._ranked()
+        if rqname == "계좌평가잔고내역요청":
+            return sorted(code for code, holding in self.engine.holdings.items() if holding[0] > 0)
+        if rqname == "미체결요청":
+            return self._unfilled(inputs)
+        return []
+
+    def _comm_data(self, rqname, i, field):
+        rows = self.request[3]
+        if rqname in ("일봉데이터", "일봉백필"):
+            index = {"일자": 0, "시가": 1, "고가": 2, "저가": 3, "현재가": 4, "거래량": 5}.get(field)
+            return f" {rows[i][index]} " if index is not None and i < len(rows) else ""
+        if rqname == "현재가":
+            return f" +{self._last_price(self.request[2].get('종목코드'))} "
+        if rqname == "거래대금상위":
+            code = rows[i]
+            price = self._last_price(code)
+            prev = self._prev_close(code) or price
+            bar = self.engine.bars.get(code)
+            amount = bar[5] if bar else price * (self.history[code][0][5] if self.history[code] else 0)
+            return {"종목코드": code, "종목명": f"종목{code}", "현재가": f"+{price}",
+                    "거래대금": str(amount // 1000000), "등락률": f"{(price - prev) / prev * 100:+.2f}"}.get(field, "")
+        if rqname == "계좌평가잔고내역요청":
+            holdings = self.engine.holdings
+            if field in ("예수금", "d+2예수금"):
+                return f"{self.engine.cash:015d}"
+            if field.startswith("총"):
+                total_buy = sum(holdings[code][0] * holdings[code][1] for code in rows)
+                total_eval = sum(holdings[code][0] * self._last_price(code) for code in rows)
+                return {"총매입금액": str(total_buy), "총평가금액": str(total_eval),
+                        "총평가손익금액": str(total_eval - total_buy),
+                        "총수익률(%)": f"{(total_eval - total_buy) / total_buy * 100 if total_buy else 0:.2f}"}.get(field, "")
+            code = rows[i]
+            quantity, avg_price, available = holdings.get(code, (0, 0, 0))
+            price = self._last_price(code)
+            return {"종목번호": "A" + code, "종목명": f"종목{code}", "보유수량": str(quantity), "매매가능수량": str(available),
+                    "매입가": str(avg_price),
+                    "현재가": str(price), "평가손익": str((price - avg_price) * quantity),
+                    "수익률(%)": f"{(price - avg_price) / avg_price * 100 if avg_price else 0:.2f}"}.get(field, "")
+        if rqname == "미체결요청":
+            order = rows[i]
+            return {"주문번호": order.order_no, "종목코드": order.code, "종목명": f"종목{order.code}",
+                    "매매구분": ORDER_TEXT[1 if order.side == BUY else 2],
+                    "주문수량": str(order.remaining())}.get(field, "")
+        return ""
+
+    def dynamicCall(self, signature, *args):
+        self.calls += 1
+        if len(args) == 1 and isinstance(args[0], list):
+            args = args[0]
+        name = signature[:signature.index("(")]
+        if name == "GetCommRealData":
+            return self.real.get(args[0], {}).get(int(args[1]), "")
+        if name == "GetChejanData":
+            return self.chejan.get(int(args[0]), "")
+        if name == "GetCommData":
+            return self._comm_data(args[1], args[2], args[3])
+        if name == "SetInputValue":
+            self.inputs[args[0]] = args[1]
+            return None
+        if name == "GetRepeatCnt":
+            return len(self.request[3]) if self.request and self.request[0] == args[1] else 0
+        if name == "CommRqData":
+            rqname, trcode, next, screen_no = args
+            self.request = (rqname, trcode, self.inputs, self._prepare(rqname, self.inputs))
+            self.inputs = {}
+            self.OnReceiveTrData.emit(screen_no, rqname, trcode, "", "0", 0, "", "", "")
+            return 0
+        if name == "SendOrder":
+            rqname, screen_no, acc_no, order_type, code, qty, price, hoga, order_no = args
+            return self.engine.send_order(int(order_type), code, int(qty), int(price), hoga, order_no)
+        if name == "SetRealReg":
+            screen_no, code_list, fid_list, opt_type = args
+            codes = self.registrations.setdefault(screen_no, {})
+            if opt_type == "0":
+                codes.clear()
+            for code in filter(None, code_list.split(";")):
+                codes[code] = fid_list
+            self._update_watch()
+            return 0
+        if name == "SetRealRemove":
+            screen_no, code = args
+            if screen_no == "ALL" or code == "ALL":
+                if screen_no == "ALL":
+                    self.registrations.clear()
+                else:
+                    self.registrations.pop(screen_no, None)
+            else:
+                self.registrations.get(screen_no, {}).pop(code, None)
+            self._update_watch()
+            return None
+        if name == "DisconnectRealData":
+            self.registrations.pop(args[0], None)
+            self._update_watch()
+            return None
+        if name == "CommConnect":
+            self.OnEventConnect.emit(0)
+            return 0
+        if name == "GetLoginInfo":
+            return "8000000011;"
+        if name == "GetCodeListByMarket":
+            return ";".join(self.codes) + ";" if args[0] == "10" else ""
+        if name == "GetMasterCodeName":
+            return f"종목{args[0]}"
+        if name == "GetMasterLastPrice":
+            return f"{self._prev_close(args[0]):08d}"
+        if name == "GetMasterListedStockCnt":
+            return 10000000
+        if name == "GetMasterConstruction":
+            return "정상"
+        return 0
+
+
+class PaperSession:
+    def __init__(self, bot, ocx, events, end="1540"):
+        """
+        모의 매매 실행기 - 시세 이벤트, 체결 통보, 스케줄러 작업을 가상 시계로 시각 순 실행
+        events: 시세 이벤트 이터레이터 (시각 순)
+        end: 종료 시각 (HHMM, 장 마감 통계 출력 이후)
+        """
+        self.bot = bot
+        self.ocx = ocx
+        self.events = iter(events)
+        self.end_ts = day_start(ocx.date) + int(end[:2]) * 3600 + int(end[2:]) * 60
+        self.market_events = 0
+        self.ticks = 0
+
+    def run(self):
+        """로그인/장전 준비 후 장 종료까지 모의 매매"""
+        started = time.perf_counter()
+        ocx = self.ocx
+        engine = ocx.engine
+        start_ts = ocx.now
+        engine.now = ocx.now
+        self.bot.login()
+        self.bot.warmup()
+        scheduler = self.bot.setup_scheduler()
+
+        event = next(self.events, None)
+        while True:
+            due = scheduler.next_due(ocx.now)
+            notice = engine.next_time()
+            market = event[0] if event is not None else None
+            candidates = [t for t in (due, notice, market) if t is not None]
+            if not candidates or min(candidates) >= self.end_ts:
+                break
+            ts = max(min(candidates), ocx.now)
+            ocx.now = engine.now = ts
+            if notice is not None and notice <= ts:
+                engine.run_next()
+            elif market is not None and market <= ts:
+                ocx.on_market(event)
+                self.market_events += 1
+                event = next(self.events, None)
+            else:
+                scheduler.tick(ts)
+                self.ticks += 1
+                if scheduler.next_due(ts) == due:
+                    ocx.now = engine.now = ts + scheduler.resolution  # 진행 없는 작업에서 멈추지 않도록
+
+        elapsed = time.perf_counter() - started
+        span = ocx.now - start_ts
+        engine.report()
+        print("\n[모의 매매 완료]")
+        print(f"  모의 구간: {span:,.0f}초, 실행 시간: {elapsed:.2f}초 ({span / elapsed if elapsed else 0:,.0f}배속)")
+        print(f"  시세 이벤트 {self.market_events:,}건 ({self.market_events / elapsed if elapsed else 0:,.0f}건/초), "
+              f"OCX 호출 {ocx.calls:,}건, 스케줄러 틱 {self.ticks:,}회")
+        return elapsed
@@ -0,0 +1,213 @@
+"""
+반복(스케줄러 작업) 단위 프로파일러
+
+- 샘플링: 백그라운드 스레드가 주기적으로 메인 스레드 스택을 수집 (작업 실행 중에만 저장)
+- 작업이 예산 시간을 넘으면 해당 실행의 collapsed stack 파일(.folded)과 구간별 소요시간(.txt)을 저장
+  (.folded는 flamegraph.pl, speedscope 등으로 플레임그래프 확인)
+- cProfile: 지정한 작업의 다음 1회 실행만 결정적 프로파일링 (.prof 저장 + 상위 함수 출력)
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, max_samples=100000):
+        """
+        샘플링 프로파일러
+        interval: 샘플 간격 (초)
+        max_samples: 한 번에 보관할 최대 샘플 수
+        """
+        self.interval = interval
+        self.max_samples = max_samples
+        self.samples = []
+        self.active = False
+        self.thread_id = None
+        self.thread = None
+        self.running = False
+        self.labels = {}  # 코드 객체별 프레임 이름 캐시
+
+    def start(self):
+        """현재 스레드(메인 스레드)를 대상으로 샘플링 시작"""
+        self.thread_id = threading.get_ident()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.interval)
+            if not self.active or len(self.samples) >= self.max_samples:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(";".join(stack))
+
+    def begin(self):
+        self.samples = []
+        self.active = True
+
+    def end(self):
+        """수집 종료 → 이번 구간 샘플"""
+        self.active = False
+        samples, self.samples = self.samples, []
+        return samples
+
+
+def collapse(samples):
+    """샘플 리스트 → {collapsed stack: 개수}"""
+    counts = {}
+    for stack in samples:
+        counts[stack] = counts.get(stack, 0) + 1
+    return counts
+
+
+class IterationProfiler:
+    def __init__(self, budget=2.0, budgets=None, out_dir="logs/profile", interval=0.005):
+        """
+        반복 단위 프로파일러
+        budget: 작업 1회 실행 예산 (초) - 넘으면 스택/구간 정보 저장
+        budgets: {작업명: 예산(초)} 작업별 예산
+        """
+        self.budget = budget
+        self.budgets = budgets or {}
+        self.out_dir = out_dir
+        self.sampler = SamplingProfiler(interval)
+        self.cprofile_target = None  # 다음 실행을 cProfile로 측정할 작업명 ('*'이면 아무 작업)
+        self.current = None          # 실행 중인 작업 {'name', 'phases'}
+        self.stats = {}              # {작업명: [실행 수, 예산 초과 수, 최대 소요]}
+        self.dumps = []
+
+    def start(self):
+        self.sampler.start()
+        print(f"[프로파일러] 샘플링 시작 (간격 {self.sampler.interval * 1000:.0f}ms, 예산 {self.budget}초)")
+
+    def stop(self):
+        self.sampler.stop()
+
+    def profile_next(self, name="*"):
+        """다음 1회 실행을 cProfile로 측정"""
+        self.cprofile_target = name
+
+    @contextmanager
+    def iteration(self, name):
+        """작업 1회 실행 구간"""
+        if self.current is not None:
+            # 중첩 실행은 바깥 실행에 포함
+            with self.phase(name):
+                yield
+            return
+        profile = None
+        if self.cprofile_target in (name, "*"):
+            self.cprofile_target = None
+            profile = cProfile.Profile()
+        self.current = {'name': name, 'phases': {}}
+        self.sampler.begin()
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            samples = self.sampler.end()
+            phases = self.current['phases']
+            self.current = None
+            stat = self.stats.setdefault(name, [0, 0, 0.0])
+            stat[0] += 1
+            stat[2] = max(stat[2], elapsed)
+            budget = self.budgets.get(name, self.budget)
+            if profile:
+                self._dump_cprofile(name, stat[0], profile)
+            if budget is not None and elapsed > budget:
+                stat[1] += 1
+                self._dump_slow(name, stat[0], elapsed, budget, phases, samples)
+
+    @contextmanager
+    def phase(self, name):
+        """실행 중인 작업 안의 세부 구간 (TR 조회 등)"""
+        if self.current is None:
+            yield
+            return
+        phase = self.current['phases'].setdefault(name, [0, 0.0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phase[0] += 1
+            phase[1] += time.perf_counter() - start
+
+    def _path(self, name, count, ext):
+        os.makedirs(self.out_dir, exist_ok=True)
+        safe = "".join(c for c in name if c.isalnum() or c in "_-")
+        return os.path.join(self.out_dir, f"{time.strftime('%Y%m%d_%H%M%S')}_{safe}_{count}{ext}")
+
+    def _dump_slow(self, name, count, elapsed, budget, phases, samples):
+        folded_path = self._path(name, count, ".folded")
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            for stack, n in sorted(collapse(samples).items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {n}\n")
+
+        lines = [f"{name} #{count}: {elapsed:.2f}초 (예산 {budget}초), 샘플 {len(samples)}개"]
+        accounted = 0.0
+        for phase, (calls, seconds) in sorted(phases.items(), key=lambda item: -item[1][1]):
+            accounted += seconds
+            lines.append(f"  {phase}: {calls}회 {seconds:.2f}초 ({seconds / elapsed * 100:.0f}%)")
+        rest = max(elapsed - accounted, 0.0)
+        lines.append(f"  기타(계산/출력): {rest:.2f}초 ({rest / elapsed * 100:.0f}%)")
+        # 샘플 기준 자체 시간 상위 함수
+        leaf_counts = {}
+        for stack in samples:
+            leaf = stack.rsplit(";", 1)[-1]
+            leaf_counts[leaf] = leaf_counts.get(leaf, 0) + 1
+        if leaf_counts:
+            lines.append("  자체 시간 상위 함수 (샘플):")
+            for leaf, n in sorted(leaf_counts.items(), key=lambda item: -item[1])[:10]:
+                lines.append(f"    {n / len(samples) * 100:5.1f}%  {leaf}")
+        text_path = folded_path[:-len(".folded")] + ".txt"
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        self.dumps.append(folded_path)
+        print(f"[프로파일러] 예산 초과 - {lines[0]} → {folded_path}")
+        for line in lines[1:len(phases) + 2]:
+            print(line)
+
+    def _dump_cprofile(self, name, count, profile):
+        path = self._path(name, count, ".prof")
+        profile.dump_stats(path)
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(25)
+        print(f"[프로파일러] cProfile 결과: {path}")
+        print(stream.getvalue())
+
+    def report(self):
+        print("\n[프로파일러 통계]")
+        for name, (runs, slow, longest) in self.stats.items():
+            budget = self.budgets.get(name, self.budget)
+            print(f"  {name}: 실행 {runs}회, 예산({budget}초) 초과 {slow}회, 최대 {longest:.2f}초")
+        if self.dumps:
+            print(f"  저장된 스택 파일 {len(self.dumps)}개: {self.out_dir}")
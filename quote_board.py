@@ -0,0 +1,221 @@
+"""
+공유 메모리 시세판
+
+KiwoomAPI 실시간 시세를 메모리 매핑 파일의 고정 레이아웃 배열에 기록하고,
+같은 PC의 다른 프로세스(모니터링 도구, 보조 전략)가 복사/직렬화 없이 읽도록 합니다.
+
+레이아웃:
+    헤더 64바이트: 매직, 버전, 슬롯 수, 레코드 크기, 사용 슬롯 수, 세대(생성 시각)
+    슬롯 48바이트: seq, 종목코드, 현재가, 매수호가, 매도호가, 누적거래량, 시각
+일관성: 슬롯별 seqlock - 기록 중에는 seq가 홀수, 읽기는 seq가 짝수이고 전후가 같을 때만 유효
+        (기록기가 기록 중 종료되어 seq가 홀수로 남으면 리더는 SPIN_LIMIT 회 재시도 후 None)
+재시작: 같은 형식의 파일이 있으면 자르지 않고 다시 매핑해 종목별 슬롯을 그대로 이어 씀 (리더 매핑 유지)
+        형식이 다르면 새 파일을 만든 뒤 이름을 바꿔 교체 (열려 있는 리더는 이전 파일을 계속 봄)
+"""
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"KWQB"
+VERSION = 1
+HEADER = struct.Struct('<4sIIIId')   # 매직, 버전, 슬롯 수, 레코드 크기, 사용 슬롯 수, 세대
+HEADER_SIZE = 64
+USED_OFFSET = 16
+RECORD = struct.Struct('<I8siiiqd8x')  # seq, 코드, 현재가, 매수호가, 매도호가, 누적거래량, 시각
+SEQ = struct.Struct('<I')
+DATA = struct.Struct('<iiiqd')          # seq/코드를 제외한 값 영역
+DATA_OFFSET = 12
+SPIN_LIMIT = 10000  # 리더가 한 슬롯을 다시 읽는 최대 횟수
+
+
+def record_dtype():
+    """NumPy 구조화 배열 dtype (슬롯 레이아웃과 동일)"""
+    import numpy as np
+    return np.dtype({
+        'names': ['seq', 'code', 'price', 'bid', 'ask', 'cum_volume', 'ts'],
+        'formats': ['<u4', 'S8', '<i4', '<i4', '<i4', '<i8', '<f8'],
+        'offsets': [0, 4, 12, 16, 20, 24, 32],
+        'itemsize': RECORD.size,
+    })
+
+
+class QuoteBoardWriter:
+    def __init__(self, path="data/quote_board.bin", capacity=4096, clock=time.time):
+        """
+        시세판 기록기 (단일 기록 프로세스)
+        capacity: 최대 종목 수
+        clock: 시각 함수 (기본 epoch 초)
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.capacity = capacity
+        self.clock = clock
+        size = HEADER_SIZE + capacity * RECORD.size
+        self.slots = {}   # {종목코드: 슬롯 번호}
+        self.values = []  # 슬롯별 마지막 값 [현재가, 매수호가, 매도호가, 누적거래량, 시각]
+        self.seqs = []
+        self.updates = 0
+        reuse = self._compatible(size)
+        if not reuse:
+            # 리더가 매핑 중인 파일을 자르지 않도록 새 파일을 만든 뒤 교체
+            temp = f"{path}.{os.getpid()}.tmp"
+            with open(temp, 'wb') as f:
+                f.truncate(size)
+            try:
+                os.replace(temp, path)
+            except OSError:
+                os.remove(temp)
+                raise
+        self.file = open(path, 'r+b')
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        if reuse:
+            self._restore()
+        # 세대(생성 시각)가 바뀌면 리더는 기록기 재시작으로 판단
+        HEADER.pack_into(self.mm, 0, MAGIC, VERSION, capacity, RECORD.size, len(self.slots), time.time())
+
+    def _compatible(self, size):
+        """기존 파일을 그대로 이어 쓸 수 있는지 (같은 매직/버전/슬롯 수/레코드 크기)"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != size:
+            return False
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return False
+        magic, version, capacity, record_size, _, _ = HEADER.unpack(header)
+        return magic == MAGIC and version == VERSION and capacity == self.capacity and record_size == RECORD.size
+
+    def _restore(self):
+        # 기존 종목은 같은 슬롯 유지, 기록 중 중단된 슬롯(seq 홀수)은 짝수로 맞춰 리더가 다시 읽을 수 있게 함
+        used = min(SEQ.unpack_from(self.mm, USED_OFFSET)[0], self.capacity)
+        for index in range(used):
+            offset = HEADER_SIZE + index * RECORD.size
+            seq, code, *values = RECORD.unpack_from(self.mm, offset)
+            if seq & 1:
+                seq += 1
+                SEQ.pack_into(self.mm, offset, seq)
+            self.slots[code.rstrip(b'\0').decode('ascii')] = index
+            self.values.append(values)
+            self.seqs.append(seq)
+
+    def slot(self, code):
+        """종목 슬롯 번호 (없으면 새로 할당)"""
+        index = self.slots.get(code)
+        if index is None:
+            index = len(self.slots)
+            if index >= self.capacity:
+                raise IndexError(f"시세판 용량 초과 ({self.capacity}종목)")
+            RECORD.pack_into(self.mm, HEADER_SIZE + index * RECORD.size, 0, code.encode('ascii'), 0, 0, 0, 0, 0.0)
+            self.slots[code] = index
+            self.values.append([0, 0, 0, 0, 0.0])
+            self.seqs.append(0)
+            # 코드 기록 후 사용 슬롯 수 증가 (리더는 사용 슬롯 수까지만 인덱싱)
+            struct.pack_into('<I', self.mm, USED_OFFSET, len(self.slots))
+        return index
+
+    def update(self, code, price=None, bid=None, ask=None, cum_volume=None, ts=None):
+        """슬롯 갱신 - 주어진 값만 바꾸고 나머지는 유지"""
+        index = self.slot(code)
+        values = self.values[index]
+        if price is not None:
+            values[0] = price
+        if bid is not None:
+            values[1] = bid
+        if ask is not None:
+            values[2] = ask
+        if cum_volume is not None:
+            values[3] = cum_volume
+        values[4] = self.clock() if ts is None else ts
+
+        offset = HEADER_SIZE + index * RECORD.size
+        seq = self.seqs[index] + 1
+        SEQ.pack_into(self.mm, offset, seq)               # 홀수: 기록 중
+        DATA.pack_into(self.mm, offset + DATA_OFFSET, *values)
+        SEQ.pack_into(self.mm, offset, seq + 1)           # 짝수: 기록 완료
+        self.seqs[index] = seq + 1
+        self.updates += 1
+
+    def on_real_data(self, code, real_type, data):
+        """KiwoomAPI.real_data_handlers 콜백"""
+        if real_type == "주식체결":
+            self.update(code, price=data['price'], bid=data['bid'], ask=data['ask'],
+                        cum_volume=data['cum_volume'])
+        elif real_type == "주식호가잔량":
+            self.update(code, bid=data['bid'], ask=data['ask'])
+
+    def close(self):
+        if self.mm:
+            self.mm.flush()
+            self.mm.close()
+            self.file.close()
+            self.mm = None
+
+
+class QuoteBoardReader:
+    def __init__(self, path="data/quote_board.bin"):
+        """시세판 읽기 (여러 프로세스에서 동시에 사용 가능)"""
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.capacity, record_size, _, self.generation = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"시세판 형식이 다릅니다: {path}")
+        self.slots = {}
+        self.retries = 0
+        self.stalled = 0  # 재시도 한도를 넘긴 조회 수 (기록 중 멈춘 슬롯)
+
+    def used(self):
+        return SEQ.unpack_from(self.mm, USED_OFFSET)[0]
+
+    def restarted(self):
+        """기록기가 파일을 새로 만들었는지 여부 (다시 열어야 함)"""
+        return HEADER.unpack_from(self.mm, 0)[5] != self.generation
+
+    def refresh(self):
+        """새로 할당된 슬롯의 종목코드 인덱싱"""
+        used = self.used()
+        for index in range(len(self.slots), used):
+            offset = HEADER_SIZE + index * RECORD.size + 4
+            code = self.mm[offset:offset + 8].rstrip(b'\0').decode('ascii')
+            self.slots[code] = index
+        return used
+
+    def get(self, code):
+        """
+        종목 시세 (현재가, 매수호가, 매도호가, 누적거래량, 시각) - 없으면 None
+        SPIN_LIMIT 회 안에 일관된 값을 못 읽으면 (기록기가 기록 중 종료) None
+        """
+        index = self.slots.get(code)
+        if index is None:
+            self.refresh()
+            index = self.slots.get(code)
+            if index is None:
+                return None
+        offset = HEADER_SIZE + index * RECORD.size
+        for _ in range(SPIN_LIMIT):
+            seq = SEQ.unpack_from(self.mm, offset)[0]
+            if seq & 1:
+                self.retries += 1
+                continue
+            values = DATA.unpack_from(self.mm, offset + DATA_OFFSET)
+            if SEQ.unpack_from(self.mm, offset)[0] == seq:
+                return values
+            self.retries += 1
+        self.stalled += 1
+        return None
+
+    def seq(self, code):
+        """슬롯 변경 번호 (변경 감지용)"""
+        index = self.slots.get(code)
+        if index is None:
+            return 0
+        return SEQ.unpack_from(self.mm, HEADER_SIZE + index * RECORD.size)[0]
+
+    def view(self):
+        """사용 중인 전체 슬롯의 NumPy 구조화 배열 뷰 (복사 없음, 슬롯별 일관성은 seq로 확인)"""
+        import numpy as np
+        return np.frombuffer(self.mm, dtype=record_dtype(), count=self.used(), offset=HEADER_SIZE)
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
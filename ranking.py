@@ -0,0 +1,204 @@
+"""
+실시간 거래대금 순위
+
+종목별 누적 거래대금(실시간 체결 FID 14, 백만원)을 색인 힙 두 개로 관리해 상위 K 종목을 유지합니다.
+    상위 힙: 상위 K 종목의 최소 힙 (루트 = K위)
+    나머지 힙: 나머지 종목의 최대 힙 (루트 = K+1위)
+갱신은 해당 힙에서 위치를 조정한 뒤 두 루트를 비교해 필요하면 한 번 맞바꾸므로 O(log n)이고,
+맞바꿀 때 상위 K 편입('I')/이탈('D') 이벤트를 냅니다 (조건검색 편입/이탈과 같은 구분).
+거래대금상위(opt10032) 조회는 시작 시 초기값과 주기적 재동기화에만 사용합니다.
+"""
+from symbol_master import normalize_code
+
+
+class IndexedHeap:
+    def __init__(self, largest=False):
+        """
+        종목코드 색인 힙 (위치 사전으로 임의 종목 값 갱신/삭제 O(log n))
+        largest: True면 최대 힙, False면 최소 힙
+        """
+        self.sign = -1 if largest else 1
+        self.codes = []
+        self.keys = []  # 부호를 맞춘 값 (작을수록 루트 쪽)
+        self.pos = {}   # {종목코드: 인덱스}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.pos
+
+    def value(self, code):
+        return self.keys[self.pos[code]] * self.sign
+
+    def peek(self):
+        """(루트 종목코드, 값) - 비어 있으면 (None, None)"""
+        if not self.codes:
+            return None, None
+        return self.codes[0], self.keys[0] * self.sign
+
+    def items(self):
+        return [(code, key * self.sign) for code, key in zip(self.codes, self.keys)]
+
+    def push(self, code, value):
+        self.codes.append(code)
+        self.keys.append(value * self.sign)
+        self.pos[code] = len(self.codes) - 1
+        self._up(len(self.codes) - 1)
+
+    def update(self, code, value):
+        i = self.pos[code]
+        key = value * self.sign
+        old = self.keys[i]
+        self.keys[i] = key
+        if key < old:
+            self._up(i)
+        elif key > old:
+            self._down(i)
+
+    def remove(self, code):
+        """종목 삭제 → 값"""
+        i = self.pos.pop(code)
+        value = self.keys[i] * self.sign
+        last_code = self.codes.pop()
+        last_key = self.keys.pop()
+        if i < len(self.codes):
+            self.codes[i] = last_code
+            self.keys[i] = last_key
+            self.pos[last_code] = i
+            self._up(i)
+            self._down(self.pos[last_code])
+        return value
+
+    def _swap(self, i, j):
+        codes, keys = self.codes, self.keys
+        codes[i], codes[j] = codes[j], codes[i]
+        keys[i], keys[j] = keys[j], keys[i]
+        self.pos[codes[i]] = i
+        self.pos[codes[j]] = j
+
+    def _up(self, i):
+        keys = self.keys
+        while i > 0:
+            parent = (i - 1) >> 1
+            if keys[i] >= keys[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _down(self, i):
+        keys = self.keys
+        n = len(keys)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[child + 1] < keys[child]:
+                child += 1
+            if keys[i] <= keys[child]:
+                break
+            self._swap(i, child)
+            i = child
+
+
+class TradeValueRanking:
+    def __init__(self, k=50):
+        """
+        거래대금 상위 K 순위
+        k: 상위 종목 수
+        """
+        self.k = k
+        self.top = IndexedHeap(largest=False)   # 상위 K (루트 = K위)
+        self.rest = IndexedHeap(largest=True)   # 나머지 (루트 = K+1위)
+        self.prices = {}  # {종목코드: 최근 체결가}
+        self.change_handlers = []  # 콜백(code, event, amount) - event 'I': 상위 K 편입, 'D': 이탈
+        self.updates = 0
+        self.changes = 0
+        self.synced = 0   # 재동기화에서 값을 올린 종목 수 (실시간 체결을 놓친 종목)
+
+    def __len__(self):
+        return len(self.top) + len(self.rest)
+
+    def amount(self, code):
+        if code in self.top:
+            return self.top.value(code)
+        if code in self.rest:
+            return self.rest.value(code)
+        return None
+
+    def update(self, code, amount):
+        """종목 누적 거래대금 갱신 (O(log n)) - 상위 K가 바뀌면 편입/이탈 이벤트"""
+        self.updates += 1
+        top, rest = self.top, self.rest
+        if code in top:
+            top.update(code, amount)
+        elif code in rest:
+            rest.update(code, amount)
+        elif len(top) < self.k:
+            top.push(code, amount)
+            self._notify(code, "I", amount)
+            return
+        else:
+            rest.push(code, amount)
+        # 한 종목만 바뀌었으므로 루트끼리 한 번 비교/교환하면 순서가 맞음
+        low_code, low = top.peek()
+        high_code, high = rest.peek()
+        if high_code is not None and high > low:
+            top.remove(low_code)
+            rest.remove(high_code)
+            top.push(high_code, high)
+            rest.push(low_code, low)
+            self._notify(high_code, "I", high)
+            self._notify(low_code, "D", low)
+
+    def _notify(self, code, event, amount):
+        self.changes += 1
+        for handler in self.change_handlers:
+            try:
+                handler(code, event, amount)
+            except Exception as e:
+                print(f"순위 이벤트 처리 오류 ({code}): {e}")
+
+    def on_real_data(self, code, real_type, data):
+        """실시간 체결 콜백 - 누적 거래대금이 바뀐 종목만 갱신"""
+        if real_type != "주식체결":
+            return
+        self.prices[code] = data['price']
+        amount = data['cum_amount']
+        if amount and amount != self.amount(code):
+            self.update(code, amount)
+
+    def seed(self, stocks):
+        """
+        거래대금상위(opt10032) 결과로 초기값/재동기화 - KiwoomAPI.get_volume_rank 형식
+        이미 더 큰 값이 있으면 유지 (조회 시점보다 실시간 체결이 최신)
+        """
+        for stock in stocks:
+            code = normalize_code(stock['code'])
+            amount = stock['trade_amount']
+            current = self.amount(code)
+            if current is None or amount > current:
+                if current is not None:
+                    self.synced += 1
+                self.update(code, amount)
+            if stock.get('price'):
+                self.prices.setdefault(code, stock['price'])
+
+    def ranked(self, n=None):
+        """상위 n(기본 K) 종목 [(종목코드, 누적 거래대금)] 내림차순 - O(K log K)"""
+        items = sorted(self.top.items(), key=lambda item: -item[1])
+        return items if n is None else items[:n]
+
+    def codes(self):
+        """상위 K 종목코드 집합"""
+        return set(self.top.pos)
+
+    def clear(self):
+        self.top = IndexedHeap(largest=False)
+        self.rest = IndexedHeap(largest=True)
+        self.prices.clear()
+
+    def report(self):
+        leaders = ", ".join(f"{code} {amount:,}" for code, amount in self.ranked(5))
+        print(f"[거래대금 순위] 종목 {len(self):,}개, 갱신 {self.updates:,}건, 상위 {self.k} 변경 {self.changes:,}건, "
+              f"재동기화 보정 {self.synced}종목 (상위: {leaders} 백만원)")
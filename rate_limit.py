@@ -0,0 +1,45 @@
+import time
+from collections import deque
+
+# 키움 TR 조회 제한 (횟수, 구간 초) - 구간별 슬라이딩 윈도우
+DEFAULT_WINDOWS = ((5, 1.0), (100, 60.0), (1000, 3600.0))
+
+
+class RateLimiter:
+    def __init__(self, windows=DEFAULT_WINDOWS, clock=time.monotonic, sleep=time.sleep):
+        """
+        TR 조회 제한기
+        windows: ((최대 횟수, 구간 초), ...) - 모든 구간을 동시에 만족할 때까지 대기
+        """
+        self.windows = [(limit, span, deque()) for limit, span in windows]
+        self.clock = clock
+        self.sleep = sleep
+        self.count = 0
+        self.waited = 0.0  # 누적 대기 시간 (초)
+
+    def delay(self, now=None):
+        """지금 요청하려면 기다려야 하는 시간 (초)"""
+        now = self.clock() if now is None else now
+        delay = 0.0
+        for limit, span, stamps in self.windows:
+            while stamps and stamps[0] <= now - span:
+                stamps.popleft()
+            if len(stamps) >= limit:
+                delay = max(delay, stamps[len(stamps) - limit] + span - now)
+        return delay
+
+    def wait(self):
+        """제한에 걸리지 않을 때까지 대기 후 요청 1회 기록"""
+        delay = self.delay()
+        if delay > 0:
+            self.sleep(delay)
+            self.waited += delay
+        now = self.clock()
+        for _, _, stamps in self.windows:
+            stamps.append(now)
+        self.count += 1
+
+    def usage(self, now=None):
+        """구간별 사용 횟수 [(사용, 최대, 구간 초)]"""
+        self.delay(now)
+        return [(len(stamps), limit, span) for limit, span, stamps in self.windows]
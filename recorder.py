@@ -0,0 +1,342 @@
+"""
+OCX 호출/이벤트 기록 및 재생
+
+기록: RecordingOCX가 실제 QAxWidget을 감싸 dynamicCall 요청/응답과 On* 이벤트를
+      타임스탬프와 함께 gzip 압축 바이너리 로그로 저장
+재생: ReplayOCX가 로그를 같은 핸들러로 다시 흘려보냄 (장 시간/키움 서버/Windows 불필요)
+      기록과 다른 호출이나 재생되지 않은 기록 호출이 있으면 재생 실패 (Replayer.failed)
+
+로그 형식: 헤더(MAGIC) + 레코드 반복
+    레코드 = struct('<BdI') (종류, 시각, 길이) + marshal 페이로드
+    DEFINE(0): (이름ID, 이름) - 함수 시그니처/이벤트 이름 문자열 테이블
+    CALL(1):   (이름ID, 인자, 결과)
+    EVENT(2):  (이름ID, 인자)
+"""
+import gzip
+import marshal
+import struct
+import time
+from collections import deque
+
+MAGIC = b"KWOCX1\n"
+RECORD_HEADER = struct.Struct('<BdI')
+DEFINE, CALL, EVENT = 0, 1, 2
+
+# 재생 시 순서를 엄격히 맞춰야 하는 호출 (매매 결정)
+ORDER_CALLS = ("SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",)
+
+
+class ReplayMismatch(Exception):
+    """재생 중 코드가 기록과 다른 호출을 한 경우 (매매 결정 변경)"""
+    pass
+
+
+class OcxLogWriter:
+    def __init__(self, path, clock=time.time, flush_interval=1.0):
+        """OCX 로그 기록기 (flush_interval 초마다 디스크에 반영)"""
+        self.path = path
+        self.clock = clock
+        self.file = gzip.open(path, 'wb', compresslevel=6)
+        self.file.write(MAGIC)
+        self.names = {}
+        self.flush_interval = flush_interval
+        self.last_flush = clock()
+        self.count = 0
+
+    def _name_id(self, name):
+        name_id = self.names.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names[name] = name_id
+            self._write(DEFINE, (name_id, name))
+        return name_id
+
+    def _write(self, kind, payload):
+        now = self.clock()
+        data = marshal.dumps(payload)
+        self.file.write(RECORD_HEADER.pack(kind, now, len(data)))
+        self.file.write(data)
+        self.count += 1
+        if now - self.last_flush >= self.flush_interval:
+            self.file.flush()
+            self.last_flush = now
+
+    def call(self, signature, args, result):
+        self._write(CALL, (self._name_id(signature), args, result))
+
+    def event(self, name, args):
+        self._write(EVENT, (self._name_id(name), args))
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def read_log(path):
+    """로그 레코드 순회 → (종류, 시각, 이름, 인자, 결과)"""
+    names = {}
+    with gzip.open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"OCX 로그 형식이 아닙니다: {path}")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            kind, ts, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                break  # 비정상 종료로 잘린 마지막 레코드
+            payload = marshal.loads(data)
+            if kind == DEFINE:
+                names[payload[0]] = payload[1]
+            elif kind == CALL:
+                yield CALL, ts, names[payload[0]], payload[1], payload[2]
+            elif kind == EVENT:
+                yield EVENT, ts, names[payload[0]], payload[1], None
+
+
+class RecordingSignal:
+    def __init__(self, signal, name, log):
+        """QAxWidget 이벤트 시그널 래퍼 - 핸들러 실행 전에 이벤트 기록"""
+        self.signal = signal
+        self.name = name
+        self.log = log
+        self.handlers = []
+
+    def connect(self, handler):
+        if not self.handlers:
+            self.signal.connect(self._dispatch)
+        self.handlers.append(handler)
+
+    def _dispatch(self, *args):
+        self.log.event(self.name, args)
+        for handler in self.handlers:
+            handler(*args)
+
+
+class RecordingOCX:
+    def __init__(self, ocx, log):
+        """
+        기록 모드 OCX 래퍼
+        ocx: 실제 QAxWidget
+        log: OcxLogWriter
+        """
+        self.ocx = ocx
+        self.log = log
+        self.signals = {}
+
+    def dynamicCall(self, signature, *args):
+        result = self.ocx.dynamicCall(signature, *args)
+        self.log.call(signature, args, result)
+        return result
+
+    def __getattr__(self, name):
+        attr = getattr(self.ocx, name)
+        if name.startswith("On"):
+            if name not in self.signals:
+                self.signals[name] = RecordingSignal(attr, name, self.log)
+            return self.signals[name]
+        return attr
+
+
+class ReplaySignal:
+    def __init__(self):
+        self.handlers = []
+
+    def connect(self, handler):
+        self.handlers.append(handler)
+
+
+class ReplayOCX:
+    def __init__(self, path, strict=False):
+        """
+        재생 모드 OCX
+        strict: True면 모든 호출이 기록 순서와 같아야 함
+                False면 이벤트 사이 구간 안에서는 조회성 호출 순서 변경 허용 (주문은 항상 순서 검사)
+        """
+        self.path = path
+        self.strict = strict
+        self.records = read_log(path)
+        self.buffer = deque()
+        self.signals = {}
+        self.now = None
+        self.calls = 0
+        self.events = 0
+        self.orders = 0
+        self.mismatch = None  # 첫 불일치 (호출한 코드가 예외를 삼켜도 재생 실패로 판정)
+        self.start_ts = None
+        self._fill(1)
+        if self.buffer:
+            self.start_ts = self.buffer[0][1]
+            self.now = self.start_ts
+
+    def _fill(self, n):
+        while len(self.buffer) < n:
+            try:
+                self.buffer.append(next(self.records))
+            except StopIteration:
+                return False
+        return True
+
+    def peek(self):
+        """다음 레코드 (없으면 None)"""
+        return self.buffer[0] if self._fill(1) else None
+
+    def finished(self):
+        return self.peek() is None
+
+    def remaining_calls(self):
+        """재생되지 않고 남은 기록 호출 수 (남은 레코드를 모두 읽음)"""
+        count = sum(1 for record in self.buffer if record[0] == CALL)
+        count += sum(1 for record in self.records if record[0] == CALL)
+        self.buffer.clear()
+        return count
+
+    def _mismatch(self, message):
+        error = ReplayMismatch(message)
+        if self.mismatch is None:
+            self.mismatch = error
+        return error
+
+    def clock(self):
+        """가상 시계 - 마지막으로 재생한 이벤트 시각"""
+        return self.now
+
+    def sleep(self, seconds):
+        """재생 중 대기 없음 (시각은 기록된 이벤트 시각을 따름)"""
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("On"):
+            if name not in self.signals:
+                self.signals[name] = ReplaySignal()
+            return self.signals[name]
+        raise AttributeError(name)
+
+    def fire_next(self):
+        """맨 앞 이벤트를 등록된 핸들러로 재생"""
+        kind, ts, name, args, _ = self.buffer.popleft()
+        self.now = max(self.now, ts)
+        self.events += 1
+        signal = self.signals.get(name)
+        if signal:
+            for handler in signal.handlers:
+                handler(*args)
+
+    def pump(self, received):
+        """대기 중인 응답 이벤트 재생 - received()가 참이 되거나 다음 기록이 호출이면 중단"""
+        while not received():
+            record = self.peek()
+            if record is None or record[0] != EVENT:
+                return
+            self.fire_next()
+
+    def dynamicCall(self, signature, *args):
+        # 이 호출보다 먼저 기록된 이벤트는 먼저 재생
+        record = self.peek()
+        while record is not None and record[0] == EVENT:
+            self.fire_next()
+            record = self.peek()
+        if record is None:
+            raise self._mismatch(f"기록 종료 후 호출: {signature} {args}")
+
+        args = self._normalize(args)
+        index = self._find_call(signature, args)
+        kind, ts, name, recorded_args, result = self.buffer[index]
+        del self.buffer[index]
+        self.calls += 1
+        if signature in ORDER_CALLS:
+            self.orders += 1
+        return result
+
+    def _find_call(self, signature, args):
+        kind, ts, name, recorded_args, _ = self.buffer[0]
+        if name == signature and recorded_args == args:
+            return 0
+        if not self.strict and signature not in ORDER_CALLS:
+            # 다음 이벤트 전까지의 호출 중에서 같은 호출 검색
+            i = 1
+            while self._fill(i + 1):
+                kind, ts, name, recorded_args, _ = self.buffer[i]
+                if kind == EVENT or name in ORDER_CALLS:
+                    break
+                if name == signature and recorded_args == args:
+                    return i
+                i += 1
+        head = self.buffer[0]
+        raise self._mismatch(f"기록과 다른 호출 ({time.strftime('%H:%M:%S', time.localtime(head[1]))}): "
+                             f"{signature} {args} / 기록: {head[2]} {head[3]}")
+
+    def _normalize(self, args):
+        # marshal 왕복 후와 같은 형태로 맞춤 (리스트/튜플 구분 유지)
+        return marshal.loads(marshal.dumps(args))
+
+
+class Replayer:
+    def __init__(self, bot, ocx, speed=0):
+        """
+        트레이딩 봇 재생 실행기
+        speed: 0이면 최대 속도, 1이면 기록된 속도, 10이면 10배속
+        """
+        self.bot = bot
+        self.ocx = ocx
+        self.speed = speed
+        self.ticks = 0
+        self.stale_after = 300  # 기록 시각보다 이만큼 지나도 호출되지 않은 기록 호출은 불일치로 판정 (초)
+        self.failed = False
+
+    def _advance(self, ts):
+        if ts is None or ts <= self.ocx.now:
+            return
+        if self.speed > 0:
+            time.sleep((ts - self.ocx.now) / self.speed)
+        self.ocx.now = ts
+
+    def run(self):
+        """로그인/장전 준비 후 스케줄러와 기록된 이벤트를 시각 순으로 재생"""
+        started = time.perf_counter()
+        self.bot.login()
+        self.bot.warmup()
+        scheduler = self.bot.setup_scheduler()
+
+        stalled = 0
+        while self.ocx.mismatch is None:
+            record = self.ocx.peek()
+            due = scheduler.next_due(self.ocx.now)
+            if record is None and due is None:
+                break
+            if record is not None and record[0] == EVENT and (due is None or record[1] <= due):
+                self._advance(record[1])
+                self.ocx.fire_next()
+                continue
+            if record is None:
+                break  # 기록이 끝나면 재생 종료
+            if due is None or self.ocx.now - record[1] > self.stale_after:
+                # 기록된 호출 시각이 지나도록 재생한 코드가 그 호출을 하지 않음
+                print(f"[재생] 실행되지 않은 기록 호출: {record[2]} {record[3]}")
+                break
+            before = self.ocx.now
+            self._advance(due)
+            scheduler.tick(self.ocx.now)
+            self.ticks += 1
+            # 작업이 진행되지 않고 같은 시각에 머무르면 시계를 강제로 진행
+            stalled = stalled + 1 if self.ocx.now == before else 0
+            if stalled > 100:
+                self._advance(self.ocx.now + scheduler.resolution)
+                stalled = 0
+
+        elapsed = time.perf_counter() - started
+        span = (self.ocx.now or 0) - (self.ocx.start_ts or 0)
+        left = self.ocx.remaining_calls()
+        self.failed = self.ocx.mismatch is not None or left > 0
+        if self.ocx.mismatch is not None:
+            print(f"\n[재생 실패] {self.ocx.mismatch}")
+        if left:
+            print(f"\n[재생 실패] 재생되지 않은 기록 호출 {left:,}건")
+        print("\n[재생 완료]")
+        print(f"  기록 구간: {span:,.0f}초, 재생 시간: {elapsed:.2f}초 ({span / elapsed if elapsed else 0:,.0f}배속)")
+        print(f"  호출 {self.ocx.calls:,}건, 이벤트 {self.ocx.events:,}건, 주문 {self.ocx.orders}건 {'재생' if self.failed else '일치'}, 스케줄러 틱 {self.ticks:,}회")
+        print(f"  처리량: 호출+이벤트 {(self.ocx.calls + self.ocx.events) / elapsed if elapsed else 0:,.0f}건/초")
+        scheduler.report()
+        return elapsed
@@ -0,0 +1,381 @@
+"""
+지정가 주문 정정 엔진
+
+미체결 지정가 주문이 있는 종목은 실시간 호가(주식호가잔량)를 등록하고,
+호가가 주문 가격에서 멀어지면 정책에 따라 정정 주문(매수정정 5, 매도정정 6)으로 따라갑니다.
+    - amend_after 초 동안 체결되지 않으면 최우선 호가에 맞춰 정정 (매수: 매수1호가, 매도: 매도1호가)
+    - cross_after 초가 지나면 상대 호가로 정정 (매수: 매도1호가, 매도: 매수1호가)
+    - 신호 가격 대비 max_ticks 호가 이상은 따라가지 않음
+    - timeout 초가 지나면 취소 (timeout_action 'market'이면 남은 수량을 시장가로 다시 주문)
+    - accept_timeout 초 안에 접수 통보가 없으면 서버 거부(주문가능금액/수량 부족, 가격 제한 등)로 보고 정리
+      (SendOrder는 전송만 확인하므로 0을 반환해도 거부될 수 있음 - 늦게 접수되면 바로 취소)
+체결 통보 기준으로 신호부터 체결까지 걸린 시간과 신호 가격 대비 슬리피지를 기록합니다.
+주문에 결정 추적(tracing.Trace)을 넘기면 전송/접수/정정/체결/취소를 같은 추적 ID로 기록합니다.
+시장가 주문(hoga '03', 손절/트레일링 청산)도 등록할 수 있습니다 - 정정하지 않고 접수/체결 연결과
+접수 대기 한도, timeout 초과 시 취소만 적용합니다.
+"""
+import time
+
+from kiwoom_api import REAL_FIDS_HOGA
+from ticks import ceil_to_tick, floor_to_tick, tick_down, tick_up
+
+BUY, SELL = "buy", "sell"
+NEW_ORDER = {BUY: 1, SELL: 2}
+CANCEL_ORDER = {BUY: 3, SELL: 4}
+MODIFY_ORDER = {BUY: 5, SELL: 6}
+CHEJAN_SIDE = {"2": BUY, "1": SELL}  # 체결 통보 매도수구분 (907)
+
+
+class RepricePolicy:
+    def __init__(self, amend_after=3.0, cross_after=None, max_ticks=3, max_amends=5,
+                 timeout=60.0, timeout_action="cancel"):
+        """
+        정정 정책
+        amend_after: 미체결 후 정정까지 대기 (초, 정정 사이 간격도 동일)
+        cross_after: 주문 후 이 시간이 지나면 상대 호가로 정정 (None이면 최우선 호가까지만)
+        max_ticks: 신호 가격에서 불리한 방향으로 따라갈 최대 호가 수
+        timeout: 주문 후 이 시간이 지나면 취소 (None이면 계속 유지)
+        timeout_action: 'cancel'(취소만) 또는 'market'(취소 후 남은 수량 시장가 주문)
+        """
+        self.amend_after = amend_after
+        self.cross_after = cross_after
+        self.max_ticks = max_ticks
+        self.max_amends = max_amends
+        self.timeout = timeout
+        self.timeout_action = timeout_action
+
+
+DEFAULT_POLICIES = {
+    # 매수: 신호가 약해지기 전에 최우선 매수호가를 따라가고, 1분 안에 체결되지 않으면 취소
+    BUY: RepricePolicy(amend_after=3.0, cross_after=15.0, max_ticks=3, timeout=60.0, timeout_action="cancel"),
+    # 익절 매도: 매도호가를 따라가다 30초가 지나면 시장가로 청산
+    SELL: RepricePolicy(amend_after=2.0, cross_after=10.0, max_ticks=5, timeout=30.0, timeout_action="market"),
+}
+
+
+class WorkingOrder:
+    def __init__(self, code, side, quantity, price, rqname, ref_price, signal_at, trace=None):
+        self.code = code
+        self.side = side
+        self.quantity = quantity
+        self.price = price            # 현재 주문 가격
+        self.rqname = rqname
+        self.ref_price = ref_price    # 신호 가격 (슬리피지 기준)
+        self.signal_at = signal_at
+        self.order_no = None          # 접수 전에는 None, 정정 접수 시 새 주문번호로 바뀜
+        self.state = "pending"        # pending(접수 대기), working, amending, cancelling, done
+        self.last_action = signal_at  # 마지막 주문/정정 시각
+        self.amends = 0
+        self.filled = 0
+        self.fill_amount = 0          # 체결 금액 합계 (평균 체결가 계산)
+        self.leg_filled = {}          # {주문번호: 누적 체결량} - 정정 시 주문번호별로 누적
+        self.replace_market = False   # 취소 확인 후 시장가 재주문
+        self.trace = trace            # 결정 추적 (tracing.Trace, 없으면 None)
+        self.market = False           # 시장가 주문 (정정하지 않음)
+
+    def remaining(self):
+        return self.quantity - self.filled
+
+    def avg_fill_price(self):
+        return self.fill_amount / self.filled if self.filled else 0
+
+
+class Repricer:
+    def __init__(self, api, policies=None, clock=time.time):
+        """
+        주문 정정 엔진
+        api: KiwoomAPI (주문 전송, 실시간 호가 등록)
+        policies: {BUY/SELL: RepricePolicy}
+        """
+        self.api = api
+        self.policies = policies or DEFAULT_POLICIES
+        self.clock = clock
+        self.orders = {}    # {주문번호: WorkingOrder} - 정정 전/후 주문번호 모두 등록
+        self.unacked = []   # 접수 통보 대기 중인 주문 (전송 순)
+        self.by_code = {}   # {종목코드: [WorkingOrder]}
+        self.book = {}      # {종목코드: (매도1호가, 매수1호가)}
+        self.ack_timeout = 5.0  # 정정/취소 접수 통보 대기 한도 (초) - 넘으면 다시 정정 가능
+        self.accept_timeout = 10.0  # 신규 주문 접수 통보 대기 한도 (초) - 넘으면 거부로 보고 정리
+        self.expired = []   # 접수 통보 없이 정리한 주문 (늦게 접수되면 취소)
+        self.fill_handlers = []  # 콜백(order, fill_qty, fill_price)
+        self.reject_handlers = []  # 콜백(order) - 접수 통보 없이 정리한 주문
+        self.stats = {'orders': 0, 'filled': 0, 'partial': 0, 'cancelled': 0, 'market': 0, 'amends': 0,
+                      'rejected': 0}
+        self.fill_times = {BUY: [], SELL: []}  # 신호 → 전량 체결 시간 (초)
+        self.slippages = {BUY: [], SELL: []}   # 신호 가격 대비 불리한 방향 슬리피지 (bp)
+
+    def submit(self, code, side, quantity, price, rqname, ref_price=None, trace=None, hoga="00"):
+        """
+        주문 전송 후 정정 대상으로 등록 → SendOrder 반환값 (trace: 결정 추적 - 주문이 끝나면 종료)
+        hoga: '00' 지정가, '03' 시장가 (시장가는 정정하지 않고 접수/체결만 추적)
+        """
+        now = self.clock()
+        ret = self.api.send_order(rqname, self.api.screens.order_screen(), self.api.account_num,
+                                  NEW_ORDER[side], code, quantity, price, hoga)
+        if trace is not None:
+            trace.mark('send', ret=ret)
+        if ret != 0:
+            if trace is not None:
+                trace.finish('rejected')
+            return ret
+        order = WorkingOrder(code, side, quantity, price, rqname, ref_price or price, now, trace)
+        order.market = hoga == "03"
+        self.unacked.append(order)
+        self.by_code.setdefault(code, []).append(order)
+        self.stats['orders'] += 1
+        if not order.market and not self.api.screens.is_registered(code, 'hoga'):
+            self.api.screens.register_real([code], REAL_FIDS_HOGA, 'hoga')
+        return ret
+
+    def has_working(self, code, side=None):
+        return any(side is None or order.side == side for order in self.by_code.get(code, []))
+
+    def on_real_data(self, code, real_type, data):
+        """KiwoomAPI.real_data_handlers 콜백 - 호가 갱신 시 해당 종목 주문 점검"""
+        if real_type not in ("주식호가잔량", "주식체결"):
+            return
+        orders = self.by_code.get(code)
+        if not orders:
+            return
+        if data['ask'] > 0 and data['bid'] > 0:
+            self.book[code] = (data['ask'], data['bid'])
+        now = self.clock()
+        for order in list(orders):
+            self._evaluate(order, now)
+
+    def check(self):
+        """주기 점검 - 호가 변화가 없는 종목의 시간 초과 처리"""
+        now = self.clock()
+        for orders in list(self.by_code.values()):
+            for order in list(orders):
+                self._evaluate(order, now)
+
+    def _evaluate(self, order, now):
+        if order.state == "pending":
+            if now - order.last_action >= self.accept_timeout:
+                self._expire(order, now)
+            return
+        if order.state in ("amending", "cancelling"):
+            if now - order.last_action >= self.ack_timeout:
+                # 정정/취소 접수 통보 없음 (이미 체결 등으로 거부) - 다시 점검 대상으로
+                order.state = "working"
+            return
+        if order.state != "working":
+            return
+        policy = self.policies[order.side]
+        age = now - order.signal_at
+        if policy.timeout is not None and age >= policy.timeout:
+            self._cancel(order, now, replace_market=policy.timeout_action == "market" and not order.market)
+            return
+        if order.market:
+            return
+        if order.amends >= policy.max_amends or now - order.last_action < policy.amend_after:
+            return
+        target = self._target_price(order, policy, age)
+        if target is not None:
+            self._amend(order, target, now)
+
+    def _target_price(self, order, policy, age):
+        """정정할 가격 (정정이 필요 없으면 None)"""
+        book = self.book.get(order.code)
+        if book is None:
+            return None
+        ask, bid = book
+        cross = policy.cross_after is not None and age >= policy.cross_after
+        if order.side == BUY:
+            limit = tick_up(floor_to_tick(order.ref_price), policy.max_ticks)
+            target = min(ask if cross else bid, limit)
+            return target if target > order.price else None
+        limit = tick_down(ceil_to_tick(order.ref_price), policy.max_ticks)
+        target = max(bid if cross else ask, limit)
+        return target if target < order.price else None
+
+    def _amend(self, order, price, now):
+        quantity = order.remaining()
+        ret = self.api.send_order(f"{order.rqname}정정", self.api.screens.order_screen(), self.api.account_num,
+                                  MODIFY_ORDER[order.side], order.code, quantity, price, "00", order.order_no)
+        if ret != 0:
+            print(f"[주문 정정] {order.code} 정정 실패: {ret}")
+            order.last_action = now
+            return
+        print(f"[주문 정정] {order.code} {order.rqname} {order.price:,}원 → {price:,}원 ({quantity}주)")
+        if order.trace is not None:
+            order.trace.mark('amend', price=price)
+        order.state = "amending"
+        order.last_action = now
+        order.amends += 1
+        self.stats['amends'] += 1
+
+    def _cancel(self, order, now, replace_market=False):
+        ret = self.api.send_order(f"{order.rqname}취소", self.api.screens.order_screen(), self.api.account_num,
+                                  CANCEL_ORDER[order.side], order.code, order.remaining(), 0, "00", order.order_no)
+        if ret != 0:
+            print(f"[주문 정정] {order.code} 취소 실패: {ret}")
+            order.last_action = now
+            return
+        action = "시장가 전환" if replace_market else "취소"
+        print(f"[주문 정정] {order.code} {order.rqname} {now - order.signal_at:.0f}초 미체결 - {action} ({order.remaining()}주)")
+        if order.trace is not None:
+            order.trace.mark('cancel', remaining=order.remaining())
+        order.state = "cancelling"
+        order.last_action = now
+        order.replace_market = replace_market
+
+    def _expire(self, order, now):
+        """접수 통보 없는 신규 주문 정리 - 종목 재주문/보유 한도/호가 등록이 풀리도록 (거부 콜백으로 알림)"""
+        print(f"[주문 정정] {order.code} {order.rqname} {now - order.last_action:.0f}초 동안 접수 통보 없음 - 거부로 정리")
+        self.stats['rejected'] += 1
+        if order.trace is not None:
+            order.trace.finish('rejected')
+        self._finish(order)
+        # 오래된 항목은 버림 (그때까지 접수되지 않았으면 거부된 주문)
+        self.expired = [item for item in self.expired if now - item.last_action < 60 * self.accept_timeout]
+        self.expired.append(order)
+        for handler in self.reject_handlers:
+            try:
+                handler(order)
+            except Exception as e:
+                print(f"거부 처리 오류 ({order.code}): {e}")
+
+    def cancel_all(self, market_sells=False):
+        """미체결 주문 전체 취소 (마감 청산 전) - market_sells이면 매도 주문은 취소 확인 후 남은 수량 시장가"""
+        now = self.clock()
+        for orders in list(self.by_code.values()):
+            for order in list(orders):
+                if order.order_no and order.state in ("working", "amending") and not order.market:
+                    self._cancel(order, now, replace_market=market_sells and order.side == SELL)
+
+    def on_chejan(self, gubun, data):
+        """KiwoomAPI.chejan_handlers 콜백 - 접수/정정/체결/취소 확인 반영"""
+        if gubun != "0":
+            return
+        status = data['status']
+        if status == "접수":
+            self._on_accepted(data)
+        elif status == "체결":
+            order = self.orders.get(data['order_no'])
+            if order is not None:
+                self._on_fill(order, data)
+        elif status == "확인":
+            order = self.orders.get(data['orig_order_no'])
+            if order is not None and "취소" in data['order_type']:
+                self._on_cancelled(order)
+
+    def _on_accepted(self, data):
+        orig = data['orig_order_no'].lstrip("0")
+        if orig:
+            # 정정/취소 접수 - 정정은 남은 수량이 새 주문번호로 옮겨감
+            order = self.orders.get(data['orig_order_no'])
+            if order is not None and "정정" in data['order_type']:
+                order.order_no = data['order_no']
+                order.price = data['order_price']
+                order.state = "working"
+                self.orders[order.order_no] = order
+                if order.trace is not None:
+                    order.trace.mark('amend_ack', order_no=order.order_no)
+            return
+        side = CHEJAN_SIDE.get(data['side'])
+        for order in self.unacked:
+            if order.code == data['code'] and order.side == side and order.quantity == data['order_qty']:
+                self.unacked.remove(order)
+                order.order_no = data['order_no']
+                order.state = "working"
+                self.orders[order.order_no] = order
+                if order.trace is not None:
+                    order.trace.mark('ack', order_no=order.order_no)
+                return
+        for order in self.expired:
+            if order.code == data['code'] and order.side == side and order.quantity == data['order_qty']:
+                # 이미 거부로 정리한 주문이 늦게 접수됨 - 관리 대상이 아니므로 바로 취소
+                self.expired.remove(order)
+                print(f"[주문 정정] {order.code} {order.rqname} 정리 후 접수됨 - 취소 ({data['order_no']})")
+                ret = self.api.send_order(f"{order.rqname}취소", self.api.screens.order_screen(),
+                                          self.api.account_num, CANCEL_ORDER[order.side], order.code,
+                                          order.quantity, 0, "00", data['order_no'])
+                if ret != 0:
+                    print(f"[주문 정정] {order.code} 취소 실패: {ret}")
+                return
+
+    def _on_fill(self, order, data):
+        # 체결량(911)은 주문번호별 누적 - 이전 통보와의 차이가 이번 체결량
+        order_no = data['order_no']
+        fill_qty = data['fill_qty'] - order.leg_filled.get(order_no, 0)
+        if fill_qty <= 0:
+            return
+        order.leg_filled[order_no] = data['fill_qty']
+        order.filled += fill_qty
+        order.fill_amount += fill_qty * data['fill_price']
+        if order.trace is not None:
+            order.trace.mark('fill', qty=fill_qty, price=data['fill_price'])
+        for handler in self.fill_handlers:
+            try:
+                handler(order, fill_qty, data['fill_price'])
+            except Exception as e:
+                print(f"체결 처리 오류 ({order.code}): {e}")
+        if order.remaining() <= 0:
+            elapsed = self.clock() - order.signal_at
+            self.fill_times[order.side].append(elapsed)
+            self.slippages[order.side].append(self._slippage(order))
+            self.stats['filled'] += 1
+            print(f"[주문 정정] {order.code} {order.rqname} 전량 체결: 평균 {order.avg_fill_price():,.0f}원, "
+                  f"신호 후 {elapsed:.1f}초, 정정 {order.amends}회")
+            if order.trace is not None:
+                order.trace.finish('filled')
+            self._finish(order)
+
+    def _on_cancelled(self, order):
+        remaining = order.remaining()
+        if order.replace_market:
+            outcome = 'market'
+        elif order.filled:
+            outcome = 'partial'
+        else:
+            outcome = 'cancelled'
+        self.stats[outcome] += 1
+        if order.trace is not None:
+            order.trace.finish(outcome)
+        if order.filled:
+            self.slippages[order.side].append(self._slippage(order))
+        self._finish(order)
+        if order.replace_market and remaining > 0:
+            ret = self.api.send_order(f"{order.rqname}시장가", self.api.screens.order_screen(),
+                                      self.api.account_num, NEW_ORDER[order.side], order.code, remaining, 0, "03")
+            if ret != 0:
+                print(f"[주문 정정] {order.code} 시장가 주문 실패: {ret}")
+
+    def _slippage(self, order):
+        """신호 가격 대비 불리한 방향 슬리피지 (bp, 양수면 불리)"""
+        diff = order.avg_fill_price() - order.ref_price
+        if order.side == SELL:
+            diff = -diff
+        return diff / order.ref_price * 10000
+
+    def _finish(self, order):
+        order.state = "done"
+        for order_no, item in list(self.orders.items()):
+            if item is order:
+                del self.orders[order_no]
+        if order in self.unacked:
+            self.unacked.remove(order)
+        orders = self.by_code.get(order.code, [])
+        if order in orders:
+            orders.remove(order)
+        if not orders:
+            self.by_code.pop(order.code, None)
+            self.book.pop(order.code, None)
+            self.api.screens.unregister_real([order.code], 'hoga')
+
+    def report(self):
+        stats = self.stats
+        print(f"[주문 정정] 주문 {stats['orders']}건, 전량 체결 {stats['filled']}건, 부분 체결 후 취소 {stats['partial']}건, "
+              f"미체결 취소 {stats['cancelled']}건, 시장가 전환 {stats['market']}건, 정정 {stats['amends']}건, "
+              f"접수 없음 {stats['rejected']}건, 진행 중 {sum(map(len, self.by_code.values()))}건")
+        for side, name in ((BUY, "매수"), (SELL, "매도")):
+            times = sorted(self.fill_times[side])
+            if not times:
+                continue
+            median = times[len(times) // 2]
+            p90 = times[min(int(len(times) * 0.9), len(times) - 1)]
+            slippages = self.slippages[side]
+            print(f"  {name}: 체결까지 중앙값 {median:.1f}초, 90% {p90:.1f}초, "
+                  f"평균 슬리피지 {sum(slippages) / len(slippages):+.1f}bp ({len(times)}건)")
@@ -0,0 +1,321 @@
+import time
+from PyQt5.QtCore import Qt, QTimer
+
+
+# 장 운영 구간 (이름, 시작 HHMM, 종료 HHMM)
+DEFAULT_PHASES = [
+    ("pre_market", "0830", "0900"),   # 장전 준비 (종목 선정, 워밍업)
+    ("open", "0900", "0910"),         # 장 시작 직후 (변동성 구간, 매수 보류)
+    ("buy_window", "0910", "1000"),   # 매수 시간대
+    ("monitoring", "1000", "1525"),   # 보유 종목 모니터링
+    ("close_out", "1525", "1530"),    # 마감 전 청산
+    ("post_market", "1530", "2400"),  # 장 마감 이후
+]
+
+
+def hhmm_to_seconds(hhmm):
+    """'HHMM' 문자열을 자정 기준 초로 변환"""
+    return int(hhmm[:2]) * 3600 + int(hhmm[2:]) * 60
+
+
+def seconds_since_midnight(now):
+    """epoch 시각을 로컬 자정 기준 초로 변환"""
+    t = time.localtime(now)
+    return t.tm_hour * 3600 + t.tm_min * 60 + t.tm_sec + (now % 1)
+
+
+class TaskStats:
+    def __init__(self):
+        """작업 실행 통계 (지터/지연/소요시간)"""
+        self.runs = 0
+        self.missed = 0       # 마감시한을 넘겨 실행된 횟수
+        self.skipped = 0      # 따라잡기 정책으로 건너뛴 주기 수
+        self.jitters = []     # 예정 시각 대비 실제 시작 지연 (초)
+        self.durations = []   # 실행 소요시간 (초)
+        self.max_samples = 1000
+
+    def record(self, jitter, duration):
+        self.runs += 1
+        self.jitters.append(jitter)
+        self.durations.append(duration)
+        if len(self.jitters) > self.max_samples:
+            del self.jitters[0]
+            del self.durations[0]
+
+    def summary(self):
+        """지터/소요시간 요약"""
+        if not self.jitters:
+            return {'runs': 0, 'missed': self.missed, 'skipped': self.skipped}
+        jitters = sorted(self.jitters)
+        p95 = jitters[min(len(jitters) - 1, int(len(jitters) * 0.95))]
+        return {
+            'runs': self.runs,
+            'missed': self.missed,
+            'skipped': self.skipped,
+            'jitter_avg': sum(jitters) / len(jitters),
+            'jitter_p95': p95,
+            'jitter_max': jitters[-1],
+            'duration_avg': sum(self.durations) / len(self.durations),
+            'duration_max': max(self.durations),
+        }
+
+
+class PeriodicTask:
+    def __init__(self, name, func, intervals, deadline=None):
+        """
+        구간별 주기 작업
+        intervals: {구간명: 주기(초)} - 없는 구간에서는 실행하지 않음
+        deadline: 예정 시각 이후 허용 지연 (초, 기본 주기의 절반)
+        """
+        self.name = name
+        self.func = func
+        self.intervals = intervals
+        self.deadline = deadline
+        self.next_run = None
+        self.stats = TaskStats()
+
+    def interval(self, phase):
+        return self.intervals.get(phase)
+
+    def due(self, now, phase):
+        interval = self.interval(phase)
+        if interval is None:
+            return None
+        if self.next_run is None:
+            return now
+        return self.next_run
+
+
+class DeadlineTask:
+    def __init__(self, name, func, at, catch_up=True, grace=None, retry_delay=None):
+        """
+        하루 한 번 정해진 시각에 실행하는 작업
+        at: 'HHMM' 실행 시각
+        catch_up: 시각을 놓쳤을 때(지연/재시작) 즉시 실행할지 여부
+        grace: 놓친 작업을 따라잡을 수 있는 최대 지연 (초, None이면 당일 내내)
+        retry_delay: 작업이 예외로 끝나면 이 시간 후 다시 실행 (초, grace 안에서만 - None이면 재시도 없음)
+        """
+        self.name = name
+        self.func = func
+        self.at = at
+        self.catch_up = catch_up
+        self.grace = grace
+        self.retry_delay = retry_delay
+        self.retry_at = 0
+        self.failures = 0
+        self.last_run_day = None
+        self.stats = TaskStats()
+
+    def scheduled(self, now):
+        """당일 예정 시각"""
+        t = time.localtime(now)
+        midnight = time.mktime((t.tm_year, t.tm_mon, t.tm_mday, 0, 0, 0, 0, 0, -1))
+        return midnight + hhmm_to_seconds(self.at)
+
+    def due(self, now, phase):
+        day = time.strftime("%Y%m%d", time.localtime(now))
+        if self.last_run_day == day:
+            return None
+        return max(self.scheduled(now), self.retry_at)
+
+
+class SessionScheduler:
+    def __init__(self, phases=None, clock=time.time, resolution=0.2):
+        """
+        장 운영 구간 기반 스케줄러
+        phases: [(구간명, 시작 HHMM, 종료 HHMM)] - 기본 DEFAULT_PHASES
+        clock: 현재 시각 함수 (리플레이/시뮬레이션 시 가상 시계 주입)
+        resolution: 타이머 점검 주기 (초)
+        """
+        self.phases = phases or DEFAULT_PHASES
+        self.clock = clock
+        self.resolution = resolution
+        self.tasks = []
+        self.phase_handlers = {}  # {구간명: [콜백]}
+        self.current_phase = None
+        self.timer = None
+        self._in_tick = False
+        self.reentered = 0  # 작업 실행 중 (중첩 이벤트 루프에서) 들어온 틱 수
+        self.profiler = None  # IterationProfiler (설정 시 작업 실행마다 측정)
+
+    def phase_at(self, now):
+        """시각에 해당하는 구간명 (장 외 시간은 None)"""
+        sec = seconds_since_midnight(now)
+        for name, start, end in self.phases:
+            if hhmm_to_seconds(start) <= sec < hhmm_to_seconds(end):
+                return name
+        return None
+
+    def add_periodic(self, name, func, intervals, deadline=None):
+        """구간별 주기 작업 등록"""
+        task = PeriodicTask(name, func, intervals, deadline)
+        self.tasks.append(task)
+        return task
+
+    def add_deadline(self, name, func, at, catch_up=True, grace=None, retry_delay=None):
+        """정해진 시각 작업 등록"""
+        task = DeadlineTask(name, func, at, catch_up, grace, retry_delay)
+        self.tasks.append(task)
+        return task
+
+    def on_phase_enter(self, phase, func):
+        """구간 진입 시 콜백 등록"""
+        self.phase_handlers.setdefault(phase, []).append(func)
+
+    def preempt_requested(self):
+        """정시 작업이 밀려 있는지 여부 - 긴 작업은 루프 중간에 확인하고 양보"""
+        now = self.clock()
+        for task in self.tasks:
+            if isinstance(task, DeadlineTask):
+                scheduled = task.due(now, None)
+                if scheduled is not None and scheduled <= now:
+                    return True
+        return False
+
+    def next_due(self, now=None):
+        """다음 실행 예정 시각 (리플레이 시 가상 시계 진행용)"""
+        if now is None:
+            now = self.clock()
+        phase = self.phase_at(now)
+        due_times = [t.due(now, phase) for t in self.tasks]
+        due_times = [d for d in due_times if d is not None]
+        next_phase = self._next_phase_start(now)
+        if next_phase is not None:
+            due_times.append(next_phase)
+        return min(due_times) if due_times else None
+
+    def _next_phase_start(self, now):
+        sec = seconds_since_midnight(now)
+        starts = [hhmm_to_seconds(start) for _, start, _ in self.phases]
+        upcoming = [s for s in starts if s > sec]
+        if not upcoming:
+            return None
+        return now + (min(upcoming) - sec)
+
+    def tick(self, now=None):
+        """예정된 작업 실행 (타이머에서 주기적으로 호출)"""
+        if self._in_tick:
+            # TR 대기 중인 중첩 이벤트 루프에서 다시 불린 경우 - 다음 틱에서 처리
+            self.reentered += 1
+            return
+        self._in_tick = True
+        try:
+            if now is None:
+                now = self.clock()
+            phase = self.phase_at(now)
+            if phase != self.current_phase:
+                self.current_phase = phase
+                print(f"\n[스케줄러] 구간 전환: {phase or '장외'} ({time.strftime('%H:%M:%S', time.localtime(now))})")
+                for handler in self.phase_handlers.get(phase, []):
+                    self._call(handler)
+
+            # 정시 작업을 주기 작업보다 먼저 처리
+            for task in self.tasks:
+                if isinstance(task, DeadlineTask):
+                    self._run_deadline(task, now, phase)
+            for task in self.tasks:
+                if isinstance(task, PeriodicTask):
+                    self._run_periodic(task, phase)
+        finally:
+            self._in_tick = False
+
+    def _run_periodic(self, task, phase):
+        now = self.clock()
+        interval = task.interval(phase)
+        if interval is None:
+            task.next_run = None
+            return
+        scheduled = task.due(now, phase)
+        if now < scheduled:
+            return
+
+        lateness = now - scheduled
+        deadline = task.deadline if task.deadline is not None else interval / 2
+        if lateness > deadline:
+            task.stats.missed += 1
+        started = self.clock()
+        self._call(task.func, task.name)
+        finished = self.clock()
+        task.stats.record(started - scheduled, finished - started)
+
+        # 따라잡기: 실행 중 놓친 주기는 마지막 한 번으로 합쳐 다음 틱에 즉시 실행
+        next_run = scheduled + interval
+        if next_run <= finished:
+            missed_slots = int((finished - scheduled) // interval)
+            task.stats.skipped += missed_slots - 1
+            next_run = scheduled + missed_slots * interval
+        task.next_run = next_run
+
+    def _run_deadline(self, task, now, phase):
+        due = task.due(now, phase)
+        if due is None or now < due:
+            return
+        scheduled = task.scheduled(now)
+        day = time.strftime("%Y%m%d", time.localtime(now))
+        lateness = now - scheduled
+        retry = task.failures > 0
+        if lateness > self.resolution * 5:
+            if not retry:
+                task.stats.missed += 1
+            late_ok = (task.catch_up or retry) and (task.grace is None or lateness <= task.grace)
+            if not late_ok:
+                print(f"[스케줄러] {task.name} 실행 시각 경과 ({lateness:.0f}초) - 건너뜀")
+                task.last_run_day = day
+                task.failures = 0
+                return
+            print(f"[스케줄러] {task.name} {'재시도' if retry else '지연 실행'} ({lateness:.1f}초 늦음)")
+        task.last_run_day = day
+        started = self.clock()
+        ok = self._call(task.func, task.name)
+        finished = self.clock()
+        task.stats.record(started - scheduled, finished - started)
+        if ok:
+            task.failures = 0
+        elif task.retry_delay is not None:
+            # 실행 기록을 남기지 않고 retry_delay 후 다시 실행 (grace가 지나면 건너뜀)
+            task.failures += 1
+            task.last_run_day = None
+            task.retry_at = finished + task.retry_delay
+            print(f"[스케줄러] {task.name} 실패 {task.failures}회 - {task.retry_delay:.0f}초 후 재시도")
+
+    def _call(self, func, name=None):
+        """작업 실행 → 성공 여부 (예외는 출력만 하고 다른 작업은 계속)"""
+        try:
+            if self.profiler is not None and name is not None:
+                with self.profiler.iteration(name):
+                    func()
+            else:
+                func()
+            return True
+        except Exception as e:
+            print(f"[스케줄러] 작업 오류 ({getattr(func, '__name__', func)}): {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    def start(self):
+        """Qt 타이머로 스케줄러 시작 (QApplication 이벤트 루프 필요)"""
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(int(self.resolution * 1000))
+        self.tick()
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.stop()
+            self.timer = None
+
+    def report(self):
+        """작업별 지터/지연 통계 출력"""
+        print("\n[스케줄러 통계]")
+        for task in self.tasks:
+            s = task.stats.summary()
+            if s['runs']:
+                print(f"  {task.name}: 실행 {s['runs']}회, 지연초과 {s['missed']}회, 건너뜀 {s['skipped']}회, "
+                      f"지터 평균 {s['jitter_avg'] * 1000:.0f}ms / p95 {s['jitter_p95'] * 1000:.0f}ms / "
+                      f"최대 {s['jitter_max'] * 1000:.0f}ms, 소요 최대 {s['duration_max']:.1f}초")
+            else:
+                print(f"  {task.name}: 실행 없음 (지연초과 {s['missed']}회)")
+        if self.reentered:
+            print(f"  중첩 틱 무시: {self.reentered}회")
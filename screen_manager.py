@@ -0,0 +1,154 @@
+# 키움 제한: 화면번호 최대 200개, 화면당 실시간 등록 종목 최대 100개
+MAX_SCREENS = 200
+MAX_CODES_PER_SCREEN = 100
+
+# 용도별 화면번호 범위 (시작, 개수) - 합계가 MAX_SCREENS를 넘지 않도록 배분
+DEFAULT_POOLS = {
+    'tr': (1000, 40),         # TR 조회 (요청 중에만 점유)
+    'order': (2000, 20),      # 주문 (순환 사용 - 한 번 쓴 번호는 반납하지 않고 계속 점유)
+    'real': (3000, 130),      # 실시간 시세 등록
+    'condition': (4000, 10),  # 조건검색
+}
+
+
+class ScreenExhausted(Exception):
+    """용도별 화면번호가 모두 사용 중"""
+    pass
+
+
+class ScreenManager:
+    def __init__(self, api, pools=None):
+        """
+        화면번호 관리자
+        api: KiwoomAPI (실시간 해제/연결 끊기 호출용)
+        pools: {용도: (시작번호, 개수)}
+        """
+        self.api = api
+        self.pools = pools or DEFAULT_POOLS
+        if sum(count for _, count in self.pools.values()) > MAX_SCREENS:
+            raise ValueError(f"화면번호 합계가 {MAX_SCREENS}개를 넘습니다")
+        self.free = {}
+        for purpose, (start, count) in self.pools.items():
+            self.free[purpose] = [f"{n:04d}" for n in range(start, start + count)]
+        self.in_use = {}          # {화면번호: 용도}
+        self.order_cursor = 0
+        self.order_sent = 0       # 주문 화면번호 발급 횟수
+        self.real_screens = {}    # {그룹: [화면번호]} - 등록 순서 유지
+        self.screen_codes = {}    # {화면번호: set(종목코드)}
+        self.code_screens = {}    # {(그룹, 종목코드): 화면번호}
+        self.peak_in_use = 0
+
+    def acquire(self, purpose):
+        """용도별 화면번호 할당 (가장 오래전에 반납된 번호부터)"""
+        free = self.free[purpose]
+        if not free:
+            raise ScreenExhausted(f"{purpose} 화면번호 부족 ({self.pools[purpose][1]}개 모두 사용 중)")
+        screen = free.pop(0)
+        self.in_use[screen] = purpose
+        self.peak_in_use = max(self.peak_in_use, self.used())
+        return screen
+
+    def release(self, screen):
+        """화면번호 반납 - 실시간 등록 해제 또는 TR 연결 끊기"""
+        purpose = self.in_use.pop(screen, None)
+        if purpose is None:
+            return
+        if purpose == 'real':
+            self.api.set_real_remove(screen, "ALL")
+        else:
+            self.api.disconnect_real_data(screen)
+        self.free[purpose].append(screen)
+
+    def order_screen(self):
+        """주문용 화면번호 (순환 사용)"""
+        start, count = self.pools['order']
+        screen = f"{start + self.order_cursor:04d}"
+        self.order_cursor = (self.order_cursor + 1) % count
+        self.order_sent += 1
+        self.peak_in_use = max(self.peak_in_use, self.used())
+        return screen
+
+    def order_screens_used(self):
+        """한 번이라도 쓴 주문 화면번호 수 (순환하므로 풀 크기까지)"""
+        return min(self.order_sent, self.pools['order'][1])
+
+    def used(self):
+        """사용 중인 화면번호 수 - 할당된 번호 + 쓴 주문 화면번호"""
+        return len(self.in_use) + self.order_screens_used()
+
+    def register_real(self, codes, fids, group='trade'):
+        """
+        실시간 시세 등록 - 화면당 최대 종목 수까지 채워서 등록
+        group: 같은 FID 목록을 쓰는 등록 묶음 (예: 'trade' 체결, 'hoga' 호가)
+        """
+        new_codes = [code for code in dict.fromkeys(codes) if (group, code) not in self.code_screens]
+        screens = self.real_screens.setdefault(group, [])
+        while new_codes:
+            screen = None
+            for candidate in screens:
+                if len(self.screen_codes[candidate]) < MAX_CODES_PER_SCREEN:
+                    screen = candidate
+                    break
+            if screen is None:
+                screen = self.acquire('real')
+                screens.append(screen)
+                self.screen_codes[screen] = set()
+            room = MAX_CODES_PER_SCREEN - len(self.screen_codes[screen])
+            batch, new_codes = new_codes[:room], new_codes[room:]
+            # 화면의 첫 등록은 '0'(새로 등록), 이후는 '1'(추가 등록)
+            opt_type = "0" if not self.screen_codes[screen] else "1"
+            self.api.set_real_reg(screen, ";".join(batch), fids, opt_type)
+            for code in batch:
+                self.screen_codes[screen].add(code)
+                self.code_screens[(group, code)] = screen
+
+    def unregister_real(self, codes, group='trade'):
+        """실시간 시세 해제 - 빈 화면은 반납"""
+        for code in codes:
+            screen = self.code_screens.pop((group, code), None)
+            if screen is None:
+                continue
+            self.screen_codes[screen].discard(code)
+            if self.screen_codes[screen]:
+                self.api.set_real_remove(screen, code)
+            else:
+                del self.screen_codes[screen]
+                self.real_screens[group].remove(screen)
+                self.release(screen)
+
+    def unregister_all(self, group=None):
+        """그룹(없으면 전체)의 실시간 등록 해제"""
+        groups = [group] if group else list(self.real_screens)
+        for name in groups:
+            for screen in self.real_screens.pop(name, []):
+                for code in self.screen_codes.pop(screen, set()):
+                    self.code_screens.pop((name, code), None)
+                self.release(screen)
+
+    def is_registered(self, code, group='trade'):
+        return (group, code) in self.code_screens
+
+    def registered_codes(self, group='trade'):
+        return [code for (name, code) in self.code_screens if name == group]
+
+    def utilization(self):
+        """화면번호/실시간 등록 사용 현황"""
+        usage = {}
+        for purpose, (start, count) in self.pools.items():
+            used = count - len(self.free[purpose])
+            usage[purpose] = {'used': used, 'total': count}
+        usage['order'] = {'used': self.order_screens_used(), 'total': self.pools['order'][1], 'sent': self.order_sent}
+        real_screens = [screen for screens in self.real_screens.values() for screen in screens]
+        real_codes = sum(len(self.screen_codes[screen]) for screen in real_screens)
+        usage['real']['codes'] = real_codes
+        usage['real']['fill'] = real_codes / (len(real_screens) * MAX_CODES_PER_SCREEN) if real_screens else 0.0
+        usage['total'] = {'used': self.used(), 'total': MAX_SCREENS, 'peak': self.peak_in_use}
+        return usage
+
+    def report(self):
+        usage = self.utilization()
+        print(f"[화면번호] 사용 {usage['total']['used']}/{MAX_SCREENS} (최대 {usage['total']['peak']}), "
+              f"TR {usage['tr']['used']}/{usage['tr']['total']}, "
+              f"주문 {usage['order']['used']}/{usage['order']['total']} ({usage['order']['sent']:,}건 순환), "
+              f"실시간 {usage['real']['used']}/{usage['real']['total']}화면 "
+              f"{usage['real']['codes']}종목 (채움률 {usage['real']['fill'] * 100:.0f}%)")
@@ -0,0 +1,91 @@
+"""
+전략 신호 계산 캐시
+
+같은 종목의 같은 일봉으로 전략 계산(get_buy_signal_price, check_buy_signal)을 반복하지 않도록
+결과를 (전략 파라미터, 메서드, 종목코드, 마지막 봉 일자, 가격 버전) 키로 보관합니다.
+    가격 버전: (종목별 실시간 체결 수신 횟수, 마지막 봉 종가, 마지막 봉 거래량)
+    - 새 봉이 생기면 마지막 봉 일자가, 장중 조회로 오늘 봉이 바뀌면 종가/거래량이 달라져 자동으로 새 키
+    - 실시간 체결이 들어오면 해당 종목 버전이 올라가 이전 결과는 더 이상 조회되지 않음
+보관 개수를 넘으면 가장 오래 조회되지 않은 결과부터 버립니다 (LRU).
+캐시 조회/저장은 메인 스레드에서만 하고, 계산만 작업 스레드에 맡길 수 있습니다 (runner).
+"""
+from collections import OrderedDict
+
+
+class SignalCache:
+    def __init__(self, maxsize=4096):
+        """
+        전략 신호 계산 캐시
+        maxsize: 보관할 최대 결과 수
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # {키: 결과} - 최근 조회가 뒤쪽
+        self.versions = {}  # {종목코드: 실시간 체결 수신 횟수}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def strategy_key(strategy):
+        """전략 종류 + 파라미터 (파라미터를 바꾸면 다른 키)"""
+        return (type(strategy),) + tuple(vars(strategy).values())
+
+    def key(self, strategy, method, code, daily_data):
+        last = daily_data[0] if daily_data else None
+        if last is None:
+            return None
+        return (self.strategy_key(strategy), method, code, last[0], len(daily_data),
+                self.versions.get(code, 0), last[4], last[5])
+
+    def call(self, strategy, method, code, daily_data, runner=None):
+        """
+        strategy.method(daily_data) 결과 (같은 키로 계산한 적이 있으면 저장된 결과)
+        runner: 계산 실행 함수 runner(func, daily_data) (예: ComputePool.run - 기본은 직접 호출)
+        """
+        key = self.key(strategy, method, code, daily_data)
+        entries = self.entries
+        if key is not None and key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        self.misses += 1
+        func = getattr(strategy, method)
+        value = runner(func, daily_data) if runner is not None else func(daily_data)
+        if key is not None:
+            entries[key] = value
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_buy_signal_price(self, strategy, code, daily_data, runner=None):
+        return self.call(strategy, 'get_buy_signal_price', code, daily_data, runner)
+
+    def check_buy_signal(self, strategy, code, daily_data, runner=None):
+        return self.call(strategy, 'check_buy_signal', code, daily_data, runner)
+
+    def invalidate(self, code=None):
+        """종목(또는 전체) 결과 무효화 - 버전을 올려 이전 키가 조회되지 않게 함 (남은 항목은 LRU로 정리)"""
+        if code is None:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            return
+        self.versions[code] = self.versions.get(code, 0) + 1
+        self.invalidations += 1
+
+    def on_real_data(self, code, real_type, data):
+        """KiwoomAPI.real_data_handlers 콜백 - 체결 틱이 오면 종목 버전 증가"""
+        if real_type == "주식체결":
+            self.versions[code] = self.versions.get(code, 0) + 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self.entries), 'evictions': self.evictions, 'invalidations': self.invalidations}
+
+    def report(self):
+        stats = self.stats()
+        print(f"[신호 캐시] 조회 {stats['hits'] + stats['misses']:,}건, 적중 {stats['hits']:,}건 "
+              f"({stats['hit_rate'] * 100:.1f}%), 보관 {stats['size']:,}/{self.maxsize:,}건, "
+              f"LRU 제거 {stats['evictions']:,}건, 무효화 {stats['invalidations']:,}건")
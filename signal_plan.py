@@ -0,0 +1,244 @@
+"""
+장전 매수 신호 계획
+
+장 시작 전에 종목별로 전일까지의 일봉만으로 매수 조건을 가격 기준으로 바꿔 둡니다.
+장중에는 실시간 체결 틱마다 미리 계산한 정수 가격과 비교만 합니다.
+    변동성 돌파: 시가 + 전일 변동폭 × K 이상 (시가 확인 후 계산), 누적거래량 ≥ 전일 거래량 × 배수
+    볼린저밴드: 현재가를 마지막 종가로 넣은 중간값 이상, 상단 이하가 되는 가격 구간
+    RSI: 전일 RSI가 과매도 이하일 때, 현재가를 넣은 RSI가 과매도를 넘는 최저 가격
+    단타: 전일 종가 × (1 + 상승률) 이상, 누적거래량 × 현재가 > 거래대금 기준
+가격 구간은 분수로 정확히 계산한 뒤 호가 단위로 맞춥니다.
+"""
+from fractions import Fraction
+
+from indicators import rsi
+from strategy import BollingerBandStrategy, RSIStrategy, ScalpingStrategy, VolatilityBreakoutStrategy
+from ticks import ceil_to_tick, floor_to_tick
+
+
+def ceil_fraction(value):
+    return -(-value.numerator // value.denominator)
+
+
+def max_satisfying(lo, predicate):
+    """predicate(lo)가 참일 때, 참을 유지하는 최대 정수 (계속 참이면 None)"""
+    step = max(lo, 1)
+    hi = lo + step
+    while predicate(hi):
+        step *= 2
+        hi = lo + step
+        if hi > 10 ** 9:
+            return None
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if predicate(mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def min_satisfying(hi, predicate):
+    """predicate(hi)가 참일 때, 참이 되는 최소 양의 정수"""
+    lo = 0
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if predicate(mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+class SignalPlan:
+    def __init__(self, code, kind, date):
+        self.code = code
+        self.kind = kind
+        self.date = date
+        self.trigger_price = None  # 이 가격 이상이면 신호 (변동성 돌파는 시가 확인 후 계산)
+        self.upper_price = None    # 이 가격 이하일 때만 신호 (볼린저 상단, None이면 제한 없음)
+        self.range_k = None        # 변동성 돌파: 전일 변동폭 × K
+        self.min_volume = 0        # 누적거래량 하한
+        self.min_amount = 0        # 누적거래량 × 현재가 하한 (초과해야 신호)
+        self.active = True         # False면 오늘은 신호 없음 (전일 RSI 조건 미충족 등)
+        self.fired = False
+
+    def set_open(self, open_price):
+        """시가 확인 - 변동성 돌파 가격 확정"""
+        self.trigger_price = ceil_to_tick(ceil_fraction(open_price + self.range_k))
+
+    def check(self, price, high, cum_volume):
+        """매수 조건 (정수 비교만)"""
+        level = high if self.kind == "breakout" else price
+        if self.trigger_price is None or level < self.trigger_price:
+            return False
+        if self.upper_price is not None and price > self.upper_price:
+            return False
+        if cum_volume < self.min_volume:
+            return False
+        return not self.min_amount or price * cum_volume > self.min_amount
+
+    def describe(self):
+        if not self.active:
+            return "오늘 신호 없음"
+        if self.trigger_price is None:
+            return f"시가 + {float(self.range_k):,.0f}원 이상"
+        text = f"{self.trigger_price:,}원 이상"
+        if self.upper_price is not None:
+            text += f", {self.upper_price:,}원 이하"
+        return text
+
+
+def plan_breakout(strategy, code, history, date):
+    """변동성 돌파 - K는 전일까지 10일 평균 변동폭 대비 전일 변동폭으로 결정"""
+    if len(history) < 2:
+        return None
+    plan = SignalPlan(code, "breakout", date)
+    yesterday = history[0]
+    recent = history[:10]
+    avg_range = sum(row[2] - row[3] for row in recent) / len(recent)
+    k = strategy.k_for_ranges(yesterday[2] - yesterday[3], avg_range) if len(history) >= 10 else strategy.k_ratio
+    plan.range_k = (yesterday[2] - yesterday[3]) * Fraction(str(k))
+    plan.min_volume = ceil_fraction(yesterday[5] * Fraction(str(strategy.volume_multiplier)))
+    return plan
+
+
+def plan_bollinger(strategy, code, history, date):
+    """볼린저밴드 - 현재가 p를 마지막 종가로 넣었을 때 중간값 <= p <= 상단인 가격 구간"""
+    n = strategy.period
+    if len(history) < n:
+        return None
+    others = [row[4] for row in history[:n - 1]]
+    total = sum(others)
+    square_total = sum(price * price for price in others)
+    k2 = Fraction(str(strategy.std_dev)) ** 2
+
+    def below_upper(p):
+        # (p - 중간값)^2 <= k^2 * 분산 (양변에 n^2을 곱한 정수식)
+        return ((n - 1) * p - total) ** 2 <= k2 * (n * (square_total + p * p) - (total + p) ** 2)
+
+    plan = SignalPlan(code, "bollinger", date)
+    low = ceil_fraction(Fraction(total, n - 1))  # 중간값 <= p
+    if not below_upper(low):
+        plan.active = False
+        return plan
+    upper = max_satisfying(low, below_upper)
+    plan.trigger_price = ceil_to_tick(low)
+    plan.upper_price = floor_to_tick(upper) if upper is not None else None
+    if plan.upper_price is not None and plan.upper_price < plan.trigger_price:
+        plan.active = False
+    return plan
+
+
+def plan_rsi(strategy, code, history, date):
+    """RSI - 전일 RSI가 과매도 이하이면, 현재가를 넣은 RSI가 과매도를 넘는 최저 가격"""
+    n = strategy.period
+    if len(history) < n + 1:
+        return None
+    plan = SignalPlan(code, "rsi", date)
+    closes = [row[4] for row in reversed(history[:n + 1])]
+    prev_rsi = rsi(closes, n)
+    if prev_rsi is None or prev_rsi > strategy.oversold or strategy.oversold >= 100:
+        plan.active = False
+        return plan
+    base = closes[-n:]
+    gain = sum(max(b - a, 0) for a, b in zip(base, base[1:]))
+    loss = sum(max(a - b, 0) for a, b in zip(base, base[1:]))
+    ratio = Fraction(str(strategy.oversold)) / (100 - Fraction(str(strategy.oversold)))
+    min_loss = Fraction("0.0001") * n  # 하락폭 평균이 0이면 0.0001로 대체 (indicators.rsi와 동일)
+
+    def above_oversold(p):
+        delta = p - base[-1]
+        p_gain = gain + max(delta, 0)
+        p_loss = loss + max(-delta, 0) or min_loss
+        return p_gain > ratio * p_loss
+
+    hi = base[-1]
+    while not above_oversold(hi):
+        hi *= 2
+    plan.trigger_price = ceil_to_tick(min_satisfying(hi, above_oversold))
+    return plan
+
+
+def plan_scalping(strategy, code, history, date):
+    """단타 - 전일 종가 대비 상승률 이상, 거래대금 기준 초과"""
+    if len(history) < 2:
+        return None
+    plan = SignalPlan(code, "scalping", date)
+    target = history[0][4] * (100 + Fraction(str(strategy.price_change_threshold))) / 100
+    plan.trigger_price = ceil_to_tick(ceil_fraction(target))
+    plan.min_amount = strategy.volume_threshold
+    return plan
+
+
+PLANNERS = {
+    VolatilityBreakoutStrategy: plan_breakout,
+    BollingerBandStrategy: plan_bollinger,
+    RSIStrategy: plan_rsi,
+    ScalpingStrategy: plan_scalping,
+}
+
+
+class SignalPlanner:
+    def __init__(self, strategy):
+        """
+        종목별 매수 신호 계획 관리
+        strategy: 매매 전략 객체 (PLANNERS에 등록된 종류)
+        """
+        self.strategy = strategy
+        self.plans = {}         # {종목코드: SignalPlan}
+        self.live = set()       # 실시간 체결을 받은 종목 (틱으로 평가)
+        self.trigger_handlers = []  # 콜백(code, price) → 주문하면 True (이후 같은 날 재발동 안 함)
+        self.ticks = 0
+
+    def make(self, code, daily_data, date):
+        """
+        일봉(최신순, KiwoomAPI.get_daily_data 형식)으로 오늘 계획 계산 (상태 변경 없음 - 작업 스레드에서 호출 가능)
+        date: 오늘 일자 (YYYYMMDD) - 오늘 봉은 계획에서 제외
+        """
+        history = [row for row in daily_data or [] if row[0] < date]
+        planner = PLANNERS.get(type(self.strategy))
+        return planner(self.strategy, code, history, date) if planner else None
+
+    def store(self, code, plan):
+        if plan is None:
+            self.plans.pop(code, None)
+        else:
+            self.plans[code] = plan
+        return plan
+
+    def build(self, code, daily_data, date):
+        return self.store(code, self.make(code, daily_data, date))
+
+    def clear(self):
+        self.plans.clear()
+        self.live.clear()
+
+    def on_real_data(self, code, real_type, data):
+        """KiwoomAPI.real_data_handlers 콜백 - 체결 틱마다 계획 가격과 비교"""
+        if real_type != "주식체결":
+            return
+        plan = self.plans.get(code)
+        if plan is None:
+            return
+        self.live.add(code)
+        self.ticks += 1
+        self.evaluate(plan, data['open'], data['price'], data['high'], data['cum_volume'])
+
+    def on_bar(self, code, row):
+        """실시간 체결이 없는 종목 - 오늘 일봉 [일자, 시가, 고가, 저가, 현재가, 거래량]으로 평가"""
+        plan = self.plans.get(code)
+        if plan is not None and row[0] == plan.date:
+            self.evaluate(plan, row[1], row[4], row[2], row[5])
+
+    def evaluate(self, plan, open_price, price, high, cum_volume):
+        if plan.fired or not plan.active:
+            return
+        if plan.trigger_price is None:
+            if plan.range_k is None or open_price <= 0:
+                return
+            plan.set_open(open_price)
+        if plan.check(price, high, cum_volume):
+            for handler in self.trigger_handlers:
+                if handler(plan.code, price):
+                    plan.fired = True
@@ -1,5 +1,5 @@
-import numpy as np
-import pandas as pd
+import math
+from indicators import bollinger_bands, rsi
 
 
 class BollingerBandStrategy:
@@ -14,21 +14,8 @@ class BollingerBandStrategy:
         
     def calculate_bollinger_bands(self, prices):
         """볼린저밴드 계산"""
-        if len(prices) < self.period:
-            return None, None, None
-            
-        df = pd.DataFrame(prices, columns=['close'])
-        df['middle'] = df['close'].rolling(window=self.period).mean()
-        df['std'] = df['close'].rolling(window=self.period).std(ddof=0)  # 모집단 표준편차 사용
-        df['upper'] = df['middle'] + (df['std'] * self.std_dev)
-        df['lower'] = df['middle'] - (df['std'] * self.std_dev)
-        
-        # 마지막 유효한 값 반환
-        last_idx = df['lower'].last_valid_index()
-        if last_idx is not None:
-            return df['upper'].iloc[last_idx], df['middle'].iloc[last_idx], df['lower'].iloc[last_idx]
-        else:
-            return None, None, None
+        # 마지막 기간의 이동평균 ± 모집단 표준편차 * 배수
+        return bollinger_bands(prices, self.period, self.std_dev)
     
     def check_buy_signal(self, daily_data):
         """매수 신호 확인 - 중간값과 상단 사이에서 매수"""
@@ -67,7 +54,7 @@ class BollingerBandStrategy:
             # 볼린저밴드 계산
             upper, middle, lower = self.calculate_bollinger_bands(prices)
             
-            if middle and not pd.isna(middle):
+            if middle and not math.isnan(middle):
                 return int(middle)
             else:
                 return None
@@ -98,19 +85,8 @@ class RSIStrategy:
             return None
             
         try:
-            df = pd.DataFrame(prices, columns=['close'])
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=self.period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=self.period).mean()
-            
-            # 0으로 나누기 방지
-            loss = loss.replace(0, 0.0001)  # 아주 작은 값으로 대체
-            
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            
-            last_rsi = rsi.iloc[-1]
-            return last_rsi if not pd.isna(last_rsi) else None
+            # 하락폭 평균이 0이면 0.0001로 대체
+            return rsi(prices, self.period)
         except (ZeroDivisionError, ValueError, IndexError):
             return None
     
@@ -249,16 +225,19 @@ class VolatilityBreakoutStrategy:
             
             avg_range = sum(recent_ranges) / len(recent_ranges)
             yesterday_range = daily_data[1][2] - daily_data[1][3]
-            
-            # 변동성이 평균보다 클 때 K값 증가, 작을 때 감소
-            if yesterday_range > avg_range * 1.2:
-                return min(self.k_ratio * 0.7, 0.4)  # 변동성 클 때 낮게
-            elif yesterday_range < avg_range * 0.8:
-                return min(self.k_ratio * 1.3, 0.8)  # 변동성 작을 때 높게
-            else:
-                return self.k_ratio
+            return self.k_for_ranges(yesterday_range, avg_range)
         except:
             return self.k_ratio
+            
+    def k_for_ranges(self, yesterday_range, avg_range):
+        """전일 변동폭과 평균 변동폭으로 K값 결정"""
+        # 변동성이 평균보다 클 때 K값 증가, 작을 때 감소
+        if yesterday_range > avg_range * 1.2:
+            return min(self.k_ratio * 0.7, 0.4)  # 변동성 클 때 낮게
+        elif yesterday_range < avg_range * 0.8:
+            return min(self.k_ratio * 1.3, 0.8)  # 변동성 작을 때 높게
+        else:
+            return self.k_ratio
         
     def check_buy_signal(self, daily_data):
         """매수 신호 확인 - 개선된 변동성 돌파 + 거래량 필터"""
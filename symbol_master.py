@@ -0,0 +1,154 @@
+import json
+import os
+import time
+
+
+# GetCodeListByMarket 시장 구분
+MARKET_KOSPI = "0"
+MARKET_KOSDAQ = "10"
+
+
+def normalize_code(code):
+    """종목코드 정규화 - 공백 및 'A' 접두사 제거 ('A005930' -> '005930')"""
+    code = str(code).strip()
+    if len(code) == 7 and code[0] == 'A':
+        return code[1:]
+    return code
+
+
+class SymbolMaster:
+    def __init__(self, cache_dir="data"):
+        """
+        종목 마스터 (하루 한 번 생성, 당일 재시작 시 디스크 스냅샷에서 로드)
+        cache_dir: 스냅샷 저장 폴더 (None이면 스냅샷 없이 매번 생성 - OCX 기록/재생용)
+        """
+        self.cache_dir = cache_dir
+        self.date = None
+        self.codes = []          # 컬럼 배열 (인덱스로 접근)
+        self.names = []
+        self.markets = []
+        self.last_prices = []    # 전일 종가
+        self.listed_shares = []  # 상장주식수
+        self.constructions = []  # 감리구분 (정상, 투자주의 등)
+        self.index = {}          # {종목코드: 인덱스}
+        self.name_index = {}     # {종목명: 종목코드}
+        self.market_codes = {}   # {시장구분: [종목코드]}
+
+    def snapshot_path(self, date=None):
+        return os.path.join(self.cache_dir, f"symbol_master_{date or time.strftime('%Y%m%d')}.json")
+
+    def load_or_build(self, api, markets=(MARKET_KOSPI, MARKET_KOSDAQ)):
+        """당일 스냅샷이 있으면 로드, 없으면 API로 생성 후 저장"""
+        start = time.perf_counter()
+        if self.cache_dir is None:
+            self.build(api, markets)
+            print(f"종목 마스터 생성: {len(self.codes)}종목 ({time.perf_counter() - start:.1f}초)")
+            return self
+        path = self.snapshot_path()
+        if os.path.exists(path):
+            try:
+                self.load(path)
+                print(f"종목 마스터 로드: {len(self.codes)}종목 ({(time.perf_counter() - start) * 1000:.1f}ms)")
+                return self
+            except (ValueError, KeyError) as e:
+                print(f"종목 마스터 스냅샷 손상 - 다시 생성합니다: {e}")
+        self.build(api, markets)
+        self.save(path)
+        self._remove_old_snapshots(path)
+        print(f"종목 마스터 생성: {len(self.codes)}종목 ({time.perf_counter() - start:.1f}초)")
+        return self
+
+    def build(self, api, markets=(MARKET_KOSPI, MARKET_KOSDAQ)):
+        """API 마스터 조회로 생성 (TR 사용 없음)"""
+        columns = {'codes': [], 'names': [], 'markets': [], 'last_prices': [],
+                   'listed_shares': [], 'constructions': []}
+        for market in markets:
+            for code in api.get_code_list_by_market(market):
+                columns['codes'].append(code)
+                columns['names'].append(api.get_stock_name(code))
+                columns['markets'].append(market)
+                columns['last_prices'].append(api.get_master_last_price(code))
+                columns['listed_shares'].append(api.get_master_listed_stock_cnt(code))
+                columns['constructions'].append(api.get_master_construction(code))
+        self._set_columns(time.strftime('%Y%m%d'), columns)
+
+    def save(self, path):
+        """컬럼 형식 JSON 스냅샷 저장 (임시 파일에 쓴 뒤 교체)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {
+            'date': self.date,
+            'codes': self.codes,
+            'names': self.names,
+            'markets': self.markets,
+            'last_prices': self.last_prices,
+            'listed_shares': self.listed_shares,
+            'constructions': self.constructions,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._set_columns(data['date'], data)
+
+    def _set_columns(self, date, columns):
+        self.date = date
+        self.codes = columns['codes']
+        self.names = columns['names']
+        self.markets = columns['markets']
+        self.last_prices = columns['last_prices']
+        self.listed_shares = columns['listed_shares']
+        self.constructions = columns['constructions']
+        self.index = dict(zip(self.codes, range(len(self.codes))))
+        self.name_index = dict(zip(self.names, self.codes))
+        self.market_codes = {}
+        for code, market in zip(self.codes, self.markets):
+            self.market_codes.setdefault(market, []).append(code)
+
+    def _remove_old_snapshots(self, keep_path):
+        keep = os.path.basename(keep_path)
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith("symbol_master_") and filename != keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    pass
+
+    def __contains__(self, code):
+        return normalize_code(code) in self.index
+
+    def __len__(self):
+        return len(self.codes)
+
+    def name(self, code, default=""):
+        """종목명 조회"""
+        i = self.index.get(normalize_code(code))
+        return self.names[i] if i is not None else default
+
+    def code_of(self, name):
+        """종목명으로 종목코드 조회"""
+        return self.name_index.get(name)
+
+    def market(self, code):
+        i = self.index.get(normalize_code(code))
+        return self.markets[i] if i is not None else None
+
+    def last_price(self, code):
+        """전일 종가"""
+        i = self.index.get(normalize_code(code))
+        return self.last_prices[i] if i is not None else 0
+
+    def listed_share_count(self, code):
+        i = self.index.get(normalize_code(code))
+        return self.listed_shares[i] if i is not None else 0
+
+    def construction(self, code):
+        i = self.index.get(normalize_code(code))
+        return self.constructions[i] if i is not None else ""
+
+    def codes_by_market(self, market):
+        """시장별 종목코드 리스트"""
+        return self.market_codes.get(market, [])
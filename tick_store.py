@@ -0,0 +1,292 @@
+"""
+장중 틱 저장소
+
+실시간 체결(주식체결)을 일자/종목별 메모리 매핑 파일에 고정 크기 레코드로 이어 씁니다.
+    data/ticks/YYYYMMDD/종목코드.tick
+레이아웃:
+    헤더 64바이트: 매직, 버전, 레코드 크기, 기록 건수, 일자, 종목코드, 장 시가/고가/저가 (실시간 FID 16/17/18, 0이면 모름)
+    레코드 32바이트: 시각, 누적거래량, 현재가, 체결량(+매수/-매도 체결), 매수호가, 매도호가
+기록: 매핑된 메모리에 복사한 뒤 기록 건수를 갱신 (디스크 반영은 OS가 처리 - 이벤트 처리 중 동기 I/O 없음)
+      파일이 차면 두 배로 늘려 다시 매핑
+조회: INDEX_STRIDE 건마다 시각을 적어 둔 희소 인덱스로 구간을 좁힌 뒤 NumPy 구조화 배열로 읽음
+재시작: 오늘 파일을 다시 열어 기록 건수, 희소 인덱스, 당일 시가/고가/저가/현재가를 NumPy로 복원
+      시가/고가/저가는 헤더의 장 시가/고가/저가를 우선 사용 (첫 기록 틱은 장중 등록/늦은 시작이면 시가가 아님)
+      장 시가를 모르고 첫 기록이 장 시작 직후가 아니면 당일 봉을 만들지 않음 (조회 일봉 사용)
+"""
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+MAGIC = b"KWTK"
+VERSION = 1
+HEADER = struct.Struct('<4sIIQ8s8s')  # 매직, 버전, 레코드 크기, 기록 건수, 일자, 종목코드
+HEADER_SIZE = 64
+COUNT = struct.Struct('<Q')
+COUNT_OFFSET = 12
+SESSION = struct.Struct('<iii')       # 장 시가, 고가, 저가
+SESSION_OFFSET = HEADER.size
+RECORD = struct.Struct('<dqiiii')     # 시각, 누적거래량, 현재가, 체결량, 매수호가, 매도호가
+RECORD_DTYPE = np.dtype([('ts', '<f8'), ('cum_volume', '<i8'), ('price', '<i4'), ('volume', '<i4'),
+                         ('bid', '<i4'), ('ask', '<i4')])
+BAR_DTYPE = np.dtype([('ts', '<f8'), ('open', '<i4'), ('high', '<i4'), ('low', '<i4'), ('close', '<i4'),
+                      ('volume', '<i8')])
+INITIAL_CAPACITY = 4096  # 새 파일 레코드 수 (128KB)
+INDEX_STRIDE = 256       # 희소 인덱스 간격 (레코드 수)
+MARKET_OPEN = 9 * 3600   # 장 시작 (자정 기준 초)
+OPEN_GRACE = 10          # 첫 기록이 장 시작 후 이 시간 안이면 첫 틱을 시가로 인정 (초)
+
+
+class TickFile:
+    def __init__(self, path, code, date):
+        """종목 1개의 당일 틱 파일 (없으면 생성, 있으면 이어 쓰기)"""
+        self.path = path
+        self.code = code
+        exists = os.path.exists(path)
+        self.file = open(path, 'r+b' if exists else 'w+b')
+        if not exists:
+            self.file.truncate(HEADER_SIZE + INITIAL_CAPACITY * RECORD.size)
+        size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        if exists:
+            magic, version, record_size, count, _, _ = HEADER.unpack_from(self.mm, 0)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise ValueError(f"틱 파일 형식이 다릅니다: {path}")
+        else:
+            count = 0
+            HEADER.pack_into(self.mm, 0, MAGIC, VERSION, RECORD.size, 0, date.encode('ascii'), code.encode('ascii'))
+        self.capacity = (size - HEADER_SIZE) // RECORD.size
+        self.count = count
+        self.index = []  # INDEX_STRIDE 건마다 첫 레코드 시각
+        self.state = None  # [시가, 고가, 저가, 현재가, 누적거래량, 매수호가, 매도호가, 시각]
+        self.session = list(SESSION.unpack_from(self.mm, SESSION_OFFSET))  # [장 시가, 고가, 저가]
+        self.first_ts = None
+        if count:
+            self._rebuild()
+
+    def _records(self, start=0, stop=None):
+        """레코드 구간의 NumPy 뷰 (매핑 메모리 직접 참조 - 파일을 늘리기 전에 버려야 함)"""
+        stop = self.count if stop is None else stop
+        return np.frombuffer(self.mm, dtype=RECORD_DTYPE, count=stop - start,
+                             offset=HEADER_SIZE + start * RECORD.size)
+
+    def _rebuild(self):
+        records = self._records()
+        prices = records['price']
+        last = records[-1]
+        self.index = records['ts'][::INDEX_STRIDE].tolist()
+        self.first_ts = float(records['ts'][0])
+        self.state = [int(prices[0]), int(prices.max()), int(prices.min()), int(last['price']),
+                      int(last['cum_volume']), int(last['bid']), int(last['ask']), float(last['ts'])]
+        del records, prices, last
+        self._apply_session()
+
+    def _apply_session(self):
+        # 장 시가/고가/저가를 알면 기록 틱보다 우선 (기록 시작 전 체결 포함)
+        open_price, high, low = self.session
+        state = self.state
+        if open_price > 0:
+            state[0] = open_price
+        if high > state[1]:
+            state[1] = high
+        if 0 < low < state[2]:
+            state[2] = low
+
+    def open_known(self, open_ts):
+        """당일 시가를 믿을 수 있는지 - 장 시가를 기록했거나 첫 기록이 장 시작 직후"""
+        return self.session[0] > 0 or (self.first_ts is not None and self.first_ts <= open_ts + OPEN_GRACE)
+
+    def _grow(self):
+        # Windows는 매핑 중인 파일 크기를 바꿀 수 없으므로 매핑을 닫은 뒤 늘림
+        self.capacity *= 2
+        self.mm.close()
+        self.file.truncate(HEADER_SIZE + self.capacity * RECORD.size)
+        self.mm = mmap.mmap(self.file.fileno(), HEADER_SIZE + self.capacity * RECORD.size)
+
+    def append(self, ts, price, volume, cum_volume, bid, ask, open_price=0, high=0, low=0):
+        count = self.count
+        if count >= self.capacity:
+            self._grow()
+        if count % INDEX_STRIDE == 0:
+            self.index.append(ts)
+        RECORD.pack_into(self.mm, HEADER_SIZE + count * RECORD.size, ts, cum_volume, price, volume, bid, ask)
+        self.count = count + 1
+        # 레코드 기록 후 건수 갱신 (다른 프로세스는 건수까지만 읽음)
+        COUNT.pack_into(self.mm, COUNT_OFFSET, self.count)
+        session = self.session
+        if open_price > 0 and (open_price != session[0] or high != session[1] or low != session[2]):
+            session[0], session[1], session[2] = open_price, high, low
+            SESSION.pack_into(self.mm, SESSION_OFFSET, open_price, high, low)
+        state = self.state
+        if state is None:
+            self.first_ts = ts
+            self.state = [price, price, price, price, cum_volume, bid, ask, ts]
+            if session[0] > 0:
+                self._apply_session()
+            return
+        if open_price > 0:
+            state[0] = open_price
+            if high > state[1]:
+                state[1] = high
+            if 0 < low < state[2]:
+                state[2] = low
+        if price > state[1]:
+            state[1] = price
+        elif price < state[2]:
+            state[2] = price
+        state[3] = price
+        state[4] = cum_volume
+        state[5] = bid
+        state[6] = ask
+        state[7] = ts
+
+    def locate(self, ts):
+        """ts 이상인 첫 레코드 번호 (희소 인덱스로 INDEX_STRIDE 건 안으로 좁힌 뒤 이분 탐색)"""
+        block = bisect_left(self.index, ts)
+        start = max(block - 1, 0) * INDEX_STRIDE
+        stop = min(block * INDEX_STRIDE, self.count) if block < len(self.index) else self.count
+        if start >= stop:
+            return stop
+        position = int(np.searchsorted(self._records(start, stop)['ts'], ts, side='left'))
+        return start + position
+
+    def read(self, start=None, end=None):
+        """[start, end) 시각 구간 레코드 (복사본)"""
+        first = self.locate(start) if start is not None else 0
+        last = self.locate(end) if end is not None else self.count
+        return self._records(first, max(first, last)).copy()
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        if self.mm:
+            self.mm.flush()
+            self.mm.close()
+            self.file.close()
+            self.mm = None
+
+
+class TickStore:
+    def __init__(self, root="data/ticks", clock=time.time):
+        """
+        일자별 틱 저장소 (단일 기록 프로세스)
+        root: 저장 디렉터리 (그 아래 YYYYMMDD/종목코드.tick)
+        clock: 시각 함수 - 체결 수신 시각으로 기록 (재생/모의 실행은 가상 시계)
+        """
+        self.root = root
+        self.clock = clock
+        self.files = {}  # {종목코드: TickFile}
+        self.appended = 0
+        self.restored = 0
+        self.restore_seconds = 0.0
+        self.open_day(time.strftime("%Y%m%d", time.localtime(clock())))
+
+    def open_day(self, date):
+        """일자 전환 - 이전 파일을 닫고 오늘 디렉터리의 기존 파일을 다시 열어 상태 복원"""
+        self.close()
+        self.date = date
+        self.dir = os.path.join(self.root, date)
+        os.makedirs(self.dir, exist_ok=True)
+        self.day_start = time.mktime(time.strptime(date, "%Y%m%d"))
+        self.day_end = self.day_start + 86400
+        start = time.perf_counter()
+        for name in sorted(os.listdir(self.dir)):
+            if name.endswith(".tick"):
+                code = name[:-len(".tick")]
+                try:
+                    self.files[code] = TickFile(os.path.join(self.dir, name), code, date)
+                except ValueError as e:
+                    print(f"[틱 저장소] {e}")
+        self.restored = sum(f.count for f in self.files.values())
+        self.restore_seconds = time.perf_counter() - start
+        if self.restored:
+            print(f"[틱 저장소] {date} 기록 복원: {len(self.files)}종목 {self.restored:,}건 ({self.restore_seconds:.3f}초)")
+
+    def _file(self, code):
+        tick_file = self.files.get(code)
+        if tick_file is None:
+            tick_file = TickFile(os.path.join(self.dir, f"{code}.tick"), code, self.date)
+            self.files[code] = tick_file
+        return tick_file
+
+    def append(self, code, ts, price, volume, cum_volume, bid=0, ask=0, open_price=0, high=0, low=0):
+        """체결 1건 기록 (같은 종목은 시각 순으로 기록해야 함, open_price/high/low: 장 시가/고가/저가)"""
+        if ts >= self.day_end:
+            self.open_day(time.strftime("%Y%m%d", time.localtime(ts)))
+        self._file(code).append(ts, price, volume, cum_volume, bid, ask, open_price, high, low)
+        self.appended += 1
+
+    def on_real_data(self, code, real_type, data):
+        """KiwoomAPI.real_data_handlers 콜백 - 주식체결만 기록"""
+        if real_type == "주식체결":
+            self.append(code, self.clock(), data['price'], data['volume'] * data['side'], data['cum_volume'],
+                        data['bid'], data['ask'], data['open'], data['high'], data['low'])
+
+    def codes(self):
+        return list(self.files)
+
+    def count(self, code):
+        tick_file = self.files.get(code)
+        return tick_file.count if tick_file else 0
+
+    def state(self, code):
+        """당일 상태 {'open', 'high', 'low', 'price', 'cum_volume', 'bid', 'ask', 'ts'} - 기록이 없으면 None"""
+        tick_file = self.files.get(code)
+        if tick_file is None or tick_file.state is None:
+            return None
+        return dict(zip(('open', 'high', 'low', 'price', 'cum_volume', 'bid', 'ask', 'ts'), tick_file.state))
+
+    def day_bar(self, code):
+        """
+        오늘 일봉 [일자, 시가, 고가, 저가, 현재가, 누적거래량] (KiwoomAPI.get_daily_data 행 형식)
+        기록이 없거나 시가를 알 수 없으면 (장 시가 미기록 + 장 시작 후 기록 시작) None - 조회 일봉 사용
+        """
+        tick_file = self.files.get(code)
+        if tick_file is None or tick_file.state is None or not tick_file.open_known(self.day_start + MARKET_OPEN):
+            return None
+        state = tick_file.state
+        return [self.date, state[0], state[1], state[2], state[3], state[4]]
+
+    def read(self, code, start=None, end=None):
+        """[start, end) 시각 구간 체결 (RECORD_DTYPE 구조화 배열, 복사본)"""
+        tick_file = self.files.get(code)
+        if tick_file is None:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return tick_file.read(start, end)
+
+    def resample(self, code, seconds=60, start=None, end=None):
+        """seconds 초 단위 봉 (BAR_DTYPE 구조화 배열, 체결이 없는 구간은 생략)"""
+        records = self.read(code, start, end)
+        if len(records) == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        buckets = (records['ts'] // seconds).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(records)] - 1
+        prices = records['price']
+        bars = np.empty(len(starts), dtype=BAR_DTYPE)
+        bars['ts'] = buckets[starts] * seconds
+        bars['open'] = prices[starts]
+        bars['high'] = np.maximum.reduceat(prices, starts)
+        bars['low'] = np.minimum.reduceat(prices, starts)
+        bars['close'] = prices[ends]
+        bars['volume'] = np.add.reduceat(np.abs(records['volume']).astype(np.int64), starts)
+        return bars
+
+    def flush(self):
+        for tick_file in self.files.values():
+            tick_file.flush()
+
+    def close(self):
+        for tick_file in self.files.values():
+            tick_file.close()
+        self.files = {}
+
+    def report(self):
+        total = sum(f.count for f in self.files.values())
+        size = sum(HEADER_SIZE + f.capacity * RECORD.size for f in self.files.values())
+        print(f"[틱 저장소] {self.date}: {len(self.files)}종목 {total:,}건 (이번 실행 {self.appended:,}건, "
+              f"재시작 복원 {self.restored:,}건/{self.restore_seconds:.3f}초), 파일 {size / 1024 / 1024:.1f}MB")
@@ -0,0 +1,46 @@
+import math
+
+# 호가 단위 (가격 상한, 단위) - 상한 미만 가격에 적용
+TICK_TABLE = [
+    (1000, 1),
+    (5000, 5),
+    (10000, 10),
+    (50000, 50),
+    (100000, 100),
+    (500000, 500),
+]
+TOP_TICK = 1000
+
+
+def tick_size(price):
+    """가격대별 호가 단위"""
+    for limit, tick in TICK_TABLE:
+        if price < limit:
+            return tick
+    return TOP_TICK
+
+
+def floor_to_tick(price):
+    """호가 단위로 내림 (price 이하의 가장 높은 호가)"""
+    tick = tick_size(price)
+    return int(math.floor(price / tick) * tick)
+
+
+def ceil_to_tick(price):
+    """호가 단위로 올림 (price 이상의 가장 낮은 호가)"""
+    tick = tick_size(price)
+    return int(math.ceil(price / tick) * tick)
+
+
+def tick_up(price, n=1):
+    """n호가 위 가격"""
+    for _ in range(n):
+        price += tick_size(price)
+    return price
+
+
+def tick_down(price, n=1):
+    """n호가 아래 가격"""
+    for _ in range(n):
+        price -= tick_size(price - 1)
+    return price
@@ -0,0 +1,112 @@
+import time
+
+# CommRqData 반환 코드
+OP_ERR_NONE = 0
+OP_ERR_SISE_OVERFLOW = -200    # 시세 조회 과부하
+OP_ERR_DATA_RCV_FAIL = -205    # 데이터 수신 실패
+ERROR_MESSAGES = {
+    -10: "실패",
+    -100: "사용자정보교환 실패",
+    -101: "서버 접속 실패",
+    -106: "통신 연결 종료",
+    -200: "시세 조회 과부하",
+    -201: "전문 작성 초기화 실패",
+    -202: "전문 작성 입력값 오류",
+    -203: "데이터 없음",
+    -204: "조회 가능한 종목수 초과",
+    -205: "데이터 수신 실패",
+}
+RETRYABLE_ERRORS = (OP_ERR_SISE_OVERFLOW, OP_ERR_DATA_RCV_FAIL)
+OVERLOAD_ERRORS = (OP_ERR_SISE_OVERFLOW,)
+
+# TR 우선순위 - 낮은 우선순위(스크리닝)는 과부하 시 먼저 차단
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+TR_PRIORITY = {
+    'opt10081': PRIORITY_LOW,  # 일봉
+    'opt10080': PRIORITY_LOW,  # 분봉
+    'opt10032': PRIORITY_LOW,  # 거래대금상위
+}
+
+
+class TRError(Exception):
+    """TR 요청 실패 (재시도 후에도 실패)"""
+    def __init__(self, rqname, code, message=None):
+        self.rqname = rqname
+        self.code = code
+        super().__init__(message or f"{rqname} 요청 실패 ({code}: {ERROR_MESSAGES.get(code, '알 수 없는 오류')})")
+
+
+class TRTimeout(TRError):
+    """응답 시한 내 OnReceiveTrData 미수신"""
+    def __init__(self, rqname, timeout):
+        super().__init__(rqname, None, f"{rqname} 응답 시간 초과 ({timeout:g}초)")
+
+
+class TRShed(TRError):
+    """과부하 차단/조회 한도로 낮은 우선순위 요청을 보내지 않음"""
+    def __init__(self, rqname, reason):
+        super().__init__(rqname, None, f"{rqname} 요청 생략 - {reason}")
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=3, window=60.0, cooldown=30.0, max_cooldown=300.0, clock=time.monotonic):
+        """
+        TR 과부하 차단기
+        threshold: window 초 안에 과부하/시간초과가 이 횟수 이상이면 차단 (낮은 우선순위 요청만)
+        cooldown: 차단 유지 시간 (초) - 차단 해제 후 시험 요청이 다시 실패하면 두 배로 늘림
+        """
+        self.threshold = threshold
+        self.window = window
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.failures = []
+        self.open_until = None  # 차단 종료 시각 (None이면 정상)
+        self.probing = False    # 차단 해제 후 시험 요청 중
+        self.trips = 0
+
+    def state(self, now=None):
+        if self.open_until is None:
+            return "closed"
+        now = self.clock() if now is None else now
+        return "open" if now < self.open_until else "half_open"
+
+    def allow(self, priority):
+        """요청 허용 여부 - 높은 우선순위는 항상 허용"""
+        if priority == PRIORITY_HIGH:
+            return True
+        state = self.state()
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.open_until is not None and self.state() == "half_open":
+            print("[TR] 과부하 차단 해제")
+            self.open_until = None
+            self.cooldown = self.base_cooldown
+            self.failures = []
+        self.probing = False
+
+    def record_failure(self):
+        now = self.clock()
+        if self.probing:
+            # 시험 요청 실패 - 더 길게 차단
+            self.probing = False
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._trip(now)
+            return
+        self.failures = [t for t in self.failures if t > now - self.window]
+        self.failures.append(now)
+        if self.open_until is None and len(self.failures) >= self.threshold:
+            self._trip(now)
+
+    def _trip(self, now):
+        self.open_until = now + self.cooldown
+        self.trips += 1
+        print(f"[TR] 과부하 감지 - 스크리닝 조회 {self.cooldown:.0f}초 차단")
@@ -0,0 +1,182 @@
+"""
+매매 결정 추적
+
+매수 신호(또는 청산 조건) 발생부터 체결까지 한 결정에 추적 ID 하나를 붙여 단계별 시각을 기록합니다.
+    signal: 신호 발생 (SignalPlanner 발동, ExitEngine 청산 조건)
+    price:  주문 가격 계산 (adjust_to_tick_size)
+    send:   SendOrder 반환 (주문 요청 제한 대기 포함)
+    ack:    체결 통보 '접수'
+    fill:   체결 통보 '체결' (부분 체결마다 기록)
+정정/취소도 같은 ID로 기록되며, 주문이 끝나면(전량 체결, 취소, 전송 실패) 단계별 소요시간을
+전략별/종목별로 모아 백분위수로 출력합니다.
+표시마다 봇 시계 시각과 신호 이후 time.perf_counter 경과를 함께 기록합니다.
+소요시간은 perf_counter 기준 (Windows time.time은 약 15.6ms 단위라 ms 이하 단계를 잴 수 없음).
+재생/모의 실행(가상 시계)은 프로세스 안 단계(신호→가격, 가격→전송)만 perf_counter로,
+접수/체결처럼 가상 시계가 흘러가는 단계는 봇 시계로 잽니다.
+"""
+import csv
+import json
+import os
+import time
+
+# (단계 이름, 설명, 시작 표시, 끝 표시) - 시작/끝은 해당 표시가 처음(fill_last는 마지막) 기록된 시각
+STAGES = (
+    ('price', '신호→가격', 'signal', 'price'),
+    ('send', '가격→전송', 'price', 'send'),
+    ('ack', '전송→접수', 'send', 'ack'),
+    ('fill', '접수→첫 체결', 'ack', 'fill'),
+    ('complete', '첫 체결→전량', 'fill', 'fill_last'),
+    ('total', '신호→전량 체결', 'signal', 'fill_last'),
+)
+IN_PROCESS = ('price', 'send')  # 가상 시계에서도 perf_counter로 재는 단계
+
+
+def percentile(samples, q):
+    """정렬된 리스트의 q 백분위수 (repricer.report와 같은 방식)"""
+    return samples[min(int(len(samples) * q), len(samples) - 1)]
+
+
+class Trace:
+    def __init__(self, tracer, trace_id, code, strategy, side, price, at, perf):
+        self.tracer = tracer
+        self.id = trace_id
+        self.code = code
+        self.strategy = strategy
+        self.side = side
+        self.perf = perf  # 신호 시점 time.perf_counter
+        self.marks = [('signal', at, {'price': price}, 0.0)]  # [(표시, 시각, 상세, 신호 후 perf_counter 경과)]
+        self.outcome = None
+
+    def mark(self, stage, **detail):
+        self.marks.append((stage, self.tracer.clock(), detail or None, time.perf_counter() - self.perf))
+
+    def finish(self, outcome):
+        """결정 종료 - filled(전량 체결), cancelled, partial(부분 체결 후 취소), rejected(전송 실패) 등"""
+        if self.outcome is None:
+            self.outcome = outcome
+            self.tracer.finish(self)
+
+    def times(self, perf=False):
+        """{표시: 시각} - 같은 표시는 처음 시각, 전량 체결 시 마지막 체결은 fill_last (perf: perf_counter 경과)"""
+        times = {}
+        for stage, at, _, elapsed in self.marks:
+            at = elapsed if perf else at
+            times.setdefault(stage, at)
+            if stage == 'fill':
+                times['fill_last'] = at
+        if self.outcome != 'filled':
+            times.pop('fill_last', None)
+        return times
+
+    def durations(self):
+        """{단계: 소요시간(초)} - 기록된 단계만"""
+        clock_times, perf_times = self.times(), self.times(perf=True)
+        durations = {}
+        for name, _, start, end in STAGES:
+            times = perf_times if self.tracer.realtime or name in IN_PROCESS else clock_times
+            if start in times and end in times:
+                durations[name] = times[end] - times[start]
+        return durations
+
+    def to_dict(self):
+        return {'id': self.id, 'code': self.code, 'strategy': self.strategy, 'side': self.side,
+                'outcome': self.outcome, 'marks': [[stage, at, detail, elapsed] for stage, at, detail, elapsed in self.marks],
+                'durations': self.durations()}
+
+
+class DecisionTracer:
+    def __init__(self, clock=time.time, out_dir=None, realtime=True):
+        """
+        매매 결정 추적기
+        clock: 시각 함수 (봇 시계)
+        out_dir: 저장 디렉터리 (지정 시 save()에서 결정별 기록 .jsonl과 단계별 통계 .csv 저장)
+        realtime: 실제 시계 여부 (False면 가상 시계 - 프로세스 밖 단계는 봇 시계로 잼)
+        """
+        self.clock = clock
+        self.realtime = realtime
+        self.out_dir = out_dir
+        self.seq = 0
+        self.active = {}     # {추적 ID: Trace} - 진행 중인 결정
+        self.finished = []   # 저장 전 종료된 결정
+        self.outcomes = {}   # {결과: 건수}
+        self.samples = {'strategy': {}, 'code': {}}  # {묶음: {키: {단계: [초]}}}
+
+    def begin(self, code, strategy, side, price, at=None, perf=None):
+        """결정 시작 (신호 발생) → Trace (at/perf: 신호 시점 봇 시계/time.perf_counter, 없으면 지금)"""
+        at = self.clock() if at is None else at
+        perf = time.perf_counter() if perf is None else perf
+        self.seq += 1
+        trace_id = f"{time.strftime('%Y%m%d%H%M%S', time.localtime(at))}-{self.seq}"
+        trace = Trace(self, trace_id, code, strategy, side, price, at, perf)
+        self.active[trace_id] = trace
+        return trace
+
+    def finish(self, trace):
+        self.active.pop(trace.id, None)
+        self.finished.append(trace)
+        self.outcomes[trace.outcome] = self.outcomes.get(trace.outcome, 0) + 1
+        for stage, seconds in trace.durations().items():
+            for group, key in (('strategy', trace.strategy), ('code', trace.code)):
+                self.samples[group].setdefault(key, {}).setdefault(stage, []).append(seconds)
+
+    def summary(self, group='strategy'):
+        """{키: {단계: {'count', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}}} - group: 'strategy' 또는 'code'"""
+        result = {}
+        for key, stages in self.samples[group].items():
+            result[key] = {}
+            for stage, samples in stages.items():
+                samples = sorted(samples)
+                result[key][stage] = {
+                    'count': len(samples),
+                    'p50_ms': percentile(samples, 0.5) * 1000,
+                    'p90_ms': percentile(samples, 0.9) * 1000,
+                    'p99_ms': percentile(samples, 0.99) * 1000,
+                    'max_ms': samples[-1] * 1000,
+                }
+        return result
+
+    def save(self):
+        """종료된 결정 기록(.jsonl 이어 쓰기)과 단계별 통계(.csv) 저장 → 통계 파일 경로"""
+        if not self.out_dir:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        date = time.strftime('%Y%m%d', time.localtime(self.clock()))
+        with open(os.path.join(self.out_dir, f"{date}_traces.jsonl"), 'a', encoding='utf-8') as f:
+            for trace in self.finished:
+                f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+        self.finished = []
+        path = os.path.join(self.out_dir, f"{date}_stages.csv")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['group', 'key', 'stage', 'count', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+            for group in ('strategy', 'code'):
+                for key, stages in sorted(self.summary(group).items()):
+                    for name, *_ in STAGES:
+                        if name in stages:
+                            s = stages[name]
+                            writer.writerow([group, key, name, s['count'], f"{s['p50_ms']:.3f}", f"{s['p90_ms']:.3f}",
+                                             f"{s['p99_ms']:.3f}", f"{s['max_ms']:.3f}"])
+        return path
+
+    def report(self, top_codes=10):
+        total = sum(self.outcomes.values())
+        outcomes = ", ".join(f"{outcome} {count}건" for outcome, count in sorted(self.outcomes.items()))
+        print(f"[결정 추적] 종료 {total}건 ({outcomes or '없음'}), 진행 중 {len(self.active)}건")
+        if not total:
+            return
+        self._print_table("전략", self.summary('strategy'))
+        by_code = self.summary('code')
+        busiest = sorted(by_code, key=lambda code: -by_code[code].get('price', {'count': 0})['count'])[:top_codes]
+        self._print_table("종목", dict((code, by_code[code]) for code in busiest))
+        path = self.save()
+        if path:
+            print(f"  단계별 통계 저장: {path}")
+
+    def _print_table(self, title, summary):
+        print(f"  {title:<26} {'단계':<14} {'건수':>5} {'p50':>10} {'p90':>10} {'p99':>10} {'최대':>10}")
+        for key, stages in sorted(summary.items()):
+            for name, label, _, _ in STAGES:
+                if name in stages:
+                    s = stages[name]
+                    print(f"  {key:<26} {label:<14} {s['count']:>5} {s['p50_ms']:>8.3f}ms {s['p90_ms']:>8.3f}ms "
+                          f"{s['p99_ms']:>8.3f}ms {s['max_ms']:>8.3f}ms")
@@ -1,34 +1,41 @@
 import sys
 import time
+from PyQt5.QtCore import QCoreApplication
 from PyQt5.QtWidgets import QApplication
-from kiwoom_api import KiwoomAPI
+from kiwoom_api import KiwoomAPI, REAL_FIDS_TRADE
+from scheduler import SessionScheduler
+from symbol_master import MARKET_KOSDAQ, SymbolMaster, normalize_code
+from compute_pool import ComputePool
+from conflation import ConflationQueue
+from exit_engine import ExitEngine
+from ranking import TradeValueRanking
+from repricer import BUY, Repricer
+from signal_cache import SignalCache
+from signal_plan import SignalPlanner
+from tracing import DecisionTracer
+from ticks import floor_to_tick
 from strategy import BollingerBandStrategy, RSIStrategy, ScalpingStrategy, VolatilityBreakoutStrategy, PositionManager
 
 
 class TradingBot:
     def adjust_to_tick_size(self, price):
-        """호가 단위에 맞춰 가격 조정"""
-        if price < 1000:
-            return (price // 1) * 1  # 1원 단위
-        elif price < 5000:
-            return (price // 5) * 5  # 5원 단위
-        elif price < 10000:
-            return (price // 10) * 10  # 10원 단위
-        elif price < 50000:
-            return (price // 50) * 50  # 50원 단위
-        elif price < 100000:
-            return (price // 100) * 100  # 100원 단위
-        elif price < 500000:
-            return (price // 500) * 500  # 500원 단위
-        else:
-            return (price // 1000) * 1000  # 1000원 단위
+        """호가 단위에 맞춰 가격 조정 (내림)"""
+        return floor_to_tick(price)
     
-    def __init__(self):
-        self.api = KiwoomAPI()
+    def __init__(self, api=None):
+        self.api = api or KiwoomAPI()
         self.position_manager = PositionManager()
+        self.symbols = SymbolMaster()
         
         # 설정
         self.target_stocks = []  # 모니터링 종목
+        self.max_target_stocks = 20  # 최대 모니터링 종목 수
+        self.condition_name = None  # 조건검색식 이름 (설정 시 거래대금 상위 스캔 대신 사용)
+        self.condition_index = None
+        self.condition_screen = None
+        self.condition_candidates = []  # 조건 편입 종목 중 모니터링 한도를 넘어 대기 중인 종목
+        self.excluded_stocks = set()  # 보유 + 매수 미체결 종목
+        self.held_stocks = set()  # 보유 종목
         self.max_stocks = 8  # 최대 보유 종목 수
         self.investment_per_stock = 1000000  # 종목당 투자금액 (100만원)
         
@@ -36,11 +43,65 @@ class TradingBot:
         self.profit_target_half = 1.0  # 1% 도달 시 50% 매도
         self.profit_target_full = 1.5  # 1.5% 도달 시 전량 매도
         self.stop_loss = -1.5  # -1.5% 손절
+        self.trailing_stop = 2.0  # 전략-4: 고점 대비 2% 하락 시 전량 매도
+        
+        # 매매 결정 추적 (신호 → 가격 계산 → 주문 전송 → 접수 → 체결 단계별 소요시간)
+        self.clock = time.time
+        self.api.clock = lambda: self.clock()  # 조회 기준일자도 봇 시계 (재생/모의 실행은 가상 시계)
+        # 재생/모의 실행(가상 시계 OCX)은 프로세스 밖 단계(접수/체결)를 봇 시계로 잼
+        self.tracer = DecisionTracer(clock=lambda: self.clock(), realtime=not hasattr(self.api.ocx, 'clock'))
+        
+        # 청산 엔진 (체결 틱마다 미리 계산한 청산 가격과 비교)
+        self.exit_engine = ExitEngine(self.api, self.profit_target_half, self.profit_target_full,
+                                      self.stop_loss, clock=lambda: self.clock())
+        
+        # 체결 합치기 (청산/매수 신호 평가는 종목별 최신 체결만, 청산 조건 교차는 바로 평가, 보유/주문 종목 우선)
+        # 재생/모의 실행(가상 시계 OCX)은 Qt 이벤트 루프 없이 실행되므로 도착 즉시 평가
+        self.conflation = ConflationQueue(critical=self.exit_engine.is_critical, priority=self.is_priority_code,
+                                          immediate=hasattr(self.api.ocx, 'clock'))
+        self.api.real_data_handlers.append(self.conflation.on_real_data)
+        self.conflation.handlers.append(self.exit_engine.on_real_data)
+        self.api.chejan_handlers.append(self.exit_engine.on_chejan)
+        self.exit_engine.tracer = self.tracer
+        
+        # 주문 정정 엔진 (미체결 지정가 주문을 실시간 호가에 맞춰 정정, 포지션은 체결 시 등록)
+        self.repricer = Repricer(self.api, clock=lambda: self.clock())
+        self.api.real_data_handlers.append(self.repricer.on_real_data)
+        self.api.chejan_handlers.append(self.repricer.on_chejan)
+        self.repricer.fill_handlers.append(self.on_order_filled)
+        self.repricer.reject_handlers.append(self.exit_engine.on_order_rejected)
+        self.exit_engine.repricer = self.repricer
+        
+        # 거래대금 순위 (실시간 누적 거래대금 상위 K - rank_watch이면 코스닥 전 종목 체결로 모니터링 종목 계속 갱신)
+        self.rank_watch = False
+        self.ranking = TradeValueRanking(k=50)  # 종목 선정과 같은 상위 50개
+        self.ranking.change_handlers.append(self.on_rank_change)
+        self.conflation.handlers.append(self.ranking.on_real_data)
+        self.rank_events = {}  # {종목코드: 'I'/'D'} - 다음 순위 갱신에서 반영
+        self.rank_screened = {}  # {종목코드: (확인 시각, 통과 여부)} - 전략 조건 확인 결과
+        self.rank_synced_at = None
+        self.rank_resync_interval = 600  # 거래대금상위(opt10032) 재동기화 주기 (초)
+        self.rank_screen_limit = 5  # 순위 갱신 1회에 일봉을 조회할 최대 종목 수
         
         # 매매전략 설정 (1: 볼린저밴드, 2: RSI, 3: 단타, 4: 변동성돌파)
         self.strategy_type = 4  # 기본: 변동성돌파전략 (여기서 변경 가능)
+        self.signal_planner = None
         self.setup_strategy()
         
+        # 장 운영 스케줄 설정 (구간별 실행 주기, 초)
+        self.close_out_time = "1525"  # 마감 전 전체 매도 시각
+        self.buy_intervals = {'buy_window': 30}
+        self.sell_intervals = {'open': 10, 'buy_window': 30, 'monitoring': 15}
+        self.account_intervals = {'open': 60, 'buy_window': 60, 'monitoring': 60}
+        self.reprice_intervals = {'open': 2, 'buy_window': 2, 'monitoring': 2, 'close_out': 2}
+        self.rank_intervals = {'buy_window': 30, 'monitoring': 60}
+        self.scheduler = None
+        self.compute = ComputePool()  # 전략 계산/스크리닝 작업 스레드 (OCX 호출은 메인 스레드에서만)
+        self.signal_cache = SignalCache()  # 전략 계산 결과 (종목/마지막 봉/가격 버전이 같으면 재사용)
+        self.api.real_data_handlers.append(self.signal_cache.on_real_data)
+        self.profiler = None  # IterationProfiler (--profile-budget/--cprofile 지정 시)
+        self.tick_store = None  # TickStore (--tick-store 지정 시 실시간 체결 기록, 재시작하면 오늘 기록 복원)
+        
     def setup_strategy(self):
         """전략 설정"""
         if self.strategy_type == 1:
@@ -58,6 +119,13 @@ class TradingBot:
         else:
             self.strategy = BollingerBandStrategy(period=10, std_dev=1.5)
             print("기본 전략: 볼린저밴드 상단 돌파")
+        self.exit_engine.trailing_stop = self.trailing_stop if self.strategy_type == 4 else None
+        # 장전 신호 계획 (전략마다 새로 만들고, 체결 틱마다 계획 가격과 비교)
+        if self.signal_planner is not None:
+            self.conflation.handlers.remove(self.signal_planner.on_real_data)
+        self.signal_planner = SignalPlanner(self.strategy)
+        self.signal_planner.trigger_handlers.append(self.on_buy_trigger)
+        self.conflation.handlers.append(self.signal_planner.on_real_data)
             
     def change_strategy(self, strategy_type):
         """전략 변경"""
@@ -65,65 +133,89 @@ class TradingBot:
         self.setup_strategy()
         
     def login(self):
-        """로그인"""
+        """로그인 후 종목 마스터 로드"""
         self.api.comm_connect()
+        self.symbols.load_or_build(self.api)
+        
+    def today(self):
+        return time.strftime("%Y%m%d", time.localtime(self.clock()))
+        
+    def get_stock_name(self, code):
+        """종목명 조회 (종목 마스터 우선)"""
+        return self.symbols.name(code) or self.api.get_stock_name(code)
+        
+    def get_excluded_stocks(self):
+        """이미 보유한 종목 및 매수 미체결 종목 (held_stocks, excluded_stocks)"""
+        try:
+            balance = self.api.get_balance()
+            held_stocks = set([normalize_code(stock['code']) for stock in balance['stocks'] if stock['quantity'] > 0])
+            print(f"디버그 - 실제 보유 종목: {held_stocks}")
+            
+            # 매수 미체결 주문 조회
+            buy_orders = self.api.get_not_concluded_orders("2")  # 2:매수
+            buy_pending_stocks = set([normalize_code(order['code']) for order in buy_orders if order.get('code')])
+            print(f"디버그 - 매수 미체결 종목: {buy_pending_stocks}")
+            
+            # 보유 + 미체결 종목 합침
+            excluded_stocks = held_stocks | buy_pending_stocks
+            print(f"디버그 - 제외 종목 총 {len(excluded_stocks)}개: {excluded_stocks}")
+        except:
+            held_stocks = set(self.position_manager.get_all_positions().keys())
+            excluded_stocks = held_stocks
+            print(f"디버그 - 포지션 매니저 보유 종목: {excluded_stocks}")
+        self.held_stocks = held_stocks
+        self.excluded_stocks = excluded_stocks
+        return held_stocks, excluded_stocks
+        
+    def is_priority_code(self, code):
+        """체결 합치기 대기열에서 먼저 평가할 종목 (보유, 청산 감시, 미체결 주문)"""
+        return code in self.exit_engine.positions or code in self.held_stocks or code in self.repricer.by_code
+        
+    def subscribe_watch_list(self):
+        """모니터링 + 보유 종목 실시간 체결 등록 (빠진 종목은 해제)"""
+        wanted = set(self.target_stocks) | self.held_stocks | set(self.exit_engine.positions)
+        registered = set(self.api.screens.registered_codes('trade'))
+        self.api.screens.unregister_real(registered - wanted, 'trade')
+        self.api.screens.register_real(sorted(wanted - registered), REAL_FIDS_TRADE, 'trade')
         
     def select_target_stocks(self):
+        if self.condition_name:
+            self.select_target_stocks_by_condition()
+            return
+            
         # if self.strategy_type == 3:  # 단타전략은 코스피+코스닥 모두
         #     print("코스피+코스닥 거래대금 상위 종목 조회 중...")
         #     all_stocks = self.api.get_volume_rank(market="000")  # 000 = 전체
         # else:
         print("코스닥 거래대금 상위 종목 조회 중...")
-        all_stocks = self.api.get_volume_rank(market="101")  # 101 = 코스닥
-        
         try:
+            all_stocks = self.api.get_volume_rank(market="101")  # 101 = 코스닥
+            self.ranking.seed(all_stocks)  # 이후에는 실시간 체결로 순위 갱신
+            self.rank_synced_at = self.clock()
             
             # 이미 보유한 종목 및 매수 미체결 종목 제외
-            try:
-                balance = self.api.get_balance()
-                held_stocks = set([stock['code'].replace('A', '') for stock in balance['stocks'] if stock['quantity'] > 0])
-                print(f"디버그 - 실제 보유 종목: {held_stocks}")
-                
-                # 매수 미체결 주문 조회
-                buy_orders = self.api.get_not_concluded_orders("2")  # 2:매수
-                buy_pending_stocks = set([order['code'].replace('A', '') for order in buy_orders if order.get('code')])
-                print(f"디버그 - 매수 미체결 종목: {buy_pending_stocks}")
-                
-                # 보유 + 미체결 종목 합침
-                excluded_stocks = held_stocks | buy_pending_stocks
-                print(f"디버그 - 제외 종목 총 {len(excluded_stocks)}개: {excluded_stocks}")
-            except:
-                held_stocks = set(self.position_manager.get_all_positions().keys())
-                excluded_stocks = held_stocks
-                print(f"디버그 - 포지션 매니저 보유 종목: {excluded_stocks}")
+            held_stocks, excluded_stocks = self.get_excluded_stocks()
             
             # 보유하지 않은 종목 중 일봉 데이터가 충분하고 전략 조건을 만족하는 종목만 필터링
             available_stocks = []
+            screened = {}  # {종목코드: 일봉} - 선정 목록 출력에서 다시 조회하지 않음
             print(f"디버그 - 전체 조회 종목 수: {len(all_stocks)}")
             
             for i, stock in enumerate(all_stocks):
                 if i >= 50:  # 상위 50개까지 검사 (더 많은 종목 확인)
                     break
                     
-                stock_code = stock['code'].replace('A', '')  # A 접두사 제거
+                stock_code = normalize_code(stock['code'])  # A 접두사 제거
                 print(f"디버그 - 검사: {stock['name']}({stock_code}), 거래대금: {stock['trade_amount']:,}")
                 
                 if stock_code not in excluded_stocks:
                     try:
                         daily_data = self.api.get_daily_data(stock_code)
-                        if daily_data and len(daily_data) >= 3:  # 단타는 3일만 필요
-                            if self.strategy_type == 3:  # 단타전략
-                                # 거래대금 조건 완화 - 상위 20개 중에서 선정
-                                stock['code'] = stock_code
-                                available_stocks.append(stock)
-                                print(f"디버그 - 선정됨: {stock['name']}({stock_code}), 거래대금: {stock['trade_amount']:,}")
-                            else:  # 기존 전략
-                                if len(daily_data) >= 20:
-                                    middle_band = self.strategy.get_buy_signal_price(daily_data)
-                                    if middle_band and stock['price'] >= middle_band:
-                                        stock['code'] = stock_code
-                                        available_stocks.append(stock)
-                                        print(f"디버그 - 선정됨: {stock['name']}({stock_code})")
+                        screened[stock_code] = daily_data
+                        if self.passes_screen(stock_code, stock['price'], daily_data):
+                            stock['code'] = stock_code
+                            available_stocks.append(stock)
+                            print(f"디버그 - 선정됨: {stock['name']}({stock_code}), 거래대금: {stock['trade_amount']:,}")
                         if len(available_stocks) >= 20:  # 20개 찾으면 중단
                             break
                     except Exception as e:
@@ -143,11 +235,13 @@ class TradingBot:
             print("-" * 110)
             
             for i, stock in enumerate(available_stocks[:20], 1):
-                # 매수신호 발생 가격 계산
+                # 매수신호 발생 가격 계산 (선정 단계의 일봉과 계산 결과 재사용)
                 try:
-                    daily_data = self.api.get_daily_data(stock['code'])
+                    daily_data = screened.get(stock['code'])
+                    if daily_data is None:
+                        daily_data = screened[stock['code']] = self.api.get_daily_data(stock['code'])
                     if daily_data and len(daily_data) >= 20:
-                        buy_signal_price = self.strategy.get_buy_signal_price(daily_data)
+                        buy_signal_price = self.signal_cache.get_buy_signal_price(self.strategy, stock['code'], daily_data)
                         if buy_signal_price:
                             signal_price_str = f"{buy_signal_price:,}원"
                         else:
@@ -166,7 +260,7 @@ class TradingBot:
             for stock in available_stocks[:20]:
                 if stock['name'] == '에코프로':
                     try:
-                        daily_data = self.api.get_daily_data(stock['code'])
+                        daily_data = screened.get(stock['code']) or self.api.get_daily_data(stock['code'])
                         if daily_data and len(daily_data) >= 20:
                             print(f"\n=== {stock['name']} 디버깅 ===")
                             print(f"일봉 데이터 개수: {len(daily_data)}")
@@ -194,13 +288,136 @@ class TradingBot:
             traceback.print_exc()
             self.target_stocks = []
             
-    def check_buy_signals(self):
-        """매수 신호 확인 (9:10-10:00만 매수)"""
-        # 매수 시간 제한 확인
-        # current_time = time.strftime("%H%M")
-        # if not ("0910" <= current_time <= "1000"):
-        #     return
+    def passes_screen(self, code, price, daily_data):
+        """모니터링 종목 조건 - 단타는 일봉 3일 이상, 그 외 전략은 현재가가 매수신호 가격(중간값) 이상"""
+        if not daily_data or len(daily_data) < 3:  # 단타는 3일만 필요
+            return False
+        if self.strategy_type == 3:  # 단타전략 - 거래대금 상위 안에서 선정
+            return True
+        if len(daily_data) < 20:
+            return False
+        # 계산은 작업 스레드 (기다리는 동안 체결/TR 이벤트 처리), 같은 일봉이면 캐시 결과
+        middle_band = self.signal_cache.get_buy_signal_price(self.strategy, code, daily_data, runner=self.compute.run)
+        return bool(middle_band) and price >= middle_band
+        
+    def on_rank_change(self, code, event, amount):
+        """거래대금 상위 K 편입(I)/이탈(D) 이벤트 - 다음 순위 갱신에서 모니터링 종목에 반영"""
+        self.rank_events[code] = event
+        
+    def subscribe_rank_universe(self):
+        """거래대금 순위용 실시간 체결 등록 (코스닥 전 종목, 'rank' 묶음 - 모니터링 종목 등록과 별도)"""
+        codes = self.symbols.codes_by_market(MARKET_KOSDAQ) or [code for code, _ in self.ranking.ranked()]
+        registered = set(self.api.screens.registered_codes('rank'))
+        self.api.screens.register_real([code for code in codes if code not in registered], REAL_FIDS_TRADE, 'rank')
+        print(f"[거래대금 순위] 실시간 체결 등록 {len(self.api.screens.registered_codes('rank'))}종목")
+        
+    def refresh_watch_list(self):
+        """거래대금 순위로 모니터링 종목 갱신 - 상위 이탈 종목은 해제, 상위 종목은 전략 조건 확인 후 빈자리에 추가"""
+        if self.condition_name:
+            return  # 조건검색 모드는 편입/이탈 이벤트로 갱신
+        now = self.clock()
+        if self.rank_synced_at is None or now - self.rank_synced_at >= self.rank_resync_interval:
+            # 실시간 체결을 놓친 종목 보정 (더 큰 값만 반영)
+            self.ranking.seed(self.api.get_volume_rank(market="101"))
+            self.rank_synced_at = now
+        events, self.rank_events = self.rank_events, {}
+        busy = self.held_stocks | set(self.exit_engine.positions) | set(self.repricer.by_code)
+        left = [code for code, event in events.items()
+                if event == "D" and code in self.target_stocks and code not in busy]
+        for code in left:
+            self.target_stocks.remove(code)
+            self.signal_planner.plans.pop(code, None)
+            
+        today = self.today()
+        added = []
+        checked = 0
+        for code, amount in self.ranking.ranked():
+            if len(self.target_stocks) >= self.max_target_stocks or checked >= self.rank_screen_limit:
+                break
+            if code in self.target_stocks or code in self.excluded_stocks:
+                continue
+            screened = self.rank_screened.get(code)
+            if screened is not None and now - screened[0] < self.rank_resync_interval:
+                continue
+            if self.scheduler and self.scheduler.preempt_requested():
+                break
+            checked += 1
+            daily_data = self.api.get_daily_data(code)
+            passed = self.passes_screen(code, self.ranking.prices.get(code, 0), daily_data)
+            self.rank_screened[code] = (now, passed)
+            if passed:
+                self.target_stocks.append(code)
+                self.signal_planner.build(code, daily_data, today)
+                added.append(code)
+                
+        if left or added:
+            names = ", ".join(f"{self.get_stock_name(code)}({code})" for code in added)
+            print(f"[순위 갱신] 이탈 {len(left)}개, 편입 {len(added)}개{': ' + names if names else ''} "
+                  f"→ 모니터링 {len(self.target_stocks)}개")
+            self.subscribe_watch_list()
+            
+    def select_target_stocks_by_condition(self):
+        """조건검색식으로 모니터링 종목 선정 (서버 측 스크리닝 + 실시간 편입/이탈 반영)"""
+        try:
+            if self.condition_index is None:
+                print(f"조건검색식 불러오는 중: {self.condition_name}")
+                if not self.api.get_condition_load():
+                    self.target_stocks = []
+                    return
+                conditions = dict((name, index) for index, name in self.api.get_condition_name_list())
+                if self.condition_name not in conditions:
+                    print(f"조건검색식 없음: {self.condition_name} (저장된 조건식: {', '.join(conditions)})")
+                    self.target_stocks = []
+                    return
+                self.condition_index = conditions[self.condition_name]
+                self.condition_screen = self.api.screens.acquire('condition')
+                self.api.real_condition_handlers.append(self.on_condition_event)
+            else:
+                # 재선정 시 기존 실시간 조건검색 중지 후 다시 요청
+                self.api.send_condition_stop(self.condition_screen, self.condition_name, self.condition_index)
+                
+            held_stocks, excluded_stocks = self.get_excluded_stocks()
+            codes = self.api.send_condition(self.condition_screen, self.condition_name, self.condition_index, 1)
+            candidates = [code for code in codes if code not in excluded_stocks]
+            self.target_stocks = candidates[:self.max_target_stocks]
+            self.condition_candidates = candidates[self.max_target_stocks:]
+            
+            print(f"\n[조건검색] {self.condition_name}: 검색 {len(codes)}개, "
+                  f"모니터링 {len(self.target_stocks)}개, 대기 {len(self.condition_candidates)}개 "
+                  f"(제외 {len(excluded_stocks)}개)")
+            for code in self.target_stocks:
+                print(f"  {self.get_stock_name(code)}({code})")
+        except Exception as e:
+            print(f"조건검색 종목 선정 실패: {e}")
+            self.target_stocks = []
             
+    def on_condition_event(self, code, event_type, condition_name, condition_index):
+        """실시간 조건검색 편입(I)/이탈(D) - 모니터링 종목 증분 갱신"""
+        if condition_name != self.condition_name:
+            return
+        if event_type == "I":
+            if code in self.target_stocks or code in self.excluded_stocks:
+                return
+            if len(self.target_stocks) < self.max_target_stocks:
+                self.target_stocks.append(code)
+                print(f"[조건 편입] {self.get_stock_name(code)}({code}) - 모니터링 {len(self.target_stocks)}개")
+            elif code not in self.condition_candidates:
+                self.condition_candidates.append(code)
+        elif event_type == "D":
+            if code in self.condition_candidates:
+                self.condition_candidates.remove(code)
+            if code in self.target_stocks:
+                self.target_stocks.remove(code)
+                print(f"[조건 이탈] {self.get_stock_name(code)}({code}) - 모니터링 {len(self.target_stocks)}개")
+                # 대기 종목으로 빈자리 채우기
+                while self.condition_candidates and len(self.target_stocks) < self.max_target_stocks:
+                    candidate = self.condition_candidates.pop(0)
+                    if candidate not in self.excluded_stocks:
+                        self.target_stocks.append(candidate)
+        self.subscribe_watch_list()
+                        
+    def check_buy_signals(self):
+        """매수 신호 확인 (매수 시간대는 스케줄러의 buy_window 구간에서만 호출)"""
         # 실제 계좌 보유 종목 수 확인
         positions = self.position_manager.get_all_positions()  # 기본값 설정
         try:
@@ -215,36 +432,90 @@ class TradingBot:
             if len(positions) >= self.max_stocks:
                 return
             
+        today = self.today()
         for code in self.target_stocks:
             if isinstance(positions, dict) and code in positions:
                 continue
+            if self.repricer.has_working(code, BUY):
+                continue
+            if self.scheduler and self.scheduler.preempt_requested():
+                print("정시 작업 대기 중 - 매수 신호 확인 중단")
+                break
+            # 실시간 체결을 받는 종목은 틱마다 계획 가격으로 확인 (조회 없음)
+            if code in self.signal_planner.live:
+                continue
                 
             try:
-                daily_data = self.api.get_daily_data(code)
-                if daily_data and self.strategy.check_buy_signal(daily_data):
-                    current_price = self.api.get_current_price(code)
-                    if current_price > 0:  # 0으로 나누기 방지
-                        # 매수 가격을 현재가의 99%로 설정 후 호가단위 조정
-                        target_price = int(current_price * 0.99)
-                        buy_price = self.adjust_to_tick_size(target_price)
-                        quantity = int(self.investment_per_stock / buy_price)
-                        
-                        if quantity > 0:
-                            name = self.api.get_stock_name(code)
-                            print(f"\n[매수 신호] {name}({code}): 현재가 {current_price:,}원, 매수가 {buy_price:,}원, {quantity}주")
-                            
-                            # 매수 주문 (지정가)
-                            ret = self.api.send_order("신규매수", "0101", self.api.account_num, 
-                                                      1, code, quantity, buy_price, "00")
-                            if ret == 0:
-                                print("매수 주문 성공")
-                                self.position_manager.add_position(code, buy_price, quantity)
-                            else:
-                                print(f"매수 주문 실패: {ret}")
-                            
+                plan = self.signal_planner.plans.get(code)
+                daily_data = None
+                if plan is None or plan.date != today:
+                    # 장중 편입 종목 등 계획이 없는 종목은 일봉 조회 후 계획 생성
+                    daily_data = self.api.get_daily_data(code)
+                    plan = self.signal_planner.build(code, daily_data, today)
+                if plan is None or not plan.active or plan.fired:
+                    continue
+                # 틱 저장소에 오늘 체결이 있으면 (재시작 전 기록 포함) 조회 없이 당일 봉으로 확인
+                row = self.tick_store.day_bar(code) if self.tick_store is not None else None
+                if row is None:
+                    if daily_data is None:
+                        daily_data = self.api.get_daily_data(code)
+                    row = daily_data[0] if daily_data else None
+                if row is not None:
+                    self.signal_planner.on_bar(code, row)
             except Exception as e:
                 print(f"매수 신호 확인 실패 ({code}): {e}")
                 
+    def on_buy_trigger(self, code, current_price):
+        """신호 계획 발동 콜백 - 매수 시간대/보유 한도 확인 후 매수 주문 → 주문 여부"""
+        signal_at, signal_perf = self.clock(), time.perf_counter()
+        if self.scheduler is not None and self.scheduler.current_phase != "buy_window":
+            return False
+        if code not in self.target_stocks or code in self.excluded_stocks or self.repricer.has_working(code, BUY):
+            return False
+        positions = self.position_manager.get_all_positions()
+        if code in positions:
+            return False
+        holding = set(positions) | set(self.exit_engine.positions) | self.held_stocks
+        holding |= set(working for working in self.repricer.by_code if self.repricer.has_working(working, BUY))
+        if len(holding) >= self.max_stocks:
+            return False
+        trace = self.tracer.begin(code, type(self.strategy).__name__, BUY, current_price, at=signal_at,
+                                   perf=signal_perf)
+        # 매수 가격을 현재가의 99%로 설정 후 호가단위 조정
+        target_price = int(current_price * 0.99)
+        buy_price = self.adjust_to_tick_size(target_price)
+        quantity = int(self.investment_per_stock / buy_price)
+        trace.mark('price', price=buy_price, qty=quantity)
+        if quantity <= 0:
+            trace.finish('skipped')
+            return False
+        name = self.get_stock_name(code)
+        plan = self.signal_planner.plans.get(code)
+        print(f"\n[매수 신호] {name}({code}): 현재가 {current_price:,}원 (계획 {plan.describe()}), "
+              f"매수가 {buy_price:,}원, {quantity}주 (추적 {trace.id})")
+        
+        # 매수 주문 (지정가, 미체결 시 정정 엔진이 호가를 따라감 - 포지션은 체결 시 등록)
+        ret = self.repricer.submit(code, BUY, quantity, buy_price, "신규매수", ref_price=current_price, trace=trace)
+        if ret == 0:
+            print("매수 주문 성공")
+            return True
+        print(f"매수 주문 실패: {ret}")
+        return False
+        
+    def on_order_filled(self, order, quantity, price):
+        """정정 엔진 체결 콜백 - 매수 체결분만 포지션에 반영 (평균 단가)"""
+        if order.side != BUY:
+            return
+        pos = self.position_manager.get_position(order.code)
+        if pos is None:
+            self.position_manager.add_position(order.code, price, quantity)
+        else:
+            total = pos['quantity'] + quantity
+            pos['buy_price'] = (pos['buy_price'] * pos['quantity'] + price * quantity) / total
+            pos['quantity'] = total
+        print(f"[매수 체결] {self.get_stock_name(order.code)}({order.code}): {price:,}원 {quantity}주 "
+              f"(누적 {order.filled}/{order.quantity}주)")
+                
     def show_account_info(self):
         """계좌 정보 출력"""
         try:
@@ -277,64 +548,76 @@ class TradingBot:
             print(f"계좌 정보 조회 실패: {e}")
     
     def sell_all_at_close(self):
-        """마감 전 모든 보유 종목 매도 (15:18)"""
-        try:
-            balance = self.api.get_balance()
-            if not balance or 'stocks' not in balance:
-                return
-                
-            held_stocks = balance['stocks']
-            if not held_stocks:
-                print("마감 매도: 보유 종목이 없습니다.")
-                return
-                
-            print(f"\n=== 마감 전 전체 매도 (15:18) ===")
-            print(f"보유 종목 {len(held_stocks)}개 전체 매도 시작...")
+        """
+        마감 전 모든 보유 종목 매도 (close_out_time, 기본 15:25)
+        잔고 조회/주문 전송이 실패하면 예외로 끝내 스케줄러가 유예 시간 안에서 다시 실행 (그동안 청산 엔진은 계속 감시)
+        """
+        balance = self.api.get_balance()  # TR 실패는 그대로 예외 - 청산 엔진/미체결 주문은 건드리지 않음
+        if not balance or 'stocks' not in balance:
+            raise RuntimeError("마감 매도: 잔고 조회 결과 없음")
+        
+        # 미체결 매수는 취소, 지정가 매도는 취소 확인 후 남은 수량을 정정 엔진이 시장가로 다시 주문
+        self.repricer.cancel_all(market_sells=True)
+        
+        held_stocks = balance['stocks']
+        if not held_stocks:
+            print("마감 매도: 보유 종목이 없습니다.")
+            self.exit_engine.clear()
+            return
             
-            for stock in held_stocks:
-                try:
-                    if not isinstance(stock, dict) or stock.get('quantity', 0) <= 0:
-                        continue
-                        
-                    code = str(stock.get('code', '')).replace('A', '')  # A 접두사 제거
-                    quantity = stock.get('quantity', 0)
-                    name = stock.get('name', '')
-                    profit_rate = stock.get('profit_rate', 0)
-                    
-                    if not code:
-                        continue
-                        
-                    print(f"[마감매도] {name}({code}): {quantity}주, 수익률 {profit_rate:.2f}%")
-                    
-                    # 시장가 매도 주문
-                    ret = self.api.send_order("마감매도", "0102", self.api.account_num,
-                                              2, code, quantity, 0, "03")  # 시장가
-                    if ret == 0:
-                        print(f"마감 매도 주문 성공: {name}")
-                        # 포지션 매니저에서 제거
-                        self.position_manager.remove_position(code)
-                    else:
-                        print(f"마감 매도 주문 실패: {name} - 오류코드: {ret}")
-                    
-                    time.sleep(0.2)  # 주문 간격
+        print(f"\n=== 마감 전 전체 매도 ({self.close_out_time[:2]}:{self.close_out_time[2:]}) ===")
+        print(f"보유 종목 {len(held_stocks)}개 전체 매도 시작...")
+        
+        failed = []
+        for stock in held_stocks:
+            try:
+                if not isinstance(stock, dict) or stock.get('quantity', 0) <= 0:
+                    continue
                     
-                except Exception as stock_error:
-                    print(f"마감 매도 오류: {stock_error}")
+                code = normalize_code(stock.get('code', ''))  # A 접두사 제거
+                # 주문가능수량만 매도 (매도 주문 중인 수량은 취소 확인 후 시장가로 나감)
+                quantity = stock.get('available', stock.get('quantity', 0))
+                name = stock.get('name', '')
+                profit_rate = stock.get('profit_rate', 0)
+                
+                if not code:
+                    continue
+                if quantity <= 0:
+                    print(f"[마감매도] {name}({code}): 매도 주문 중 ({stock.get('quantity', 0)}주)")
                     continue
                     
-            print("=== 마감 전 전체 매도 완료 ===")
-            
-        except Exception as e:
-            print(f"마감 매도 실패: {e}")
+                print(f"[마감매도] {name}({code}): {quantity}주, 수익률 {profit_rate:.2f}%")
+                
+                # 시장가 매도 주문
+                ret = self.api.send_order("마감매도", self.api.screens.order_screen(), self.api.account_num,
+                                          2, code, quantity, 0, "03")  # 시장가
+                if ret == 0:
+                    print(f"마감 매도 주문 성공: {name}")
+                    # 포지션 매니저에서 제거
+                    self.position_manager.remove_position(code)
+                else:
+                    print(f"마감 매도 주문 실패: {name} - 오류코드: {ret}")
+                    failed.append(code)
+                
+                time.sleep(0.2)  # 주문 간격
+                
+            except Exception as stock_error:
+                print(f"마감 매도 오류: {stock_error}")
+                failed.append(stock.get('code', '') if isinstance(stock, dict) else '')
+                
+        if failed:
+            # 재실행 시 이미 주문한 수량은 주문가능수량에서 빠지므로 남은 종목만 다시 매도
+            raise RuntimeError(f"마감 매도 실패 {len(failed)}종목: {', '.join(failed)}")
+        # 매도 주문을 모두 보낸 뒤에 청산 엔진 중지
+        self.exit_engine.clear()
+        print("=== 마감 전 전체 매도 완료 ===")
     
     def check_sell_signals(self):
-        """매도 신호 확인 - 실제 계좌 보유 종목 기준"""
-        # 15:18분에 모든 종목 매도
-        current_time = time.strftime("%H%M")
-        if current_time == "1525":
-            self.sell_all_at_close()
-            return
-            
+        """
+        보유 종목 점검 - 실제 계좌 보유 종목을 청산 엔진과 맞춤
+        (청산 판단은 실시간 체결 틱마다 청산 엔진이 수행, 마감 청산은 스케줄러 정시 작업)
+        """
+        self.exit_engine.check()  # 잔고 변화 없는 청산 주문 (거부/미체결) 감시 재개
         try:
             # 실제 계좌에서 보유 종목 조회
             balance = self.api.get_balance()
@@ -352,7 +635,7 @@ class TradingBot:
                     if not isinstance(stock, dict) or stock.get('quantity', 0) <= 0:
                         continue
                         
-                    code = str(stock.get('code', '')).replace('A', '')  # A 접두사 제거
+                    code = normalize_code(stock.get('code', ''))  # A 접두사 제거
                     current_price = stock.get('current_price', 0)
                     buy_price = stock.get('buy_price', 0)
                     quantity = stock.get('quantity', 0)
@@ -363,79 +646,105 @@ class TradingBot:
                         continue
                 
                     print(f"{name}({code}): 매수가 {buy_price:,}원, 현재가 {current_price:,}원, 수익률 {profit_rate:.2f}%")
-                    print(f"디버그 - 손절기준: {self.stop_loss}%, 현재수익률: {profit_rate:.2f}%, 조건만족: {profit_rate <= self.stop_loss}")
-                
-                    # 트레일링 스톱 또는 고정 손절
-                    try:
-                        positions = self.position_manager.get_all_positions()
-                        pos = positions.get(code) if isinstance(positions, dict) else None
-                    except:
-                        pos = None
                     
-                    # 트레일링 스톱 로직 (전략-4에만 적용)
-                    if self.strategy_type == 4 and pos and profit_rate > 0:
-                        # 수익이 날 때 손절선을 올려서 수익 보호
-                        trailing_stop = max(self.stop_loss, profit_rate - 2.0)  # 최대 2% 하락 허용
-                        if profit_rate <= trailing_stop:
-                            print(f"[트레일링 스톱] {name}({code}): {profit_rate:.2f}% (손절선: {trailing_stop:.2f}%)")
-                            ret = self.api.send_order("트레일링매도", "0102", self.api.account_num,
-                                                      2, code, quantity, 0, "03")  # 시장가
-                            if ret == 0:
-                                print("트레일링 스톱 매도 성공")
-                            continue
-                    
-                    # 기본 손절: -1.5%
-                    if profit_rate <= self.stop_loss:
-                        print(f"[손절 매도] {name}({code}): {profit_rate:.2f}%")
-                        ret = self.api.send_order("손절매도", "0102", self.api.account_num,
-                                                  2, code, quantity, 0, "03")  # 시장가
-                        print(f"  디버그 - 손절 주문 결과: {ret}")
-                        if ret == 0:
-                            print("손절 매도 주문 성공")
-                        else:
-                            print(f"손절 매도 주문 실패: {ret}")
-                            
-                    # 전량 매도: +1.5%
-                    elif profit_rate >= self.profit_target_full:
-                        print(f"[전량 매도] {name}({code}): {profit_rate:.2f}%")
-                        ret = self.api.send_order("익절매도", "0102", self.api.account_num,
-                                                  2, code, quantity, current_price, "00")
-                        if ret == 0:
-                            print("전량 매도 주문 성공")
-                            
-                    # 50% 매도: +1.0% (포지션 매니저에서 이미 50% 매도했는지 확인)
-                    elif profit_rate >= self.profit_target_half:
-                        # pos가 없을 때만 다시 조회 (이미 위에서 positions를 정의했음)
-                        pass  # pos는 이미 위에서 정의됨
+                    # 체결 통보를 놓친 종목(전일 보유, 재시작 등)은 청산 엔진에 등록 후 현재가로 바로 확인
+                    if not self.exit_engine.owns(code):
+                        pos = self.position_manager.get_position(code)
+                        self.exit_engine.track(code, buy_price, quantity,
+                                               half_sold=bool(pos and pos.get('half_sold')),
+                                               available=stock.get('available', quantity))
+                        self.exit_engine.on_price(code, current_price)
                         
-                        # 포지션 매니저에 없거나 아직 50% 매도하지 않은 경우
-                        if not pos or not pos.get('half_sold', False):
-                            half_qty = quantity // 2
-                            if half_qty > 0:
-                                print(f"[50% 매도] {name}({code}): {profit_rate:.2f}%, {half_qty}주")
-                                ret = self.api.send_order("부분매도", "0102", self.api.account_num,
-                                                          2, code, half_qty, current_price, "00")
-                                if ret == 0:
-                                    print("50% 매도 주문 성공")
-                                    # 포지션 매니저에 50% 매도 기록
-                                    if pos:
-                                        self.position_manager.update_half_sold(code)
-                                    else:
-                                        # 포지션 매니저에 없으면 새로 추가하고 50% 매도 표시
-                                        self.position_manager.add_position(code, buy_price, quantity)
-                                        self.position_manager.update_half_sold(code)
-                                        
                 except Exception as stock_error:
                     print(f"종목 처리 오류 ({name if 'name' in locals() else 'Unknown'}): {stock_error}")
-                    import traceback
-                    traceback.print_exc()
                     continue
+                    
+            # 실시간 체결 미등록 종목 등록
+            self.subscribe_watch_list()
                         
         except Exception as e:
             print(f"매도 신호 확인 실패: {e}")
                 
+    def plan_signals(self):
+        """장전 신호 계획 - 모니터링 종목별로 전일까지의 일봉으로 매수 조건 가격 계산"""
+        today = self.today()
+        self.signal_planner.clear()
+        print(f"\n[신호 계획] {today}")
+        
+        def planned(code):
+            def callback(plan, error):
+                if error is not None:
+                    print(f"신호 계획 실패 ({code}): {error}")
+                else:
+                    self.signal_planner.store(code, plan)
+            return callback
+        
+        # 일봉 조회는 메인 스레드, 계획 계산은 작업 스레드 (다음 종목 조회 중에 계산)
+        for code in self.target_stocks:
+            try:
+                daily_data = self.api.get_daily_data(code)
+                self.compute.submit(planned(code), self.signal_planner.make, code, daily_data, today)
+            except Exception as e:
+                print(f"신호 계획 실패 ({code}): {e}")
+        self.compute.wait()
+        for code in self.target_stocks:
+            plan = self.signal_planner.plans.get(code)
+            if plan is not None:
+                print(f"  {self.get_stock_name(code)}({code}): {plan.describe()}")
+                
+    def warmup(self):
+        """장전 준비 - 매도 미체결 취소, 모니터링 종목 선정 및 신호 계획"""
+        # 매도 미체결 주문 취소
+        self.api.cancel_sell_orders()
+        self.exit_engine.enabled = True
+        self.select_target_stocks()
+        self.plan_signals()
+        self.subscribe_watch_list()
+        if self.rank_watch:
+            self.subscribe_rank_universe()
+        self.api.screens.report()
+        
+    def on_post_market(self):
+        """장 마감 이후 - 실시간 조건검색 중지 및 스케줄 통계 출력"""
+        print("\n장 마감 - 자동매매 대기")
+        if self.condition_name and self.condition_index is not None:
+            self.api.send_condition_stop(self.condition_screen, self.condition_name, self.condition_index)
+        self.api.screens.unregister_all()
+        self.conflation.flush()
+        self.conflation.report()
+        self.exit_engine.report()
+        self.repricer.report()
+        self.tracer.report()
+        self.signal_cache.report()
+        self.ranking.report()
+        if self.tick_store is not None:
+            self.tick_store.flush()
+            self.tick_store.report()
+        self.api.report_tr_stats()
+        self.scheduler.report()
+        if self.profiler:
+            self.profiler.report()
+        
+    def setup_scheduler(self):
+        """장 운영 구간별 작업 등록"""
+        self.scheduler = SessionScheduler(clock=self.clock)
+        self.scheduler.profiler = self.profiler
+        # 전날 실행해 둔 경우 장 시작 전 종목 재선정 (놓친 경우 건너뜀)
+        self.scheduler.add_deadline("장전 준비", self.warmup, "0850", catch_up=False)
+        self.scheduler.add_periodic("계좌 정보", self.show_account_info, self.account_intervals)
+        self.scheduler.add_periodic("매수 신호", self.check_buy_signals, self.buy_intervals)
+        self.scheduler.add_periodic("매도 신호", self.check_sell_signals, self.sell_intervals)
+        self.scheduler.add_periodic("주문 정정", self.repricer.check, self.reprice_intervals)
+        if self.rank_watch:
+            self.scheduler.add_periodic("순위 갱신", self.refresh_watch_list, self.rank_intervals)
+        # 마감 청산은 시각을 놓쳐도 장 종료(15:30) 전까지는 즉시 따라잡아 실행 (실패 시 5초 후 재시도)
+        self.scheduler.add_deadline("마감 청산", self.sell_all_at_close, self.close_out_time,
+                                    catch_up=True, grace=300, retry_delay=5)
+        self.scheduler.on_phase_enter("post_market", self.on_post_market)
+        return self.scheduler
+        
     def run(self):
-        """트레이딩 봇 실행"""
+        """트레이딩 봇 실행 (Qt 이벤트 루프에서 스케줄러가 작업 실행)"""
         print("=" * 50)
         print("키움증권 시스템 트레이딩 봇 시작")
         print("=" * 50)
@@ -443,54 +752,169 @@ class TradingBot:
         self.login()
         time.sleep(2)
         
-        # 매도 미체결 주문 취소
-        self.api.cancel_sell_orders()
-        time.sleep(1)
-        
-        self.select_target_stocks()
+        self.warmup()
         
         print("\n자동매매 시작...")
-        iteration = 0
+        self.setup_scheduler()
+        self.scheduler.start()
+        
         
-        while True:
-            try:
-                iteration += 1
-                print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] 반복 #{iteration}")
-                
-                # 계좌 정보 출력
-                self.show_account_info()
-                
-                # 매수 신호 확인
-                self.check_buy_signals()
-                
-                # 매도 신호 확인
-                self.check_sell_signals()
-                
-                # 30초 대기
-                time.sleep(30)
-                
-            except KeyboardInterrupt:
-                print("\n프로그램 종료")
-                break
-            except Exception as e:
-                print(f"오류 발생: {e}")
-                time.sleep(10)
-
-
 if __name__ == "__main__":
     import argparse
+    import signal
     
     # 명령행 인수 처리
     parser = argparse.ArgumentParser(description='키움증권 트레이딩 봇')
     parser.add_argument('--strategy', type=int, choices=[1, 2, 3, 4], default=4,
                         help='매매전략 선택 (1: 볼린저밴드, 2: RSI, 3: 단타, 4: 변동성돌파)')
+    parser.add_argument('--condition', type=str, default=None,
+                        help='HTS에 저장한 조건검색식 이름 (지정 시 조건검색으로 모니터링 종목 선정)')
+    parser.add_argument('--record', type=str, default=None,
+                        help='OCX 호출/이벤트를 기록할 로그 파일 경로')
+    parser.add_argument('--replay', type=str, default=None,
+                        help='기록된 OCX 로그로 재생 실행 (키움 서버 불필요)')
+    parser.add_argument('--replay-speed', type=float, default=0,
+                        help='재생 속도 (0: 최대 속도, 1: 기록된 속도)')
+    parser.add_argument('--replay-strict', action='store_true',
+                        help='재생 시 모든 호출 순서가 기록과 같아야 함')
+    parser.add_argument('--paper', type=str, nargs='?', const='synthetic', default=None,
+                        help="모의 체결 브로커로 하루 장 실행 (값 없음: 합성 시세, 로그 경로: 기록된 실시간 시세)")
+    parser.add_argument('--paper-codes', type=int, default=200,
+                        help='모의 실행 합성 종목 수')
+    parser.add_argument('--paper-seed', type=int, default=0,
+                        help='모의 실행 합성 시세/지연 난수 시드')
+    parser.add_argument('--rank-watch', action='store_true',
+                        help='코스닥 전 종목 실시간 체결로 거래대금 순위를 유지하며 장중 모니터링 종목 계속 갱신')
+    parser.add_argument('--quote-board', type=str, default=None,
+                        help='실시간 시세를 기록할 공유 메모리 시세판 파일 (다른 프로세스에서 QuoteBoardReader로 조회)')
+    parser.add_argument('--tick-store', type=str, default=None,
+                        help='실시간 체결을 일자/종목별로 기록할 틱 저장소 디렉터리 (재시작 시 오늘 기록 복원)')
+    parser.add_argument('--trace-dir', type=str, default=None,
+                        help='매매 결정 추적 저장 디렉터리 (장 마감 후 결정별 기록 .jsonl, 전략/종목별 단계 통계 .csv)')
+    parser.add_argument('--profile-budget', type=float, default=None,
+                        help='작업 1회 실행 예산(초) - 넘으면 logs/profile에 스택(.folded)과 구간별 소요시간 저장')
+    parser.add_argument('--cprofile', type=str, default=None,
+                        help="지정한 작업의 다음 1회 실행을 cProfile로 측정 (예: '매수 신호', '*'는 첫 작업)")
     args = parser.parse_args()
     
+    def attach_quote_board(bot):
+        if not args.quote_board:
+            return None
+        from quote_board import QuoteBoardWriter
+        
+        board = QuoteBoardWriter(args.quote_board)
+        bot.api.real_data_handlers.append(board.on_real_data)
+        print(f"공유 메모리 시세판: {args.quote_board}")
+        return board
+    
+    def attach_tick_store(bot):
+        if not args.tick_store:
+            return None
+        from tick_store import TickStore
+        
+        store = TickStore(args.tick_store, clock=bot.clock)
+        bot.api.real_data_handlers.append(store.on_real_data)
+        bot.tick_store = store
+        print(f"틱 저장소: {store.dir}")
+        return store
+    
+    def attach_profiler(bot):
+        if args.profile_budget is None and not args.cprofile:
+            return None
+        from profiler import IterationProfiler
+        
+        profiler = IterationProfiler(budget=args.profile_budget)
+        if args.cprofile:
+            profiler.profile_next(args.cprofile)
+        bot.profiler = profiler
+        bot.api.profiler = profiler
+        profiler.start()
+        return profiler
+    
+    if args.replay:
+        from recorder import ReplayOCX, Replayer
+        
+        app = QCoreApplication(sys.argv)
+        ocx = ReplayOCX(args.replay, strict=args.replay_strict)
+        bot = TradingBot(KiwoomAPI(ocx))
+        bot.clock = ocx.clock
+        bot.symbols.cache_dir = None
+        if args.strategy != bot.strategy_type:
+            bot.change_strategy(args.strategy)
+        bot.condition_name = args.condition
+        bot.tracer.out_dir = args.trace_dir
+        bot.rank_watch = args.rank_watch
+        attach_quote_board(bot)
+        store = attach_tick_store(bot)
+        attach_profiler(bot)
+        replayer = Replayer(bot, ocx, speed=args.replay_speed)
+        replayer.run()
+        if store:
+            store.close()
+        sys.exit(1 if replayer.failed else 0)
+    
+    if args.paper:
+        from paper_broker import MatchingEngine, PaperOCX, PaperSession, log_session, synthetic_history, synthetic_ticks
+        
+        app = QCoreApplication(sys.argv)
+        if args.paper == 'synthetic':
+            date = time.strftime("%Y%m%d")
+            history = synthetic_history(args.paper_codes, date=date, seed=args.paper_seed)
+            events = synthetic_ticks(history, date, seed=args.paper_seed)
+        else:
+            date, history, events = log_session(args.paper, seed=args.paper_seed)
+        ocx = PaperOCX(history, MatchingEngine(seed=args.paper_seed), date)
+        bot = TradingBot(KiwoomAPI(ocx))
+        bot.clock = ocx.clock
+        bot.symbols.cache_dir = None
+        if args.strategy != bot.strategy_type:
+            bot.change_strategy(args.strategy)
+        bot.condition_name = args.condition
+        bot.tracer.out_dir = args.trace_dir
+        bot.rank_watch = args.rank_watch
+        attach_quote_board(bot)
+        store = attach_tick_store(bot)
+        attach_profiler(bot)
+        PaperSession(bot, ocx, events).run()
+        if store:
+            store.close()
+        sys.exit(0)
+    
     app = QApplication(sys.argv)
-    bot = TradingBot()
+    log = None
+    if args.record:
+        from PyQt5.QAxContainer import QAxWidget
+        from recorder import OcxLogWriter, RecordingOCX
+        
+        log = OcxLogWriter(args.record)
+        bot = TradingBot(KiwoomAPI(RecordingOCX(QAxWidget("KHOPENAPI.KHOpenAPICtrl.1"), log)))
+        bot.symbols.cache_dir = None  # 재생 시 같은 호출이 나오도록 종목 마스터도 기록
+        print(f"OCX 기록 중: {args.record}")
+    else:
+        bot = TradingBot()
     
     # 전략 설정
     if args.strategy != bot.strategy_type:
         bot.change_strategy(args.strategy)
+    bot.condition_name = args.condition
+    bot.tracer.out_dir = args.trace_dir
+    bot.rank_watch = args.rank_watch
+    board = attach_quote_board(bot)
+    store = attach_tick_store(bot)
+    attach_profiler(bot)
+    
+    # Ctrl+C로 이벤트 루프 종료
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
     
     bot.run()
+    app.exec_()
+    print("\n프로그램 종료")
+    if bot.scheduler:
+        bot.scheduler.report()
+    if board:
+        board.close()
+    if store:
+        store.close()
+    if log:
+        log.close()
+        print(f"OCX 기록 저장: {args.record} ({log.count:,}건)")